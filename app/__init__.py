@@ -1,7 +1,23 @@
 from flask import Flask
 from flask_login import LoginManager
+from werkzeug.middleware.proxy_fix import ProxyFix
 from config import Config
+from .logs import logs
 from .filters import format_datetime
+from .spool import spool
+from .cache import form_snapshots, submission_tokens, user_cache
+from .events import events
+from .database import Database
+from .instrumentation import instrumentation
+from .metrics import metrics
+from .assets import assets
+from .compression import compression
+from .http_cache import http_cache
+from .admission import admission
+from . import concurrency
+from .security import password_hasher, login_throttle
+from .writebehind import write_behind
+from .ratelimit import form_rate_limiter
 
 login_manager = LoginManager()
 
@@ -9,13 +25,40 @@ def create_app(config_class=Config):
     """Factory para criar a aplicação Flask"""
     app = Flask(__name__)
     app.config.from_object(config_class)
+    if app.config['PROXY_FIX_X_FOR']:
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['PROXY_FIX_X_FOR'])
     
     # Inicializar extensões
+    logs.init_app(app)
+    compression.init_app(app)
+    Database.init_app(app)
+    instrumentation.init_app(app)
+    metrics.init_app(app)
+    assets.init_app(app)
+    http_cache.init_app(app)
+    admission.init_app(app)
     login_manager.init_app(app)
     login_manager.login_view = 'auth.login'
     login_manager.login_message = 'Por favor, faça login para acessar esta página.'
     login_manager.login_message_category = 'info'
     
+    form_snapshots.configure(maxsize=app.config['FORM_SNAPSHOT_MAXSIZE'],
+                             ttl=app.config['FORM_SNAPSHOT_TTL'])
+    submission_tokens.configure(maxsize=app.config['SUBMISSION_TOKEN_MAXSIZE'],
+                                ttl=app.config['SUBMISSION_TOKEN_TTL'])
+    user_cache.configure(maxsize=app.config['USER_CACHE_MAXSIZE'],
+                         ttl=app.config['USER_CACHE_TTL'])
+    events.init_app(app)
+    
+    concurrency.configure(app.config['CONCURRENCY_MAX_WORKERS'])
+    password_hasher.init_app(app)
+    login_throttle.init_app(app)
+    write_behind.init_app(app)
+    form_rate_limiter.init_app(app)
+    
+    if app.config['SUBMISSION_MODE'] == 'spool':
+        spool.init_app(app)
+    
     # Registrar blueprints
     from app.routes import bp_auth, bp_admin, bp_forms, bp_api, bp_admin_tenants, bp_tenant_users
     
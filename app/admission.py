@@ -0,0 +1,126 @@
+"""
+Controle de admissão por worker: recusa trabalho de baixa prioridade sob pico.
+
+Quando o PostgREST fica lento (ex.: campanha de um tenant), os requests se
+acumulam até o timeout do gunicorn. Aqui cada worker acompanha:
+
+- requests em andamento (incrementado no before_request, decrementado no teardown);
+- a latência recente das chamadas ao banco (média móvel exponencial, a partir
+  das chamadas registradas por app/instrumentation.py).
+
+Com o worker acima dos limites, requests de baixa prioridade (listagens do admin,
+exportações, polling de /api/*) recebem 503 + Retry-After na hora, sem tocar no
+banco, e as threads ficam para o formulário público. O formulário público e o
+login nunca são recusados aqui; os demais requests só acima de ADMISSION_MAX_IN_FLIGHT.
+"""
+import math
+import threading
+import time
+
+from flask import g, jsonify, render_template, request
+
+from app.metrics import record_shed
+
+CRITICAL, NORMAL, LOW = 'critical', 'normal', 'low'
+
+CRITICAL_ENDPOINTS = frozenset({'forms.form_view', 'auth.login', 'metrics', 'static'})
+LOW_PRIORITY_ENDPOINTS = frozenset({
+    'admin.dashboard',
+    'admin.forms_list',
+    'admin.submissions_list',
+    'admin.leads_list',
+    'admin.form_export',
+    'admin_tenants.list_tenants',
+    'admin_tenants.list_tenant_users',
+    'tenant_users.list_users',
+})
+LOW_PRIORITY_BLUEPRINTS = frozenset({'api'})
+
+
+def priority_of(endpoint: str, blueprint: str) -> str:
+    if endpoint in CRITICAL_ENDPOINTS:
+        return CRITICAL
+    if endpoint in LOW_PRIORITY_ENDPOINTS or blueprint in LOW_PRIORITY_BLUEPRINTS:
+        return LOW
+    return NORMAL
+
+
+class AdmissionController:
+    """Contadores do worker e hooks que decidem admitir ou recusar cada request"""
+
+    def __init__(self):
+        self.enabled = False
+        self.max_in_flight = 100
+        self.low_priority_max_in_flight = 3
+        self.db_latency_limit_ms = 1000.0
+        self.latency_alpha = 0.2
+        self.latency_decay = 10.0
+        self.retry_after = 5
+        self.in_flight = 0
+        self._db_latency_ms = 0.0
+        self._db_latency_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.enabled = app.config['ADMISSION_ENABLED']
+        if not self.enabled:
+            return
+        self.max_in_flight = app.config['ADMISSION_MAX_IN_FLIGHT']
+        self.low_priority_max_in_flight = app.config['ADMISSION_LOW_PRIORITY_MAX_IN_FLIGHT']
+        self.db_latency_limit_ms = app.config['ADMISSION_DB_LATENCY_MS']
+        self.latency_decay = app.config['ADMISSION_LATENCY_DECAY']
+        self.retry_after = app.config['ADMISSION_RETRY_AFTER']
+        app.before_request(self._admit)
+        app.teardown_request(self._release)
+
+    @property
+    def db_latency_ms(self) -> float:
+        """Latência recente do banco; sem chamadas novas, decai para 0 em ~ADMISSION_LATENCY_DECAY s"""
+        idle = time.monotonic() - self._db_latency_at
+        return self._db_latency_ms * math.exp(-idle / self.latency_decay)
+
+    def observe_db_latency(self, duration_ms: float):
+        with self._lock:
+            current = self.db_latency_ms
+            self._db_latency_ms = current + self.latency_alpha * (duration_ms - current)
+            self._db_latency_at = time.monotonic()
+
+    def overloaded(self, priority: str, in_flight: int) -> bool:
+        """True se um request desta prioridade deve ser recusado com `in_flight` outros em andamento"""
+        if priority == CRITICAL:
+            return False
+        if priority == LOW and (in_flight >= self.low_priority_max_in_flight or
+                                self.db_latency_ms >= self.db_latency_limit_ms):
+            return True
+        return in_flight >= self.max_in_flight
+
+    def _admit(self):
+        priority = priority_of(request.endpoint, request.blueprint)
+        with self._lock:
+            if self.overloaded(priority, self.in_flight):
+                shed = True
+            else:
+                shed = False
+                self.in_flight += 1
+                g.admitted = True
+        if not shed:
+            return None
+
+        record_shed(priority)
+        headers = {'Retry-After': str(self.retry_after)}
+        if request.blueprint in LOW_PRIORITY_BLUEPRINTS:
+            return jsonify({'error': 'Servidor ocupado. Tente novamente em instantes.'}), 503, headers
+        body = render_template('errors/busy.html', status=503, retry_after=self.retry_after,
+                               message='Servidor ocupado. Tente novamente em instantes.')
+        return body, 503, headers
+
+    def _release(self, error=None):
+        if not g.pop('admitted', False):
+            return
+        for call in g.get('db_calls', []):
+            self.observe_db_latency(call['ms'])
+        with self._lock:
+            self.in_flight -= 1
+
+
+admission = AdmissionController()
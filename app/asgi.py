@@ -0,0 +1,184 @@
+"""
+Modo de execução ASGI (opcional) para o formulário público e a API.
+
+As rotas de maior volume (`forms.form_view` e `api.get_stats`) são atendidas
+por handlers assíncronos: o banco é consultado via app/async_db.py e um único
+worker segura centenas de requests esperando o PostgREST. Todo o resto é
+repassado à aplicação Flask (WSGI) em threads, via asgiref.
+
+Os handlers rodam dentro de um request context normal do Flask: before/after
+request (métricas, instrumentação, limites), sessão, flash e templates
+funcionam como no modo WSGI. Para servir:
+
+    gunicorn -c gunicorn_config.py -k uvicorn.workers.UvicornWorker asgi:application
+"""
+import asyncio
+import io
+import sys
+from typing import Any, Dict, Optional, Tuple
+
+from asgiref.wsgi import WsgiToAsgi
+from flask import request, session
+from flask_login import current_user
+from werkzeug.exceptions import HTTPException
+
+from app.async_db import async_db
+from app.cache import form_snapshots
+from app.http_cache import http_cache
+from app.routes import forms as form_routes
+from app.spool import spool
+
+
+def _environ(scope: Dict[str, Any], body: bytes = b'') -> Dict[str, Any]:
+    """Monta o environ WSGI equivalente ao request ASGI"""
+    server = scope.get('server') or ('localhost', 80)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope.get('query_string', b'').decode('latin-1'),
+        'SERVER_NAME': str(server[0]),
+        'SERVER_PORT': str(server[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for raw_name, raw_value in scope.get('headers', []):
+        name = raw_name.decode('latin-1').upper().replace('-', '_')
+        value = raw_value.decode('latin-1')
+        if name not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            name = f'HTTP_{name}'
+        environ[name] = f'{environ[name]},{value}' if name in environ else value
+    return environ
+
+
+async def _read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            return b''.join(chunks)
+
+
+class AsyncApp:
+    """Aplicação ASGI: handlers assíncronos para algumas rotas, Flask para o resto"""
+
+    def __init__(self, flask_app):
+        self.flask_app = flask_app
+        self.wsgi = WsgiToAsgi(flask_app)
+        self.handlers = {
+            'forms.form_view': self.form_view,
+            'api.get_stats': self.api_stats,
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self._lifespan(receive, send)
+        if scope['type'] == 'http':
+            endpoint, args = self._match(scope)
+            if endpoint in self.handlers:
+                return await self._dispatch(self.handlers[endpoint], args, scope, receive, send)
+        return await self.wsgi(scope, receive, send)
+
+    def _match(self, scope) -> Tuple[Optional[str], Dict[str, Any]]:
+        adapter = self.flask_app.url_map.bind_to_environ(_environ(scope))
+        try:
+            return adapter.match()
+        except HTTPException:
+            return None, {}
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await async_db.close()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _dispatch(self, handler, args, scope, receive, send):
+        """Mesmo ciclo do Flask.full_dispatch_request, com o handler aguardado no event loop"""
+        app = self.flask_app
+        body = await _read_body(receive)
+        ctx = app.request_context(_environ(scope, body))
+        error = None
+        ctx.push()
+        try:
+            try:
+                try:
+                    rv = app.preprocess_request()
+                    if rv is None:
+                        rv = await handler(**args)
+                except Exception as e:
+                    rv = app.handle_user_exception(e)
+                response = app.finalize_request(rv)
+            except Exception as e:
+                error = e
+                response = app.handle_exception(e)
+
+            await send({
+                'type': 'http.response.start',
+                'status': response.status_code,
+                'headers': [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                            for name, value in response.headers.items()],
+            })
+            await send({'type': 'http.response.body', 'body': response.get_data()})
+            response.close()
+        finally:
+            ctx.pop(error)
+
+    # Handlers
+    async def form_view(self, tenant_slug, form_id):
+        """Versão assíncrona de forms.form_view (mesmas funções auxiliares)"""
+        snapshot = form_snapshots.get((tenant_slug, form_id))
+        if snapshot is None:
+            generation = form_snapshots.generation
+            tenant, form, fields = await asyncio.gather(
+                async_db.tenant_by_slug(tenant_slug),
+                async_db.form_by_id(form_id),
+                async_db.fields_by_form(form_id)
+            )
+            error = form_routes._snapshot_error(tenant, form)
+            if error:
+                return error
+            settings = await async_db.settings_by_tenant(tenant['id'])
+            snapshot = form_routes._store_snapshot(tenant_slug, form_id, tenant, form, fields, settings, generation)
+
+        if request.method == 'POST':
+            token = form_routes._submission_token(request.form)
+            replayed = form_routes._replayed_submission(snapshot, form_id, token)
+            if replayed is not None:
+                return replayed
+            submission_data, whatsapp_url = form_routes._read_submission(snapshot, form_id, request.form)
+            submission = None
+            if spool.enabled:
+                submission = await asyncio.to_thread(form_routes._spool_submission, submission_data)
+            if not submission:
+                submission = await async_db.submit(**submission_data)
+            form_routes._remember_submission(form_id, token, submission, whatsapp_url)
+            return form_routes._submission_response(snapshot, submission, whatsapp_url)
+
+        return form_routes._form_page(snapshot)
+
+    async def api_stats(self):
+        """Versão assíncrona de api.get_stats"""
+        # Carregar o usuário pode consultar o banco (cache frio): fora do event loop
+        authenticated = await asyncio.to_thread(lambda: current_user.is_authenticated)
+        if not authenticated:
+            return self.flask_app.login_manager.unauthorized()
+        if 'tenant_id' not in session:
+            return {'error': 'Unauthorized'}, 401
+        return http_cache.stats_response(await async_db.stats(session['tenant_id']))
+
+
+def create_asgi_app(flask_app) -> AsyncApp:
+    return AsyncApp(flask_app)
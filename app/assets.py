@@ -0,0 +1,87 @@
+"""
+Assets estáticos versionados gerados por scripts/build_assets.py.
+
+O manifest (app/static/dist/manifest.json) mapeia o nome lógico ('app.css') para
+o arquivo com o hash do conteúdo no nome. Nos templates:
+
+    <link rel="stylesheet" href="{{ asset_url('app.css') }}">
+
+Como o nome muda a cada build, esses arquivos são servidos com cache imutável
+de um ano. Quando o build gravou versões pré-comprimidas (`.br`, `.gz`) e o
+navegador as aceita (Accept-Encoding), elas são enviadas no lugar do original,
+sem comprimir nada durante o request. Sem manifest (build não executado, ex.: desenvolvimento local),
+`asset_url` devolve None e base.html cai para os scripts de CDN.
+"""
+import json
+import mimetypes
+import os
+from typing import Dict, Optional, Tuple
+
+from flask import current_app, request, send_from_directory, url_for
+
+MANIFEST = os.path.join('dist', 'manifest.json')
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+# Content-Encoding -> extensão gerada por scripts/build_assets.py, em ordem de preferência
+PRECOMPRESSED = (('br', '.br'), ('gzip', '.gz'))
+
+
+class Assets:
+    """Lê o manifest dos assets e expõe `asset_url` para os templates"""
+
+    def __init__(self):
+        self.manifest: Dict[str, str] = {}
+        self._files = frozenset()
+        self._encodings: Dict[str, Tuple[str, ...]] = {}
+
+    def init_app(self, app):
+        self.manifest = {}
+        path = os.path.join(app.static_folder, MANIFEST)
+        if os.path.exists(path):
+            with open(path) as f:
+                self.manifest = json.load(f)
+        self._files = frozenset(self.manifest.values())
+        self._encodings = {
+            filename: tuple(encoding for encoding, extension in PRECOMPRESSED
+                            if os.path.exists(os.path.join(app.static_folder, filename + extension)))
+            for filename in self._files
+        }
+        app.add_template_global(self.asset_url)
+        app.before_request(self._precompressed)
+        app.after_request(self._cache_headers)
+
+    def asset_url(self, name: str) -> Optional[str]:
+        """URL do arquivo versionado de `name`, ou None se não houver build"""
+        filename = self.manifest.get(name)
+        return url_for('static', filename=filename) if filename else None
+
+    def _precompressed(self):
+        """Serve a versão pré-comprimida do arquivo versionado, se o navegador aceitar"""
+        if request.endpoint != 'static':
+            return None
+        filename = (request.view_args or {}).get('filename')
+        encodings = self._encodings.get(filename)
+        if not encodings:
+            return None
+        accepted = request.accept_encodings
+        for encoding, extension in PRECOMPRESSED:
+            if encoding in encodings and accepted[encoding]:
+                response = send_from_directory(current_app.static_folder, filename + extension,
+                                               mimetype=mimetypes.guess_type(filename)[0])
+                response.headers['Content-Encoding'] = encoding
+                response.vary.add('Accept-Encoding')
+                return response
+        return None
+
+    def _cache_headers(self, response):
+        if request.endpoint == 'static' and response.status_code == 200 and \
+                (request.view_args or {}).get('filename') in self._files:
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+            response.cache_control.no_cache = None
+            if self._encodings.get(request.view_args['filename']):
+                response.vary.add('Accept-Encoding')
+        return response
+
+
+assets = Assets()
@@ -0,0 +1,163 @@
+"""
+Consultas assíncronas usadas pelo modo ASGI (app/asgi.py).
+
+Com o backend 'supabase', as consultas vão pelo cliente assíncrono do
+supabase-py (httpx.AsyncClient): enquanto uma espera o PostgREST, o event loop
+atende outros requests. Nos demais backends (postgres, memory) os métodos dos
+modelos rodam em threads com asyncio.to_thread.
+
+Cada método espelha o método síncrono correspondente em app/models.py,
+inclusive no tratamento de erros (imprime e devolve None/lista vazia).
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from app.database import Database
+from app.instrumentation import record_db_call
+from app.models import Form, FormField, FormSubmission, Tenant, TenantSettings
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabase:
+    """Cliente assíncrono do Supabase por processo, criado no primeiro uso"""
+
+    def __init__(self):
+        self._client = None
+        self._http_client = None
+        self._lock = None
+
+    @property
+    def native(self) -> bool:
+        """True se as consultas usam o cliente assíncrono (backend 'supabase')"""
+        return Database._setting('DATABASE_BACKEND') not in ('postgres', 'memory')
+
+    async def client(self):
+        if self._client is None:
+            if self._lock is None:
+                self._lock = asyncio.Lock()
+            async with self._lock:
+                if self._client is None:
+                    self._client = await self._create_client()
+        return self._client
+
+    async def _create_client(self):
+        import httpx
+        from supabase import acreate_client
+        from supabase.lib.client_options import AsyncClientOptions
+
+        self._http_client = httpx.AsyncClient(
+            http2=Database._setting('SUPABASE_HTTP2'),
+            limits=httpx.Limits(
+                max_connections=Database._setting('SUPABASE_ASYNC_MAX_CONNECTIONS'),
+                max_keepalive_connections=Database._setting('SUPABASE_HTTP_MAX_KEEPALIVE'),
+                keepalive_expiry=Database._setting('SUPABASE_HTTP_KEEPALIVE_EXPIRY')
+            ),
+            timeout=httpx.Timeout(
+                Database._setting('SUPABASE_READ_TIMEOUT'),
+                connect=Database._setting('SUPABASE_CONNECT_TIMEOUT')
+            ),
+            follow_redirects=True
+        )
+        return await acreate_client(
+            Database._setting('SUPABASE_URL'),
+            Database._setting('SUPABASE_KEY'),
+            options=AsyncClientOptions(httpx_client=self._http_client)
+        )
+
+    async def close(self):
+        http_client, self._http_client, self._client = self._http_client, None, None
+        if http_client is not None:
+            await http_client.aclose()
+
+    async def _execute(self, target: str, operation: str, builder):
+        started = time.perf_counter()
+        response, error = None, None
+        try:
+            response = await builder.execute()
+            return response
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            record_db_call(target, operation, started, response, error)
+
+    async def _table(self, name: str):
+        return (await self.client()).table(name)
+
+    # Consultas
+    async def tenant_by_slug(self, slug: str) -> Optional[Dict[str, Any]]:
+        if not self.native:
+            return await asyncio.to_thread(Tenant.get_by_slug, slug)
+        try:
+            query = (await self._table('tenants')).select('*').eq('slug', slug).eq('is_active', True)
+            response = await self._execute('tenants', 'select', query)
+            if response.data:
+                return response.data[0]
+        except Exception:
+            logger.exception("Erro ao buscar tenant")
+        return None
+
+    async def form_by_id(self, form_id: str) -> Optional[Dict[str, Any]]:
+        if not self.native:
+            return await asyncio.to_thread(Form.get_by_id, form_id)
+        try:
+            query = (await self._table('forms')).select('*').eq('id', form_id)
+            response = await self._execute('forms', 'select', query)
+            if response.data:
+                return response.data[0]
+        except Exception:
+            logger.exception("Erro ao buscar formulário")
+        return None
+
+    async def fields_by_form(self, form_id: str) -> List[Dict[str, Any]]:
+        if not self.native:
+            return await asyncio.to_thread(FormField.get_by_form, form_id)
+        try:
+            query = (await self._table('form_fields')).select('*').eq('form_id', form_id).order('field_order')
+            response = await self._execute('form_fields', 'select', query)
+            return response.data if response.data else []
+        except Exception:
+            logger.exception("Erro ao buscar campos")
+            return []
+
+    async def settings_by_tenant(self, tenant_id: str) -> Optional[Dict[str, Any]]:
+        if self.native:
+            try:
+                query = (await self._table('tenant_settings')).select('*').eq('tenant_id', tenant_id)
+                response = await self._execute('tenant_settings', 'select', query)
+                if response.data:
+                    return response.data[0]
+            except Exception:
+                logger.exception("Erro ao buscar configurações")
+                return None
+        # Tenant sem configurações: o modelo cria as padrão (caso raro, fica síncrono)
+        return await asyncio.to_thread(TenantSettings.get_by_tenant, tenant_id)
+
+    async def submit(self, **submission) -> Optional[Dict[str, Any]]:
+        if not self.native:
+            return await asyncio.to_thread(FormSubmission.submit, **submission)
+        try:
+            query = (await self.client()).rpc('submit_form', FormSubmission.submit_params(**submission))
+            response = await self._execute('submit_form', 'rpc', query)
+            if response.data:
+                return response.data
+        except Exception:
+            logger.exception("Erro ao registrar submissão")
+        return None
+
+    async def stats(self, tenant_id: str) -> Dict[str, int]:
+        if not self.native:
+            return await asyncio.to_thread(FormSubmission.get_stats, tenant_id)
+        try:
+            function, params = FormSubmission.stats_query(tenant_id)
+            response = await self._execute(function, 'rpc', (await self.client()).rpc(function, params))
+            return FormSubmission.stats_from(response.data)
+        except Exception:
+            logger.exception("Erro ao buscar estatísticas")
+            return FormSubmission.stats_from(None)
+
+
+async_db = AsyncDatabase()
@@ -0,0 +1,7 @@
+"""
+Backends de acesso a dados alternativos ao cliente supabase-py.
+
+Todos expõem a mesma interface de query builder (`table().select().eq()...`,
+`rpc()`) usada em `app/models.py`. O backend é escolhido por
+DATABASE_BACKEND em `app/database.py`.
+"""
@@ -0,0 +1,312 @@
+"""
+Backend em memória (DATABASE_BACKEND = 'memory') para testes e benchmarks offline.
+
+Implementa o mesmo subconjunto do query builder que o backend Postgres, sobre
+listas de dicts, e as funções RPC de database/migrations/ em Python. Cada
+chamada a execute() conta como uma ida ao banco (`round_trips`) e pode dormir
+MEMORY_DB_LATENCY_MS para simular a latência do Supabase.
+
+Os dados vivem no processo: cada worker do gunicorn tem o seu próprio banco.
+Não use em produção.
+"""
+import copy
+import re
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.backends.query import BaseClient, Query, QueryError, parse_select
+
+# Valores padrão das colunas (database/schema.sql)
+DEFAULTS = {
+    'tenants': {'is_active': True, 'primary_color': '#3B82F6', 'secondary_color': '#1E40AF',
+                'whatsapp_number': None, 'logo_url': None, 'owner_email': None},
+    'users': {'role': 'user', 'is_active': True, 'is_superuser': False, 'last_login': None},
+    'forms': {'is_active': True, 'description': None, 'created_by': None},
+    'form_fields': {'is_required': False, 'is_multiple': False, 'options': None, 'placeholder': None,
+                    'validation_rules': None},
+    'leads': {'phone': None, 'email': None, 'name': None},
+    'form_submissions': {'status': 'incomplete', 'completed_at': None, 'whatsapp_sent': False,
+                         'whatsapp_sent_at': None, 'ingest_key': None},
+    'form_responses': {'response_value': None},
+    'tenant_settings': {'welcome_message': None, 'thank_you_message': None, 'custom_css': None,
+                        'redirect_after_submit': True, 'allow_multiple_submissions': False, 'settings': None},
+}
+
+TIMESTAMPS = {
+    'form_submissions': ('started_at',),
+}
+
+UNIQUE = {
+    'tenants': ('slug',),
+    'users': ('email',),
+    'tenant_settings': ('tenant_id',),
+    'form_submissions': ('ingest_key',),
+}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def _coerce(stored: Any, value: Any) -> Any:
+    """Converte o valor do filtro (muitas vezes texto, como no PostgREST) para o tipo da coluna"""
+    if isinstance(value, str):
+        if isinstance(stored, bool):
+            return value == 'true'
+        if isinstance(stored, (int, float)):
+            try:
+                return type(stored)(value)
+            except ValueError:
+                return value
+    if isinstance(stored, str) and not isinstance(value, str) and value is not None and not isinstance(value, bool):
+        return str(value)
+    return value
+
+
+def _like(pattern: str, flags: int = 0):
+    regex = '^' + '.*'.join(re.escape(part) for part in str(pattern).split('%')) + '$'
+    return re.compile(regex, flags)
+
+
+class MemoryClient(BaseClient):
+    """Banco em memória com a interface de query builder do supabase-py"""
+
+    def __init__(self, latency_ms: float = 0):
+        self.latency = latency_ms / 1000.0
+        self.tables: Dict[str, List[Dict[str, Any]]] = {}
+        self.round_trips = 0
+        self._lock = threading.RLock()
+        self._functions = {
+            'submit_form': self._submit_form,
+            'submit_form_batch': self._submit_form_batch,
+            'tenant_submission_stats': self._tenant_submission_stats,
+            'tenant_submission_stats_counters': self._tenant_submission_stats,
+            'apply_user_updates': self._apply_user_updates,
+        }
+
+    def load(self, tables: Dict[str, List[Dict[str, Any]]]):
+        """Carrega linhas prontas (ex.: fixtures de benchmark) aplicando os padrões das colunas"""
+        with self._lock:
+            for table, rows in tables.items():
+                self.tables.setdefault(table, []).extend(self._with_defaults(table, row) for row in rows)
+
+    def reset_stats(self):
+        with self._lock:
+            self.round_trips = 0
+
+    def _round_trip(self):
+        # Chamadas simultâneas (gather) perderiam incrementos sem o lock
+        with self._lock:
+            self.round_trips += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _with_defaults(self, table: str, row: Dict[str, Any]) -> Dict[str, Any]:
+        now = _now()
+        full = {'id': str(uuid.uuid4()), 'created_at': now, 'updated_at': now}
+        for column in TIMESTAMPS.get(table, ()):
+            full[column] = now
+        full.update(copy.deepcopy(DEFAULTS.get(table, {})))
+        full.update(copy.deepcopy(row))
+        return full
+
+    # Filtros
+    def _match(self, row: Dict[str, Any], condition) -> bool:
+        kind = condition[0]
+        if kind == 'and':
+            return all(self._match(row, c) for c in condition[1])
+        if kind == 'or':
+            return any(self._match(row, c) for c in condition[1])
+        if kind == 'not':
+            return not self._match(row, condition[1])
+
+        _, column, operator, value = condition
+        stored = row.get(column)
+        if operator == 'is' or (operator in ('eq', 'neq') and value is None):
+            expected = {'null': None, 'true': True, 'false': False}.get(value, value)
+            return (stored is expected) != (operator == 'neq')
+        if operator == 'in':
+            return stored is not None and stored in [_coerce(stored, v) for v in value]
+        if stored is None:
+            return False
+        value = _coerce(stored, value)
+        if operator == 'eq':
+            return stored == value
+        if operator == 'neq':
+            return stored != value
+        if operator == 'gt':
+            return stored > value
+        if operator == 'gte':
+            return stored >= value
+        if operator == 'lt':
+            return stored < value
+        if operator == 'lte':
+            return stored <= value
+        if operator == 'like':
+            return bool(_like(value).match(str(stored)))
+        if operator == 'ilike':
+            return bool(_like(value, re.IGNORECASE).match(str(stored)))
+        raise QueryError(f"Operador não suportado: {operator}")
+
+    def _filtered(self, query: Query) -> List[Dict[str, Any]]:
+        rows = self.tables.get(query.table, [])
+        return [row for row in rows if all(self._match(row, c) for c in query.filters)]
+
+    def _check_unique(self, table: str, row: Dict[str, Any], ignore: Dict[str, Any] = None):
+        for column in UNIQUE.get(table, ()):
+            if row.get(column) is None:
+                continue
+            for other in self.tables.get(table, []):
+                if other is not ignore and other.get(column) == row[column]:
+                    raise QueryError(f'duplicate key value violates unique constraint "{table}_{column}_key"')
+
+    # Ações
+    def _project(self, query: Query, row: Dict[str, Any]) -> Dict[str, Any]:
+        plain, embeds = parse_select(query.table, query.columns)
+        result = {}
+        for column in plain:
+            if column == '*':
+                result.update(row)
+            else:
+                result[column] = row.get(column)
+        for name, embed_columns, (local_column, foreign_table, foreign_column) in embeds:
+            related = next((r for r in self.tables.get(foreign_table, [])
+                            if r.get(foreign_column) == row.get(local_column)), None)
+            if related is not None and embed_columns != ['*']:
+                related = {c: related.get(c) for c in embed_columns}
+            result[name] = related
+        return copy.deepcopy(result)
+
+    def _select(self, query: Query) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        rows = self._filtered(query)
+        count = len(rows) if query.count else None
+        for column, desc in reversed(query.order):
+            present = [r for r in rows if r.get(column) is not None]
+            missing = [r for r in rows if r.get(column) is None]
+            present.sort(key=lambda r: r[column], reverse=desc)
+            # NULLS FIRST em ordem decrescente, NULLS LAST em crescente (padrão do Postgres)
+            rows = missing + present if desc else present + missing
+        start = query.offset or 0
+        end = start + query.limit if query.limit is not None else None
+        return [self._project(query, row) for row in rows[start:end]], count
+
+    def _insert(self, query: Query) -> List[Dict[str, Any]]:
+        table = self.tables.setdefault(query.table, [])
+        inserted = []
+        for payload in query.payload:
+            if query.action == 'upsert':
+                existing = next((r for r in table if all(r.get(c) == payload.get(c) for c in query.on_conflict)), None)
+                if existing is not None:
+                    existing.update(copy.deepcopy(payload))
+                    inserted.append(copy.deepcopy(existing))
+                    continue
+            row = self._with_defaults(query.table, payload)
+            self._check_unique(query.table, row)
+            table.append(row)
+            inserted.append(copy.deepcopy(row))
+        return inserted
+
+    def _update(self, query: Query) -> List[Dict[str, Any]]:
+        updated = []
+        for row in self._filtered(query):
+            changes = {k: (_now() if v == 'now()' else copy.deepcopy(v)) for k, v in query.payload.items()}
+            self._check_unique(query.table, dict(row, **changes), ignore=row)
+            row.update(changes)
+            updated.append(copy.deepcopy(row))
+        return updated
+
+    def _delete(self, query: Query) -> List[Dict[str, Any]]:
+        removed = self._filtered(query)
+        self.tables[query.table] = [row for row in self.tables.get(query.table, []) if row not in removed]
+        return copy.deepcopy(removed)
+
+    def _execute(self, query: Query) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        self._round_trip()
+        with self._lock:
+            if query.action == 'select':
+                return self._select(query)
+            if query.action in ('insert', 'upsert'):
+                return self._insert(query), None
+            if query.action == 'update':
+                return self._update(query), None
+            return self._delete(query), None
+
+    def _call(self, fn: str, params: Dict[str, Any]) -> Any:
+        self._round_trip()
+        function = self._functions.get(fn)
+        if function is None:
+            raise QueryError(f"Função não encontrada: {fn}")
+        with self._lock:
+            return function(**params)
+
+    # Funções de database/migrations/
+    def _submit_form(self, p_tenant_id, p_form_id, p_phone, p_email, p_name, p_answers=None,
+                     p_whatsapp_sent=False, p_ingest_key=None, p_submitted_at=None):
+        submissions = self.tables.setdefault('form_submissions', [])
+        if p_ingest_key:
+            existing = next((s for s in submissions if s.get('ingest_key') == p_ingest_key), None)
+            if existing:
+                return {'id': existing['id'], 'lead_id': existing['lead_id'], 'duplicate': True}
+
+        now = p_submitted_at or _now()
+        leads = self.tables.setdefault('leads', [])
+        lead = next((l for l in leads if l['tenant_id'] == p_tenant_id and p_phone is not None
+                     and l.get('phone') == p_phone), None)
+        if lead is None:
+            lead = self._with_defaults('leads', {'tenant_id': p_tenant_id, 'phone': p_phone,
+                                                 'email': p_email, 'name': p_name})
+            leads.append(lead)
+
+        submission = self._with_defaults('form_submissions', {
+            'form_id': p_form_id, 'lead_id': lead['id'], 'tenant_id': p_tenant_id,
+            'status': 'completed', 'started_at': now, 'completed_at': now,
+            'whatsapp_sent': bool(p_whatsapp_sent), 'whatsapp_sent_at': now if p_whatsapp_sent else None,
+            'ingest_key': p_ingest_key
+        })
+        submissions.append(submission)
+        self.tables.setdefault('form_responses', []).extend(
+            self._with_defaults('form_responses', {'submission_id': submission['id'],
+                                                   'field_id': answer['field_id'],
+                                                   'response_value': answer.get('response_value')})
+            for answer in (p_answers or [])
+        )
+        return {'id': submission['id'], 'lead_id': lead['id'], 'duplicate': False}
+
+    def _submit_form_batch(self, p_submissions):
+        results = []
+        for item in p_submissions or []:
+            try:
+                result = self._submit_form(
+                    item.get('tenant_id'), item.get('form_id'), item.get('phone'), item.get('email'),
+                    item.get('name'), item.get('answers'), item.get('whatsapp_sent', False),
+                    item.get('ingest_key'), item.get('submitted_at')
+                )
+                results.append(dict(result, ingest_key=item.get('ingest_key')))
+            except Exception as e:
+                results.append({'ingest_key': item.get('ingest_key'), 'error': str(e)})
+        return results
+
+    def _tenant_submission_stats(self, p_tenant_id, p_since):
+        submissions = [s for s in self.tables.get('form_submissions', []) if s['tenant_id'] == p_tenant_id]
+        since = str(p_since)
+        return {
+            'total': len(submissions),
+            'completed': sum(1 for s in submissions if s.get('status') == 'completed'),
+            'incomplete': sum(1 for s in submissions if s.get('status') == 'incomplete'),
+            'new_leads': sum(1 for l in self.tables.get('leads', [])
+                             if l['tenant_id'] == p_tenant_id and (l.get('created_at') or '') >= since)
+        }
+
+    def _apply_user_updates(self, p_updates):
+        users = {u['id']: u for u in self.tables.get('users', [])}
+        updated = 0
+        for item in p_updates or []:
+            user = users.get(item.get('id'))
+            if user is None or not item.get('last_login'):
+                continue
+            user['last_login'] = max(filter(None, (user.get('last_login'), item['last_login'])))
+            updated += 1
+        return updated
@@ -0,0 +1,208 @@
+"""
+Backend PostgreSQL direto (DATABASE_BACKEND = 'postgres').
+
+Fala com o Postgres sem passar pelo PostgREST: cada worker mantém um pool de
+conexões (psycopg_pool) e as consultas montadas pelos modelos são traduzidas
+para SQL e executadas como prepared statements. O resultado tem o mesmo formato
+JSON que o PostgREST devolveria (to_jsonb), então modelos e templates não mudam.
+
+Com o Supabase, use a conexão direta ou o pooler em modo sessão: o modo
+transação do pgbouncer não suporta prepared statements.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+from psycopg import sql
+from psycopg.types.json import Jsonb
+from psycopg_pool import ConnectionPool
+
+from app.backends.query import BaseClient, Query, QueryError, parse_select
+
+_COMPARISONS = {
+    'eq': '=',
+    'neq': '<>',
+    'gt': '>',
+    'gte': '>=',
+    'lt': '<',
+    'lte': '<=',
+    'like': 'LIKE',
+    'ilike': 'ILIKE',
+}
+
+
+def _adapt(value: Any) -> Any:
+    """Listas e dicts vão para colunas jsonb"""
+    if isinstance(value, (dict, list)):
+        return Jsonb(value)
+    return value
+
+
+class PostgresClient(BaseClient):
+    """Cliente com pool de conexões por worker e a interface de query builder do supabase-py"""
+
+    def __init__(self, dsn: str, min_size: int = 1, max_size: int = 10, timeout: float = 30):
+        if not dsn:
+            raise QueryError('DATABASE_URL é obrigatório para DATABASE_BACKEND=postgres')
+        self._pool = ConnectionPool(
+            dsn,
+            min_size=min_size,
+            max_size=max_size,
+            timeout=timeout,
+            kwargs={'autocommit': True},
+            name='formapp',
+            open=True
+        )
+
+    def close(self):
+        self._pool.close()
+
+    def _run(self, statements: List[Tuple[sql.Composable, List[Any]]]) -> List[List[Tuple]]:
+        with self._pool.connection() as conn:
+            results = []
+            for statement, params in statements:
+                cursor = conn.execute(statement, params, prepare=True)
+                results.append(cursor.fetchall() if cursor.description else [])
+            return results
+
+    # Compilação de filtros
+    def _condition(self, condition, alias: str, params: List[Any]) -> sql.Composable:
+        kind = condition[0]
+        if kind in ('and', 'or'):
+            parts = [self._condition(c, alias, params) for c in condition[1]]
+            return sql.SQL('({})').format(sql.SQL(f' {kind.upper()} ').join(parts))
+        if kind == 'not':
+            return sql.SQL('NOT ({})').format(self._condition(condition[1], alias, params))
+
+        _, column, operator, value = condition
+        identifier = sql.Identifier(alias, column)
+        if operator == 'is' or (operator in ('eq', 'neq') and value is None):
+            keyword = {None: 'NULL', 'null': 'NULL', True: 'TRUE', 'true': 'TRUE', False: 'FALSE', 'false': 'FALSE'}[value]
+            negate = 'NOT ' if operator == 'neq' else ''
+            return sql.SQL('{} IS {}{}').format(identifier, sql.SQL(negate), sql.SQL(keyword))
+        if operator == 'in':
+            if not value:
+                return sql.SQL('FALSE')
+            params.extend(value)
+            return sql.SQL('{} IN ({})').format(identifier, sql.SQL(', ').join([sql.Placeholder()] * len(value)))
+        params.append(_adapt(value))
+        return sql.SQL('{} {} {}').format(identifier, sql.SQL(_COMPARISONS[operator]), sql.Placeholder())
+
+    def _where(self, query: Query, alias: str, params: List[Any]) -> sql.Composable:
+        if not query.filters:
+            return sql.SQL('')
+        conditions = [self._condition(c, alias, params) for c in query.filters]
+        return sql.SQL(' WHERE {}').format(sql.SQL(' AND ').join(conditions))
+
+    # Ações
+    def _select(self, query: Query) -> List[Tuple[sql.Composable, List[Any]]]:
+        plain, embeds = parse_select(query.table, query.columns)
+        columns = []
+        for column in plain:
+            columns.append(sql.SQL('t.*') if column == '*' else sql.Identifier('t', column))
+        for name, embed_columns, (local_column, foreign_table, foreign_column) in embeds:
+            inner = sql.SQL(', ').join(
+                sql.SQL('e.*') if c == '*' else sql.Identifier('e', c) for c in embed_columns
+            )
+            columns.append(sql.SQL(
+                '(SELECT to_jsonb(r) FROM (SELECT {} FROM {} AS e WHERE {} = {} LIMIT 1) AS r) AS {}'
+            ).format(inner, sql.Identifier(foreign_table), sql.Identifier('e', foreign_column),
+                     sql.Identifier('t', local_column), sql.Identifier(name)))
+
+        params = []
+        where = self._where(query, 't', params)
+        statement = sql.SQL('SELECT {} FROM {} AS t{}').format(
+            sql.SQL(', ').join(columns), sql.Identifier(query.table), where
+        )
+        if query.order:
+            statement += sql.SQL(' ORDER BY {}').format(sql.SQL(', ').join(
+                sql.SQL('{} {}').format(sql.Identifier('t', column), sql.SQL('DESC' if desc else 'ASC'))
+                for column, desc in query.order
+            ))
+        if query.limit is not None:
+            statement += sql.SQL(' LIMIT {}').format(sql.Placeholder())
+            params.append(int(query.limit))
+        if query.offset is not None:
+            statement += sql.SQL(' OFFSET {}').format(sql.Placeholder())
+            params.append(int(query.offset))
+
+        statements = [(sql.SQL('SELECT to_jsonb(s) FROM ({}) AS s').format(statement), params)]
+        if query.count:
+            count_params = []
+            statements.append((sql.SQL('SELECT count(*) FROM {} AS t{}').format(
+                sql.Identifier(query.table), self._where(query, 't', count_params)
+            ), count_params))
+        return statements
+
+    def _insert(self, query: Query) -> Tuple[sql.Composable, List[Any]]:
+        columns = []
+        for row in query.payload:
+            columns.extend(c for c in row if c not in columns)
+        params, values = [], []
+        for row in query.payload:
+            placeholders = []
+            for column in columns:
+                if column in row:
+                    params.append(_adapt(row[column]))
+                    placeholders.append(sql.Placeholder())
+                else:
+                    placeholders.append(sql.SQL('DEFAULT'))
+            values.append(sql.SQL('({})').format(sql.SQL(', ').join(placeholders)))
+
+        statement = sql.SQL('INSERT INTO {} AS t ({}) VALUES {}').format(
+            sql.Identifier(query.table),
+            sql.SQL(', ').join(sql.Identifier(c) for c in columns),
+            sql.SQL(', ').join(values)
+        )
+        if query.action == 'upsert':
+            updates = [c for c in columns if c not in query.on_conflict]
+            statement += sql.SQL(' ON CONFLICT ({}) ').format(
+                sql.SQL(', ').join(sql.Identifier(c) for c in query.on_conflict)
+            )
+            if updates:
+                statement += sql.SQL('DO UPDATE SET {}').format(sql.SQL(', ').join(
+                    sql.SQL('{} = EXCLUDED.{}').format(sql.Identifier(c), sql.Identifier(c)) for c in updates
+                ))
+            else:
+                statement += sql.SQL('DO NOTHING')
+        return statement + sql.SQL(' RETURNING to_jsonb(t)'), params
+
+    def _update(self, query: Query) -> Tuple[sql.Composable, List[Any]]:
+        params = [_adapt(value) for value in query.payload.values()]
+        assignments = sql.SQL(', ').join(
+            sql.SQL('{} = {}').format(sql.Identifier(c), sql.Placeholder()) for c in query.payload
+        )
+        where = self._where(query, 't', params)
+        return sql.SQL('UPDATE {} AS t SET {}{} RETURNING to_jsonb(t)').format(
+            sql.Identifier(query.table), assignments, where
+        ), params
+
+    def _delete(self, query: Query) -> Tuple[sql.Composable, List[Any]]:
+        params = []
+        where = self._where(query, 't', params)
+        return sql.SQL('DELETE FROM {} AS t{} RETURNING to_jsonb(t)').format(
+            sql.Identifier(query.table), where
+        ), params
+
+    def _execute(self, query: Query) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        if query.action == 'select':
+            statements = self._select(query)
+        elif query.action in ('insert', 'upsert'):
+            statements = [self._insert(query)]
+        elif query.action == 'update':
+            statements = [self._update(query)]
+        else:
+            statements = [self._delete(query)]
+
+        results = self._run(statements)
+        rows = [row[0] for row in results[0]]
+        count = results[1][0][0] if len(results) > 1 else None
+        return rows, count
+
+    def _call(self, fn: str, params: Dict[str, Any]) -> Any:
+        arguments = sql.SQL(', ').join(
+            sql.SQL('{} => {}').format(sql.Identifier(name), sql.Placeholder()) for name in params
+        )
+        statement = sql.SQL('SELECT {}({})').format(sql.Identifier(fn), arguments)
+        rows = self._run([(statement, [_adapt(value) for value in params.values()])])[0]
+        if len(rows) == 1:
+            return rows[0][0]
+        return [row[0] for row in rows]
@@ -0,0 +1,264 @@
+"""
+Subconjunto da API de query builder do supabase-py usado pelos modelos.
+
+Os backends alternativos (Postgres direto, memória) implementam apenas
+`_execute(query)` e `_call(fn, params)`; a montagem da consulta, a leitura do
+`select('*, leads(*)')` e dos filtros `or_` no formato do PostgREST ficam aqui,
+para que `app/models.py` e as rotas funcionem sem alteração em qualquer backend.
+"""
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+
+
+class QueryError(Exception):
+    """Erro de consulta nos backends alternativos (equivalente ao APIError do PostgREST)"""
+
+
+class QueryResult(NamedTuple):
+    """Mesmo formato do APIResponse do supabase-py: .data e .count"""
+    data: Any
+    count: Optional[int] = None
+
+
+# Relações usadas nos selects embutidos: (tabela, embed) -> (coluna local, tabela estrangeira, coluna estrangeira)
+RELATIONS = {
+    ('form_submissions', 'leads'): ('lead_id', 'leads', 'id'),
+    ('form_submissions', 'forms'): ('form_id', 'forms', 'id'),
+    ('form_submissions', 'tenants'): ('tenant_id', 'tenants', 'id'),
+    ('form_responses', 'form_fields'): ('field_id', 'form_fields', 'id'),
+    ('form_responses', 'form_submissions'): ('submission_id', 'form_submissions', 'id'),
+    ('form_fields', 'forms'): ('form_id', 'forms', 'id'),
+    ('forms', 'tenants'): ('tenant_id', 'tenants', 'id'),
+    ('leads', 'tenants'): ('tenant_id', 'tenants', 'id'),
+    ('users', 'tenants'): ('tenant_id', 'tenants', 'id'),
+    ('tenant_settings', 'tenants'): ('tenant_id', 'tenants', 'id'),
+}
+
+OPERATORS = ('eq', 'neq', 'gt', 'gte', 'lt', 'lte', 'like', 'ilike', 'is', 'in')
+
+
+def split_top_level(text: str, separator: str = ',') -> List[str]:
+    """Divide por vírgula ignorando as que estão dentro de parênteses ou aspas"""
+    parts, depth, quoted, current = [], 0, False, []
+    for char in text:
+        if char == '"':
+            quoted = not quoted
+        elif not quoted and char == '(':
+            depth += 1
+        elif not quoted and char == ')':
+            depth -= 1
+        if char == separator and depth == 0 and not quoted:
+            parts.append(''.join(current).strip())
+            current = []
+        else:
+            current.append(char)
+    if ''.join(current).strip():
+        parts.append(''.join(current).strip())
+    return parts
+
+
+def parse_select(table: str, columns: str) -> Tuple[List[str], List[Tuple[str, List[str], Tuple[str, str, str]]]]:
+    """Separa colunas simples e embeds: '*, leads(*), forms(title)' -> (['*'], [('leads', ['*'], rel), ...])"""
+    plain, embeds = [], []
+    for part in split_top_level(columns or '*'):
+        if '(' in part:
+            name, inner = part.split('(', 1)
+            name = name.strip()
+            relation = RELATIONS.get((table, name))
+            if relation is None:
+                raise QueryError(f"Relação desconhecida entre '{table}' e '{name}'")
+            embeds.append((name, [c.strip() for c in inner.rstrip(')').split(',')], relation))
+        else:
+            plain.append(part)
+    return plain or ['*'], embeds
+
+
+def parse_value(raw: str) -> Any:
+    raw = raw.strip()
+    if len(raw) >= 2 and raw[0] == raw[-1] == '"':
+        return raw[1:-1]
+    return raw
+
+
+def parse_condition(text: str):
+    """Converte uma expressão do or_() do PostgREST em uma árvore de condições
+
+    Retorna ('or' | 'and', [condições]) ou ('cmp', coluna, operador, valor).
+    """
+    text = text.strip()
+    for group in ('or', 'and'):
+        if text.startswith(group + '(') and text.endswith(')'):
+            return group, [parse_condition(part) for part in split_top_level(text[len(group) + 1:-1])]
+    column, operator, value = text.split('.', 2)
+    negate = operator == 'not'
+    if negate:
+        operator, value = value.split('.', 1)
+    if operator not in OPERATORS:
+        raise QueryError(f"Operador não suportado: {operator}")
+    if operator == 'in':
+        value = [parse_value(v) for v in split_top_level(value.strip()[1:-1])]
+    else:
+        value = parse_value(value)
+    condition = ('cmp', column, operator, value)
+    return ('not', condition) if negate else condition
+
+
+class Query:
+    """Descrição de uma consulta montada pelo builder"""
+
+    def __init__(self, table: str):
+        self.table = table
+        self.action = 'select'
+        self.columns = '*'
+        self.count = None
+        self.payload = None
+        self.on_conflict = None
+        self.filters = []
+        self.order = []
+        self.limit = None
+        self.offset = None
+        self.single = False
+        self.maybe_single = False
+
+
+class QueryBuilder:
+    """Builder encadeável compatível com `db.table(...)` do supabase-py"""
+
+    def __init__(self, client, table: str):
+        self._client = client
+        self._query = Query(table)
+
+    # Ações
+    def select(self, columns: str = '*', count: str = None, **kwargs) -> 'QueryBuilder':
+        self._query.action = 'select'
+        self._query.columns = columns
+        self._query.count = count
+        return self
+
+    def insert(self, data, **kwargs) -> 'QueryBuilder':
+        self._query.action = 'insert'
+        self._query.payload = data if isinstance(data, list) else [data]
+        return self
+
+    def upsert(self, data, on_conflict: str = '', **kwargs) -> 'QueryBuilder':
+        self._query.action = 'upsert'
+        self._query.payload = data if isinstance(data, list) else [data]
+        self._query.on_conflict = [c.strip() for c in on_conflict.split(',') if c.strip()] or ['id']
+        return self
+
+    def update(self, data: Dict[str, Any], **kwargs) -> 'QueryBuilder':
+        self._query.action = 'update'
+        self._query.payload = data
+        return self
+
+    def delete(self, **kwargs) -> 'QueryBuilder':
+        self._query.action = 'delete'
+        return self
+
+    # Filtros
+    def _filter(self, column: str, operator: str, value: Any) -> 'QueryBuilder':
+        self._query.filters.append(('cmp', column, operator, value))
+        return self
+
+    def eq(self, column, value):
+        return self._filter(column, 'eq', value)
+
+    def neq(self, column, value):
+        return self._filter(column, 'neq', value)
+
+    def gt(self, column, value):
+        return self._filter(column, 'gt', value)
+
+    def gte(self, column, value):
+        return self._filter(column, 'gte', value)
+
+    def lt(self, column, value):
+        return self._filter(column, 'lt', value)
+
+    def lte(self, column, value):
+        return self._filter(column, 'lte', value)
+
+    def like(self, column, pattern):
+        return self._filter(column, 'like', pattern)
+
+    def ilike(self, column, pattern):
+        return self._filter(column, 'ilike', pattern)
+
+    def is_(self, column, value):
+        return self._filter(column, 'is', value)
+
+    def in_(self, column, values):
+        return self._filter(column, 'in', list(values))
+
+    def or_(self, filters: str, **kwargs) -> 'QueryBuilder':
+        self._query.filters.append(parse_condition(f'or({filters})'))
+        return self
+
+    # Modificadores
+    def order(self, column: str, desc: bool = False, **kwargs) -> 'QueryBuilder':
+        self._query.order.append((column, desc))
+        return self
+
+    def limit(self, size: int, **kwargs) -> 'QueryBuilder':
+        self._query.limit = size
+        return self
+
+    def range(self, start: int, end: int, **kwargs) -> 'QueryBuilder':
+        self._query.offset = start
+        self._query.limit = end - start + 1
+        return self
+
+    def single(self) -> 'QueryBuilder':
+        self._query.single = True
+        return self
+
+    def maybe_single(self) -> 'QueryBuilder':
+        self._query.maybe_single = True
+        return self
+
+    def execute(self) -> QueryResult:
+        rows, count = self._client._execute(self._query)
+        if self._query.single:
+            if len(rows) != 1:
+                raise QueryError(f"Esperada exatamente uma linha em '{self._query.table}', encontradas {len(rows)}")
+            return QueryResult(rows[0], count)
+        if self._query.maybe_single:
+            if len(rows) > 1:
+                raise QueryError(f"Esperada no máximo uma linha em '{self._query.table}', encontradas {len(rows)}")
+            return QueryResult(rows[0] if rows else None, count)
+        return QueryResult(rows, count)
+
+
+class RpcBuilder:
+    """Chamada de função compatível com `db.rpc(fn, params)`"""
+
+    def __init__(self, client, fn: str, params: Dict[str, Any]):
+        self._client = client
+        self._fn = fn
+        self._params = params or {}
+
+    def execute(self) -> QueryResult:
+        return QueryResult(self._client._call(self._fn, self._params))
+
+
+class BaseClient(ABC):
+    """Ponto de entrada com a mesma interface do supabase.Client usada pelos modelos"""
+
+    def table(self, table_name: str) -> QueryBuilder:
+        return QueryBuilder(self, table_name)
+
+    from_ = table
+
+    def rpc(self, fn: str, params: Dict[str, Any] = None, **kwargs) -> RpcBuilder:
+        return RpcBuilder(self, fn, params)
+
+    @abstractmethod
+    def _execute(self, query: Query) -> Tuple[List[Dict[str, Any]], Optional[int]]:
+        """Executa a consulta; devolve (linhas, contagem se pedida com count=)"""
+
+    @abstractmethod
+    def _call(self, fn: str, params: Dict[str, Any]) -> Any:
+        """Executa a função RPC `fn` e devolve o resultado"""
+
+    def close(self):
+        pass
@@ -0,0 +1,160 @@
+"""
+Caches em memória por worker.
+
+Cada processo do gunicorn mantém sua própria cópia. As entradas expiram por TTL
+e, quando o cache enche, as menos usadas recentemente são descartadas (LRU).
+Alterações feitas em qualquer worker chegam aos demais pelo barramento de
+invalidação (app/events.py), assinado no fim deste módulo.
+"""
+import threading
+import time
+from collections import OrderedDict
+from types import MappingProxyType
+from typing import Any, Callable, Dict, Hashable, List, NamedTuple, Optional
+
+from app.events import events
+from app.metrics import record_cache_lookup
+
+
+class TTLCache:
+    """Cache LRU com limite de tamanho e expiração por TTL, seguro entre threads
+
+    `generation` muda a cada invalidação. Quem preenche o cache após uma busca
+    no banco lê a geração antes da busca e a passa para set(): se houve
+    invalidação no meio, os dados podem ser anteriores à alteração e não são
+    gravados.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300, name: str = None):
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def configure(self, maxsize: int = None, ttl: float = None):
+        """Ajusta limites a partir do config da aplicação"""
+        with self._lock:
+            if maxsize is not None:
+                self.maxsize = maxsize
+            if ttl is not None:
+                self.ttl = ttl
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            value = self._lookup(key)
+        if self.name:
+            record_cache_lookup(self.name, value is not None)
+        return value
+
+    def _lookup(self, key: Hashable) -> Optional[Any]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, generation: int = None):
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, key: Hashable):
+        with self._lock:
+            self.generation += 1
+            self._data.pop(key, None)
+
+    def invalidate_where(self, predicate: Callable[[Hashable, Any], bool]):
+        """Remove todas as entradas para as quais predicate(key, value) é verdadeiro"""
+        with self._lock:
+            self.generation += 1
+            for key in [k for k, (_, v) in self._data.items() if predicate(k, v)]:
+                del self._data[key]
+
+    def clear(self):
+        with self._lock:
+            self.generation += 1
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+def freeze(value: Any) -> Any:
+    """Converte dicts/listas vindos do banco em estruturas somente leitura"""
+    if isinstance(value, dict):
+        return MappingProxyType({k: freeze(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return tuple(freeze(v) for v in value)
+    return value
+
+
+class FormSnapshot(NamedTuple):
+    """Tudo que a página pública de um formulário precisa para ser renderizada"""
+    tenant: MappingProxyType
+    form: MappingProxyType
+    fields: tuple
+    settings: Optional[MappingProxyType]
+
+
+def build_form_snapshot(tenant: Dict[str, Any], form: Dict[str, Any],
+                        fields: List[Dict[str, Any]], settings: Optional[Dict[str, Any]]) -> FormSnapshot:
+    return FormSnapshot(
+        tenant=freeze(tenant),
+        form=freeze(form),
+        fields=freeze(sorted(fields, key=lambda field: field.get('field_order') or 0)),
+        settings=freeze(settings)
+    )
+
+
+# Snapshots dos formulários públicos, por (tenant_slug, form_id)
+form_snapshots = TTLCache(maxsize=1024, ttl=300, name='form_snapshots')
+
+
+def invalidate_form_snapshots(form_id: str = None, tenant_id: str = None):
+    """Descarta snapshots de um formulário ou de todos os formulários de um tenant"""
+    form_snapshots.invalidate_where(
+        lambda key, snapshot: (form_id is not None and str(snapshot.form['id']) == str(form_id)) or
+                              (tenant_id is not None and str(snapshot.tenant['id']) == str(tenant_id))
+    )
+
+
+# Submissões já registradas neste worker, por (form_id, submission_token): um
+# reenvio do mesmo formulário (duplo clique, retry do navegador) devolve o mesmo
+# redirecionamento sem ir ao banco. Em outro worker, a ingest_key deduplica no banco.
+submission_tokens = TTLCache(maxsize=10000, ttl=3600, name='submission_tokens')
+
+
+# Usuários carregados pelo Flask-Login, por ID. Alterações (ex.: desativação) chegam
+# aos outros workers por `user:<id>`; o TTL limita o atraso em outras instâncias
+# (o barramento 'unix' só alcança o próprio host) e se um evento se perder.
+user_cache = TTLCache(maxsize=4096, ttl=30, name='users')
+
+
+def _invalidate_field_snapshots(field_id: str):
+    form_snapshots.invalidate_where(
+        lambda key, snapshot: any(str(field['id']) == str(field_id) for field in snapshot.fields)
+    )
+
+
+def _clear_all(_=None):
+    form_snapshots.clear()
+    user_cache.clear()
+
+
+events.subscribe('form', lambda form_id: invalidate_form_snapshots(form_id=form_id))
+events.subscribe('field', _invalidate_field_snapshots)
+events.subscribe('tenant', lambda tenant_id: invalidate_form_snapshots(tenant_id=tenant_id))
+events.subscribe('user', user_cache.invalidate)
+events.subscribe('*', _clear_all)
@@ -0,0 +1,84 @@
+"""
+Compressão gzip/brotli das respostas.
+
+HTML dos formulários e das listagens do admin e JSON da API são comprimidos no
+after_request quando o cliente aceita (Accept-Encoding) e o corpo passa de
+COMPRESSION_MIN_SIZE bytes. Brotli é usado se o pacote `brotli` estiver
+instalado; senão, gzip.
+
+Não são comprimidos: respostas em streaming (exportação CSV/NDJSON, que
+seriam lidas inteiras na memória), arquivos servidos por send_file
+(direct_passthrough, inclusive /static) e respostas que já têm
+Content-Encoding. Os CSS versionados de app/static/dist são comprimidos no
+build (scripts/build_assets.py) e servidos já comprimidos por app/assets.py.
+"""
+import gzip
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_TYPES = frozenset({
+    'text/html', 'text/css', 'text/plain', 'text/csv', 'text/javascript',
+    'application/json', 'application/javascript', 'application/x-ndjson', 'image/svg+xml',
+})
+
+
+class Compression:
+    """after_request que comprime o corpo da resposta conforme o Accept-Encoding"""
+
+    def __init__(self):
+        self.enabled = True
+        self.min_size = 500
+        self.gzip_level = 6
+        self.brotli_quality = 5
+
+    def init_app(self, app):
+        self.enabled = app.config['COMPRESSION_ENABLED']
+        self.min_size = app.config['COMPRESSION_MIN_SIZE']
+        self.gzip_level = app.config['COMPRESSION_GZIP_LEVEL']
+        self.brotli_quality = app.config['COMPRESSION_BROTLI_QUALITY']
+        if self.enabled:
+            # Registrado antes dos demais hooks: o Flask executa os after_request em ordem
+            # inversa, então a compressão é a última etapa (depois de ETag/304)
+            app.after_request(self._compress)
+
+    def _encoding(self):
+        accepted = request.accept_encodings
+        if brotli is not None and accepted['br']:
+            return 'br'
+        if accepted['gzip']:
+            return 'gzip'
+        return None
+
+    def _compress(self, response):
+        if response.mimetype not in COMPRESSIBLE_TYPES:
+            return response
+        response.vary.add('Accept-Encoding')
+        if response.status_code != 200 or response.direct_passthrough or response.is_streamed or \
+                'Content-Encoding' in response.headers or request.method == 'HEAD':
+            return response
+        encoding = self._encoding()
+        if encoding is None:
+            return response
+        data = response.get_data()
+        if len(data) < self.min_size:
+            return response
+
+        if encoding == 'br':
+            compressed = brotli.compress(data, quality=self.brotli_quality)
+        else:
+            compressed = gzip.compress(data, compresslevel=self.gzip_level, mtime=0)
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        # ETag forte identifica os bytes: a versão comprimida passa a ser fraca
+        etag, weak = response.get_etag()
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+
+compression = Compression()
@@ -0,0 +1,76 @@
+"""
+Execução concorrente de consultas independentes ao banco.
+
+Cada chamada ao Supabase é uma ida e volta pela rede; quando uma página precisa
+de várias consultas que não dependem umas das outras, `gather` dispara todas ao
+mesmo tempo em um pool de threads por worker e espera a mais lenta. As threads
+herdam o contexto da aplicação e do request (contextvars), então `g`, `session`
+e a instrumentação continuam funcionando dentro das funções chamadas.
+"""
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_pid: Optional[int] = None
+_max_workers = 8
+_lock = threading.Lock()
+_local = threading.local()
+
+
+def configure(max_workers: int):
+    """Define o tamanho do pool por worker; 0 executa tudo em série"""
+    global _max_workers, _executor
+    with _lock:
+        _max_workers = max_workers
+        if _executor is not None:
+            _executor.shutdown(wait=False)
+            _executor = None
+
+
+def _get_executor() -> Optional[ThreadPoolExecutor]:
+    global _executor, _executor_pid
+    if _max_workers <= 0:
+        return None
+    with _lock:
+        # Threads não sobrevivem ao fork: cada worker do gunicorn cria o seu pool
+        if _executor is None or _executor_pid != os.getpid():
+            _executor = ThreadPoolExecutor(max_workers=_max_workers, thread_name_prefix='gather',
+                                           initializer=_mark_pool_thread)
+            _executor_pid = os.getpid()
+        return _executor
+
+
+def _mark_pool_thread():
+    _local.in_pool = True
+
+
+def gather(*calls: Callable[[], Any]) -> List[Any]:
+    """Executa funções sem argumentos em paralelo e devolve os resultados na mesma ordem
+
+    Se alguma levantar exceção, a primeira delas é relançada depois que todas terminarem.
+    Chamadas feitas de dentro do próprio pool rodam em série, para não esgotá-lo.
+    """
+    executor = _get_executor()
+    if executor is None or len(calls) < 2 or getattr(_local, 'in_pool', False):
+        return [call() for call in calls]
+
+    futures = [executor.submit(contextvars.copy_context().run, call) for call in calls[1:]]
+    # A primeira roda na thread do request, que ficaria só esperando
+    results, errors = [], []
+    try:
+        results.append(calls[0]())
+    except Exception as e:
+        results.append(None)
+        errors.append(e)
+    for future in futures:
+        try:
+            results.append(future.result())
+        except Exception as e:
+            results.append(None)
+            errors.append(e)
+    if errors:
+        raise errors[0]
+    return results
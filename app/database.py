@@ -17,25 +17,121 @@ if sys.version_info >= (3, 14):
     print("\n" + "=" * 70)
     sys.exit(1)
 
-from supabase import create_client, Client
 from config import Config
-from typing import Optional
+from app.instrumentation import TracedQuery
+from typing import Any, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
 
 class Database:
-    """Classe para gerenciar conexão com Supabase"""
+    """Classe para gerenciar conexão com o banco (Supabase, Postgres direto ou memória)"""
+    
+    _instance: Optional[Any] = None
+    _instance_key: Optional[tuple] = None
+    _http_client = None
+    _settings = None
+    
+    # Configurações que exigem um novo cliente quando mudam
+    _CLIENT_SETTINGS = (
+        'DATABASE_BACKEND', 'DATABASE_URL', 'DATABASE_POOL_MIN_SIZE', 'DATABASE_POOL_MAX_SIZE',
+        'MEMORY_DB_LATENCY_MS', 'SUPABASE_URL', 'SUPABASE_KEY', 'SUPABASE_HTTP2',
+        'SUPABASE_HTTP_MAX_CONNECTIONS', 'SUPABASE_HTTP_MAX_KEEPALIVE', 'SUPABASE_HTTP_KEEPALIVE_EXPIRY',
+        'SUPABASE_CONNECT_TIMEOUT', 'SUPABASE_READ_TIMEOUT',
+    )
+    
+    @classmethod
+    def init_app(cls, app):
+        """Passa a ler o backend do config da aplicação (create_app) em vez do Config global"""
+        cls._settings = app.config
+        # Mantém o cliente já criado (ex.: no post_fork) se o config da aplicação não muda nada nele
+        if cls._instance is not None and cls._instance_key != cls._client_key():
+            cls.reset()
     
-    _instance: Optional[Client] = None
+    @classmethod
+    def _setting(cls, name: str) -> Any:
+        if cls._settings is not None and name in cls._settings:
+            return cls._settings[name]
+        return getattr(Config, name, None)
+    
+    @classmethod
+    def _client_key(cls) -> tuple:
+        return tuple(cls._setting(name) for name in cls._CLIENT_SETTINGS)
+    
+    @classmethod
+    def _create_supabase_client(cls):
+        """Cliente Supabase com pool HTTP keep-alive e timeouts configuráveis"""
+        import httpx
+        from supabase import create_client
+        from supabase.lib.client_options import SyncClientOptions
+        
+        cls._http_client = httpx.Client(
+            http2=cls._setting('SUPABASE_HTTP2'),
+            limits=httpx.Limits(
+                max_connections=cls._setting('SUPABASE_HTTP_MAX_CONNECTIONS'),
+                max_keepalive_connections=cls._setting('SUPABASE_HTTP_MAX_KEEPALIVE'),
+                keepalive_expiry=cls._setting('SUPABASE_HTTP_KEEPALIVE_EXPIRY')
+            ),
+            timeout=httpx.Timeout(
+                cls._setting('SUPABASE_READ_TIMEOUT'),
+                connect=cls._setting('SUPABASE_CONNECT_TIMEOUT')
+            ),
+            follow_redirects=True
+        )
+        return create_client(
+            cls._setting('SUPABASE_URL'),
+            cls._setting('SUPABASE_KEY'),
+            options=SyncClientOptions(httpx_client=cls._http_client)
+        )
     
     @classmethod
-    def get_client(cls) -> Client:
-        """Retorna instância do cliente Supabase (Singleton)"""
+    def get_client(cls):
+        """Retorna instância do cliente do backend configurado em DATABASE_BACKEND (Singleton)"""
         if cls._instance is None:
-            cls._instance = create_client(
-                Config.SUPABASE_URL,
-                Config.SUPABASE_KEY
-            )
+            backend = cls._setting('DATABASE_BACKEND')
+            if backend == 'postgres':
+                from app.backends.postgres import PostgresClient
+                cls._instance = PostgresClient(
+                    cls._setting('DATABASE_URL'),
+                    min_size=cls._setting('DATABASE_POOL_MIN_SIZE'),
+                    max_size=cls._setting('DATABASE_POOL_MAX_SIZE')
+                )
+            elif backend == 'memory':
+                from app.backends.memory import MemoryClient
+                cls._instance = MemoryClient(latency_ms=cls._setting('MEMORY_DB_LATENCY_MS') or 0)
+            else:
+                cls._instance = cls._create_supabase_client()
+            cls._instance_key = cls._client_key()
         return cls._instance
     
+    @classmethod
+    def warm_up(cls):
+        """Abre a primeira conexão (DNS, TCP e TLS) antes do primeiro request do worker"""
+        try:
+            cls.get_client().table('tenants').select('id').limit(1).execute()
+        except Exception:
+            logger.exception("Erro ao aquecer conexão com o banco")
+    
+    @classmethod
+    def reset(cls, close: bool = True):
+        """Descarta o cliente atual; o próximo acesso cria outro com o config vigente
+        
+        Depois de um fork, use close=False: as conexões herdadas pertencem ao
+        processo pai e não devem ser encerradas pelo filho.
+        """
+        instance, cls._instance, cls._instance_key = cls._instance, None, None
+        http_client, cls._http_client = cls._http_client, None
+        if not close:
+            return
+        try:
+            if http_client is not None:
+                http_client.close()
+            elif instance is not None and hasattr(instance, 'close'):
+                instance.close()
+        except Exception:
+            logger.exception("Erro ao fechar cliente do banco")
+    
     @classmethod
     def set_tenant_context(cls, tenant_id: str):
         """Define o contexto do tenant para RLS"""
@@ -44,4 +140,21 @@ class Database:
         # ou uso de funções RPC customizadas
         pass
 
-db = Database.get_client()
+
+class _ClientProxy:
+    """Encaminha `db.table(...)`/`db.rpc(...)` para o cliente atual, criado no primeiro uso,
+    registrando cada execute() na instrumentação do request"""
+    
+    def table(self, table_name: str) -> TracedQuery:
+        return TracedQuery(Database.get_client().table(table_name), table_name)
+    
+    from_ = table
+    
+    def rpc(self, fn: str, params: dict = None, **kwargs) -> TracedQuery:
+        return TracedQuery(Database.get_client().rpc(fn, params, **kwargs), fn, 'rpc')
+    
+    def __getattr__(self, name):
+        return getattr(Database.get_client(), name)
+
+
+db = _ClientProxy()
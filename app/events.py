@@ -0,0 +1,216 @@
+"""
+Barramento de invalidação de cache entre workers.
+
+Os caches de app/cache.py são por processo: quando um worker grava uma
+alteração do admin, os outros continuam com a versão antiga até o TTL. Os
+métodos de escrita de app/models.py publicam chaves como `form:<id>`,
+`field:<id>`, `tenant:<id>` e `user:<id>`; cada worker assina o canal e
+descarta as entradas afetadas (app/cache.py registra os handlers).
+
+Transportes (INVALIDATION_BACKEND):
+
+- 'local': só o próprio processo (desenvolvimento, Windows);
+- 'unix': datagramas Unix entre os workers do mesmo host, sem processo
+  extra: cada worker abre `<INVALIDATION_SOCKET_DIR>/<pid>.sock` e a
+  publicação envia para todos os sockets do diretório;
+- 'postgres': LISTEN/NOTIFY (psycopg) em INVALIDATION_DATABASE_URL ou
+  DATABASE_URL, para várias instâncias da aplicação.
+
+A entrega é melhor esforço (um evento perdido só dura até o TTL do cache).
+Após reconectar ao Postgres, o listener publica `*` localmente: os caches são
+esvaziados, pois eventos podem ter sido perdidos durante a queda.
+"""
+import atexit
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import defaultdict
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Todas as entradas: publicado quando o listener pode ter perdido eventos
+EVERYTHING = '*'
+
+
+class UnixSocketTransport:
+    """Fan-out por datagramas Unix para os sockets de todos os workers do host"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self._path: Optional[str] = None
+        self._sender: Optional[socket.socket] = None
+
+    def start(self, deliver: Callable[[bytes], None]):
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f'{os.getpid()}.sock')
+        if os.path.exists(path):
+            os.unlink(path)
+        receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        receiver.bind(path)
+        self._path = path
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        # Fila de um worker cheia: descarta em vez de travar o request que publicou
+        self._sender.setblocking(False)
+        atexit.register(self._remove, path)
+        threading.Thread(target=self._receive, args=(receiver, deliver),
+                         name='invalidation-listener', daemon=True).start()
+
+    @staticmethod
+    def _receive(receiver: socket.socket, deliver: Callable[[bytes], None]):
+        while True:
+            deliver(receiver.recv(65536))
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+    def send(self, payload: bytes):
+        sender = self._sender or socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if not name.endswith('.sock') or path == self._path:
+                continue
+            try:
+                sender.sendto(payload, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Worker que já terminou sem remover o socket
+                self._remove(path)
+            except BlockingIOError:
+                logger.warning("Evento de invalidação descartado: fila cheia", extra={'socket': name})
+
+
+class PostgresTransport:
+    """LISTEN/NOTIFY em um canal do Postgres"""
+
+    def __init__(self, dsn: str, channel: str, retry_interval: float = 5.0):
+        self.dsn = dsn
+        self.channel = channel
+        self.retry_interval = retry_interval
+        self._publisher = None
+        self._lock = threading.Lock()
+
+    def start(self, deliver: Callable[[bytes], None]):
+        self._publisher = None
+        threading.Thread(target=self._listen_forever, args=(deliver,),
+                         name='invalidation-listener', daemon=True).start()
+
+    def _listen_forever(self, deliver: Callable[[bytes], None]):
+        import psycopg
+
+        connected_before = False
+        while True:
+            try:
+                with psycopg.connect(self.dsn, autocommit=True) as conn:
+                    conn.execute(f'LISTEN "{self.channel}"')
+                    if connected_before:
+                        deliver(f'\n{EVERYTHING}'.encode('utf-8'))
+                    connected_before = True
+                    for notify in conn.notifies():
+                        deliver(notify.payload.encode('utf-8'))
+            except Exception:
+                logger.exception("Erro no listener de invalidação (Postgres)")
+            time.sleep(self.retry_interval)
+
+    def send(self, payload: bytes):
+        import psycopg
+
+        with self._lock:
+            try:
+                if self._publisher is None or self._publisher.closed:
+                    self._publisher = psycopg.connect(self.dsn, autocommit=True)
+                self._publisher.execute('SELECT pg_notify(%s, %s)', (self.channel, payload.decode('utf-8')))
+            except Exception:
+                self._publisher = None
+                raise
+
+
+class InvalidationBus:
+    """Publica chaves invalidadas e chama os handlers assinados em todos os workers"""
+
+    def __init__(self):
+        self.backend = 'local'
+        self._transport = None
+        self._handlers: Dict[str, List[Callable[[str], None]]] = defaultdict(list)
+        self._sender_id: Optional[str] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.backend = app.config['INVALIDATION_BACKEND']
+        if self.backend == 'unix':
+            self._transport = UnixSocketTransport(app.config['INVALIDATION_SOCKET_DIR'])
+        elif self.backend == 'postgres':
+            dsn = app.config['INVALIDATION_DATABASE_URL'] or app.config['DATABASE_URL']
+            if not dsn:
+                raise ValueError('INVALIDATION_DATABASE_URL ou DATABASE_URL é obrigatório para INVALIDATION_BACKEND=postgres')
+            self._transport = PostgresTransport(dsn, app.config['INVALIDATION_CHANNEL'])
+        elif self.backend == 'local':
+            self._transport = None
+        else:
+            raise ValueError(f"INVALIDATION_BACKEND inválido: {self.backend}")
+        self._pid = None
+        # O listener é por processo: com --preload, só existe depois do fork
+        app.before_request(self.ensure_listener)
+
+    def subscribe(self, kind: str, handler: Callable[[str], None]):
+        """Registra `handler(id)` para as chaves `<kind>:<id>` (e `handler(None)` para '*')"""
+        self._handlers[kind].append(handler)
+
+    def publish(self, *keys: str):
+        """Invalida as chaves neste processo e envia aos demais workers"""
+        keys = [key for key in keys if key]
+        if not keys:
+            return
+        self._dispatch(keys)
+        if self._transport is None:
+            return
+        self.ensure_listener()
+        try:
+            self._transport.send('\n'.join([self._sender_id] + keys).encode('utf-8'))
+        except Exception:
+            logger.exception("Erro ao publicar invalidação", extra={'keys': keys})
+
+    def ensure_listener(self):
+        """Garante o listener deste processo (inclusive após fork)"""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._sender_id = uuid.uuid4().hex
+            if self._transport is not None:
+                try:
+                    self._transport.start(self._receive)
+                except Exception:
+                    logger.exception("Erro ao iniciar o listener de invalidação")
+            self._pid = os.getpid()
+
+    def _receive(self, payload: bytes):
+        sender, *keys = payload.decode('utf-8').split('\n')
+        if sender != self._sender_id:
+            self._dispatch(keys)
+
+    def _dispatch(self, keys: Iterable[str]):
+        for key in keys:
+            if key == EVERYTHING:
+                kinds = list(self._handlers)
+                value = None
+            else:
+                kind, _, value = key.partition(':')
+                kinds = [kind]
+            for kind in kinds:
+                for handler in self._handlers.get(kind, ()):
+                    try:
+                        handler(value)
+                    except Exception:
+                        logger.exception("Erro ao aplicar invalidação", extra={'key': key})
+
+
+events = InvalidationBus()
@@ -0,0 +1,104 @@
+"""
+Validadores HTTP (ETag) e respostas 304 para páginas renderizadas.
+
+- Formulário público: a ETag vem dos `updated_at` (e IDs) do tenant, do
+  formulário, dos campos e das configurações no snapshot, mais a versão dos
+  templates. Um GET com If-None-Match igual recebe 304 sem renderizar nada.
+  Os modelos gravam `updated_at` a cada alteração.
+- Demais páginas HTML (GET 200): ETag fraca calculada do corpo renderizado;
+  economiza a transferência, não a renderização.
+- /api/stats: ETag do JSON e `max-age` curto (STATS_MAX_AGE) para o polling
+  do dashboard.
+
+Páginas com mensagens flash pendentes não recebem ETag: o conteúdo depende
+da sessão.
+"""
+import hashlib
+import json
+import os
+
+from flask import jsonify, make_response, request, session
+from flask.globals import request_ctx
+
+
+def _digest(*parts) -> str:
+    return hashlib.sha1('\x1f'.join(str(part) for part in parts).encode('utf-8')).hexdigest()
+
+
+class HttpCache:
+    """ETags das páginas e do JSON de estatísticas"""
+
+    def __init__(self):
+        self.version = ''
+        self.stats_max_age = 10
+
+    def init_app(self, app):
+        self.stats_max_age = app.config['STATS_MAX_AGE']
+        self.version = self._templates_version(app)
+        app.after_request(self._page_etag)
+
+    @staticmethod
+    def _templates_version(app) -> str:
+        """Hash dos templates e do manifest de assets: muda a cada deploy que altera o HTML"""
+        sha = hashlib.sha1()
+        folders = [os.path.join(app.root_path, app.template_folder),
+                   os.path.join(app.static_folder, 'dist')]
+        for folder in folders:
+            for directory, _, filenames in sorted(os.walk(folder)):
+                for filename in sorted(filenames):
+                    if filename.endswith(('.html', '.json')):
+                        with open(os.path.join(directory, filename), 'rb') as f:
+                            sha.update(f.read())
+        return sha.hexdigest()[:12]
+
+    def snapshot_etag(self, snapshot) -> str:
+        """ETag do formulário público a partir das versões dos dados do snapshot"""
+        tenant, form, fields, settings = snapshot
+        parts = [self.version, tenant['id'], tenant.get('updated_at'), form['id'], form.get('updated_at')]
+        parts.extend(f"{field['id']}@{field.get('updated_at')}" for field in fields)
+        if settings:
+            parts.append(settings.get('updated_at'))
+        return _digest(*parts)
+
+    @staticmethod
+    def _cacheable() -> bool:
+        # Flashes pendentes ou exibidos neste request tornam a página única
+        return request.method in ('GET', 'HEAD') and '_flashes' not in session and not request_ctx.flashes
+
+    def not_modified(self, etag: str):
+        """Resposta 304 se o cliente já tem esta versão, senão None"""
+        if self._cacheable() and request.if_none_match.contains_weak(etag):
+            response = make_response('', 304)
+            response.set_etag(etag, weak=True)
+            response.cache_control.no_cache = True
+            return response
+        return None
+
+    def with_etag(self, rv, etag: str):
+        """Anexa a ETag (fraca, pois a compressão muda os bytes) à resposta renderizada"""
+        response = make_response(rv)
+        if self._cacheable() and response.status_code == 200:
+            response.set_etag(etag, weak=True)
+            response.cache_control.no_cache = True
+        return response
+
+    def stats_response(self, stats):
+        """JSON de /api/stats com ETag e validade curta"""
+        response = jsonify(stats)
+        response.set_etag(_digest(json.dumps(stats, sort_keys=True, default=str)), weak=True)
+        response.cache_control.private = True
+        response.cache_control.max_age = self.stats_max_age
+        return response.make_conditional(request)
+
+    def _page_etag(self, response):
+        if response.status_code != 200 or response.mimetype != 'text/html' or response.is_streamed or \
+                response.direct_passthrough or 'ETag' in response.headers or not self._cacheable():
+            return response
+        response.set_etag(hashlib.sha1(response.get_data()).hexdigest(), weak=True)
+        if not response.cache_control.public:
+            response.cache_control.private = True
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+
+http_cache = HttpCache()
@@ -0,0 +1,169 @@
+"""
+Instrumentação por request: idas ao banco, bcrypt e renderização de templates.
+
+Cada `execute()` feito através de `app.database.db` (tabelas e RPCs) é registrado
+em `flask.g` com tabela, operação, duração e número de linhas. Ao final do request
+a resposta recebe um header `Server-Timing` (visível no DevTools do navegador) e,
+se o request passou de SLOW_REQUEST_MS, uma linha de log JSON com o detalhamento.
+"""
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List
+
+from flask import g, has_request_context, request
+from flask.signals import before_render_template, template_rendered
+
+logger = logging.getLogger('app.requests')
+
+# Métodos do builder que definem a operação registrada
+_ACTIONS = ('select', 'insert', 'upsert', 'update', 'delete')
+# Máximo de consultas detalhadas na linha de log de request lento
+_LOGGED_QUERIES = 50
+
+
+def _calls() -> List[Dict[str, Any]]:
+    # A lista é criada no before_request, antes que as threads de gather() a
+    # compartilhem; setdefault (atômico) só cobre chamadas anteriores ao hook
+    return g.setdefault('db_calls', [])
+
+
+def add_timing(name: str, duration_ms: float):
+    """Acumula o tempo de uma etapa (ex.: bcrypt, render) no request atual"""
+    if not has_request_context():
+        return
+    timings = g.setdefault('timings', {})
+    timings[name] = timings.get(name, 0.0) + duration_ms
+
+
+@contextmanager
+def timing(name: str):
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_timing(name, (time.perf_counter() - started) * 1000)
+
+
+def _row_count(data: Any) -> int:
+    if isinstance(data, list):
+        return len(data)
+    return 0 if data is None else 1
+
+
+class TracedQuery:
+    """Envolve um builder do cliente e registra o execute() no request atual"""
+
+    __slots__ = ('_inner', '_target', '_operation')
+
+    def __init__(self, inner, target: str, operation: str = 'select'):
+        self._inner = inner
+        self._target = target
+        self._operation = operation
+
+    def _wrap(self, value, operation: str):
+        if hasattr(value, 'execute'):
+            return TracedQuery(value, self._target, operation)
+        return value
+
+    def __getattr__(self, name):
+        value = getattr(self._inner, name)
+        operation = name if name in _ACTIONS else self._operation
+        if not callable(value):
+            return self._wrap(value, operation)
+
+        def method(*args, **kwargs):
+            return self._wrap(value(*args, **kwargs), operation)
+        return method
+
+    def execute(self):
+        if not has_request_context():
+            return self._inner.execute()
+        started = time.perf_counter()
+        response, error = None, None
+        try:
+            response = self._inner.execute()
+            return response
+        except Exception as e:
+            error = e
+            raise
+        finally:
+            record_db_call(self._target, self._operation, started, response, error)
+
+
+def record_db_call(target: str, operation: str, started: float, response: Any = None, error: Exception = None):
+    """Registra uma chamada ao banco iniciada em `started` (time.perf_counter) no request atual"""
+    if not has_request_context():
+        return
+    call = {'target': target, 'op': operation}
+    if error is not None:
+        call['error'] = type(error).__name__
+    else:
+        call['rows'] = _row_count(getattr(response, 'data', None))
+    call['ms'] = round((time.perf_counter() - started) * 1000, 2)
+    _calls().append(call)
+
+
+class RequestInstrumentation:
+    """Liga os hooks de request e de templates na aplicação"""
+
+    def __init__(self):
+        self.server_timing = True
+        self.slow_request_ms = 500
+
+    def init_app(self, app):
+        self.server_timing = app.config.get('SERVER_TIMING', True)
+        self.slow_request_ms = app.config.get('SLOW_REQUEST_MS', 500)
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        before_render_template.connect(self._render_started, app)
+        template_rendered.connect(self._render_finished, app)
+
+    @staticmethod
+    def _start():
+        g.request_started = time.perf_counter()
+        g.setdefault('db_calls', [])
+        g.setdefault('timings', {})
+
+    @staticmethod
+    def _render_started(sender, template, context, **extra):
+        g.render_started = time.perf_counter()
+
+    @staticmethod
+    def _render_finished(sender, template, context, **extra):
+        started = g.pop('render_started', None)
+        if started is not None:
+            add_timing('render', (time.perf_counter() - started) * 1000)
+
+    def _finish(self, response):
+        started = g.get('request_started')
+        if started is None:
+            return response
+        total_ms = (time.perf_counter() - started) * 1000
+        calls = g.get('db_calls', [])
+        db_ms = sum(call['ms'] for call in calls)
+        timings = g.get('timings', {})
+
+        if self.server_timing:
+            metrics = [f'db;dur={db_ms:.1f};desc="{len(calls)} queries"']
+            metrics.extend(f'{name};dur={ms:.1f}' for name, ms in timings.items())
+            metrics.append(f'total;dur={total_ms:.1f}')
+            response.headers.add('Server-Timing', ', '.join(metrics))
+
+        if self.slow_request_ms is not None and total_ms >= self.slow_request_ms:
+            # Campos em `extra`: a serialização JSON acontece fora do request (app/logs.py)
+            logger.warning('slow_request', extra={
+                'method': request.method,
+                'path': request.path,
+                'endpoint': request.endpoint,
+                'status': response.status_code,
+                'duration_ms': round(total_ms, 1),
+                'db_calls': len(calls),
+                'db_ms': round(db_ms, 1),
+                'timings': {name: round(ms, 1) for name, ms in timings.items()},
+                'queries': calls[:_LOGGED_QUERIES],
+            })
+        return response
+
+
+instrumentation = RequestInstrumentation()
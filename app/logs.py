@@ -0,0 +1,147 @@
+"""
+Logging estruturado sem I/O na thread do request.
+
+Os módulos usam `logging.getLogger(__name__)` (hierarquia 'app.*'). `logs.init_app`
+liga nessa hierarquia um único handler de fila: a thread do request só cria o
+LogRecord e o coloca na fila; formatação (JSON, traceback) e escrita no stderr
+acontecem em uma thread separada por processo.
+
+- LOG_LEVEL corta as mensagens antes de qualquer formatação: com 'INFO' em
+  produção, `logger.debug(...)` custa só a checagem de nível. Passe valores
+  como argumentos (`logger.debug('x=%s', x)`), nunca em f-string;
+- LOG_FORMAT 'json' (uma linha por evento, para agregadores) ou 'text';
+- campos passados em `extra={...}` viram chaves do JSON;
+- com a fila cheia (LOG_QUEUE_SIZE) as mensagens são descartadas e contadas
+  em vez de bloquear o request.
+"""
+import atexit
+import json
+import logging
+import os
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+# Atributos padrão do LogRecord; o resto veio de `extra=`
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime', 'taskName'}
+
+
+def _extras(record: logging.LogRecord) -> Dict[str, Any]:
+    return {key: value for key, value in vars(record).items() if key not in _RECORD_ATTRIBUTES}
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por evento: ts, level, logger, msg, campos extras e exc"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        entry.update(_extras(record))
+        if record.exc_info:
+            entry['exc'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Formato legível para desenvolvimento, com os campos extras no fim da linha"""
+
+    def __init__(self):
+        super().__init__('%(asctime)s %(levelname)s [%(name)s] %(message)s')
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        line = super().formatMessage(record)
+        extras = _extras(record)
+        if extras:
+            line += ' ' + ' '.join(f'{key}={json.dumps(value, ensure_ascii=False, default=str)}'
+                                   for key, value in extras.items())
+        return line
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """QueueHandler que não formata na thread de quem loga e nunca bloqueia"""
+
+    def __init__(self, log_queue: queue.Queue, owner: 'StructuredLogging'):
+        super().__init__(log_queue)
+        self.owner = owner
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Fixa só a mensagem (os argumentos podem mudar depois); JSON e traceback ficam para o listener
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        self.owner.ensure_listener()
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.owner.dropped += 1
+
+
+class StructuredLogging:
+    """Configura a hierarquia 'app' com fila e listener por processo"""
+
+    def __init__(self, logger_name: str = 'app'):
+        self.logger_name = logger_name
+        self.dropped = 0
+        self.queue_size = 10000
+        self._handler: Optional[_DeferredQueueHandler] = None
+        self._output: Optional[logging.Handler] = None
+        self._listener: Optional[QueueListener] = None
+        self._listener_pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        level = app.config['LOG_LEVEL'] or ('DEBUG' if app.debug else 'INFO')
+        self.stop()
+
+        self._output = logging.StreamHandler(sys.stderr)
+        self._output.setFormatter(JsonFormatter() if app.config['LOG_FORMAT'] == 'json' else TextFormatter())
+        self.queue_size = app.config['LOG_QUEUE_SIZE']
+
+        logger = logging.getLogger(self.logger_name)
+        if self._handler is not None:
+            logger.removeHandler(self._handler)
+        self._handler = _DeferredQueueHandler(queue.Queue(maxsize=self.queue_size), self)
+        logger.addHandler(self._handler)
+        logger.setLevel(level.upper())
+        # Não duplicar no root (gunicorn/werkzeug têm os próprios handlers)
+        logger.propagate = False
+
+    def ensure_listener(self):
+        """Garante a thread de escrita viva neste processo (inclusive após fork)"""
+        if self._listener_pid == os.getpid():
+            return
+        with self._lock:
+            if self._listener_pid == os.getpid() or self._handler is None:
+                return
+            # Fila nova por processo: a herdada do fork pode estar com o lock preso
+            self._handler.queue = queue.Queue(maxsize=self.queue_size)
+            self._listener = QueueListener(self._handler.queue, self._output)
+            self._listener.start()
+            self._listener_pid = os.getpid()
+
+    def stop(self):
+        """Escreve o que está na fila e encerra a thread de escrita"""
+        with self._lock:
+            listener, self._listener = self._listener, None
+            owned = self._listener_pid == os.getpid()
+            self._listener_pid = None
+        if listener is not None and owned:
+            try:
+                listener.stop()
+            except queue.Full:
+                pass
+
+
+logs = StructuredLogging()
+
+# Esvaziar a fila ao encerrar o processo
+atexit.register(logs.stop)
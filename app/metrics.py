@@ -0,0 +1,132 @@
+"""
+Métricas no formato do Prometheus, agregadas entre os workers do gunicorn.
+
+Com a variável PROMETHEUS_MULTIPROC_DIR definida (gunicorn_config.py define por
+padrão), cada worker grava seus valores em arquivos mmap nesse diretório e o
+endpoint /metrics soma os arquivos de todos os workers a cada coleta. Sem ela
+(ex.: `python run.py`), as métricas ficam só na memória do processo.
+"""
+import os
+import time
+
+from flask import Response, abort, current_app, g, request
+from prometheus_client import (CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge,
+                               Histogram, generate_latest, multiprocess)
+
+_MULTIPROCESS_DIR = os.getenv('PROMETHEUS_MULTIPROC_DIR')
+if _MULTIPROCESS_DIR:
+    os.makedirs(_MULTIPROCESS_DIR, exist_ok=True)
+
+REQUESTS = Counter(
+    'formapp_http_requests_total', 'Requests HTTP atendidos',
+    ['blueprint', 'endpoint', 'method', 'status']
+)
+REQUEST_LATENCY = Histogram(
+    'formapp_http_request_duration_seconds', 'Duração dos requests HTTP',
+    ['blueprint', 'endpoint'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+)
+IN_PROGRESS = Gauge(
+    'formapp_http_requests_in_progress', 'Requests HTTP em andamento',
+    ['blueprint'], multiprocess_mode='livesum'
+)
+DB_LATENCY = Histogram(
+    'formapp_db_call_duration_seconds', 'Duração das chamadas ao banco (tabelas e RPCs)',
+    ['target', 'op'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5)
+)
+DB_ERRORS = Counter(
+    'formapp_db_call_errors_total', 'Chamadas ao banco que terminaram em exceção',
+    ['target', 'op']
+)
+CACHE_LOOKUPS = Counter(
+    'formapp_cache_lookups_total', 'Consultas aos caches por worker',
+    ['cache', 'result']
+)
+
+RATE_LIMITED = Counter(
+    'formapp_rate_limited_total', 'Requests recusados com 429 pelos token buckets',
+    ['scope']
+)
+
+REQUESTS_SHED = Counter(
+    'formapp_requests_shed_total', 'Requests recusados com 503 pelo controle de admissão',
+    ['priority']
+)
+
+
+def record_cache_lookup(cache: str, hit: bool):
+    CACHE_LOOKUPS.labels(cache, 'hit' if hit else 'miss').inc()
+
+
+def record_rate_limited(scope: str):
+    RATE_LIMITED.labels(scope).inc()
+
+
+def record_shed(priority: str):
+    REQUESTS_SHED.labels(priority).inc()
+
+
+def _labels():
+    # Requests sem rota (404) ficam agrupados para não explodir a cardinalidade
+    return request.blueprint or '', request.endpoint or 'unmatched'
+
+
+class Metrics:
+    """Hooks de request e endpoint de coleta"""
+
+    def __init__(self):
+        self.token = None
+
+    def init_app(self, app):
+        self.token = app.config.get('METRICS_TOKEN')
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.teardown_request(self._teardown)
+        app.add_url_rule('/metrics', 'metrics', self.view)
+
+    @staticmethod
+    def _start():
+        g.metrics_started = time.perf_counter()
+        g.metrics_blueprint = request.blueprint or ''
+        IN_PROGRESS.labels(g.metrics_blueprint).inc()
+
+    @staticmethod
+    def _finish(response):
+        started = g.get('metrics_started')
+        if started is None:
+            return response
+        blueprint, endpoint = _labels()
+        REQUESTS.labels(blueprint, endpoint, request.method, str(response.status_code)).inc()
+        REQUEST_LATENCY.labels(blueprint, endpoint).observe(time.perf_counter() - started)
+        for call in g.get('db_calls', []):
+            DB_LATENCY.labels(call['target'], call['op']).observe(call['ms'] / 1000)
+            if 'error' in call:
+                DB_ERRORS.labels(call['target'], call['op']).inc()
+        return response
+
+    @staticmethod
+    def _teardown(exc):
+        blueprint = g.pop('metrics_blueprint', None)
+        if blueprint is not None:
+            IN_PROGRESS.labels(blueprint).dec()
+
+    def view(self):
+        # Sem METRICS_TOKEN o endpoint só existe em modo debug: as métricas expõem
+        # rotas, volume e latência de tráfego, tabelas/RPCs do banco e a atuação dos
+        # limites (rate limit, admissão), e não devem ficar públicas no deploy
+        if not self.token:
+            if not current_app.debug:
+                abort(404)
+        elif request.headers.get('Authorization') != f'Bearer {self.token}':
+            abort(401)
+        if _MULTIPROCESS_DIR:
+            registry = CollectorRegistry()
+            multiprocess.MultiProcessCollector(registry)
+        else:
+            registry = REGISTRY
+        return Response(generate_latest(registry), mimetype=CONTENT_TYPE_LATEST)
+
+
+metrics = Metrics()
+
@@ -1,8 +1,16 @@
+import logging
 from flask_login import UserMixin
 from app.database import db
-from datetime import datetime
-from typing import Optional, List, Dict, Any
-import bcrypt
+from app.events import events
+from app.security import password_hasher, PasswordHasherBusy
+from app.writebehind import write_behind
+from app.pagination import apply_keyset, split_page, clamp_page_size
+from config import Config
+from datetime import datetime, timedelta
+from typing import Optional, List, Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
 
 class User(UserMixin):
     """Modelo de usuário administrativo"""
@@ -20,9 +28,8 @@ class User(UserMixin):
     @classmethod
     def _create_user_instance(cls, data):
         """Cria uma instância de usuário a partir dos dados do banco"""
-        # Atualizar last_login
-        db.table('users').update({'last_login': datetime.now().isoformat()}).eq('id', data['id']).execute()
-        print(f"[DEBUG] Criando objeto User...")
+        # Atualizar last_login fora do request, em lote (app/writebehind.py)
+        write_behind.update('users', data['id'], {'last_login': datetime.now().astimezone().isoformat()})
         return User(
             id=data['id'],
             tenant_id=data['tenant_id'],
@@ -54,8 +61,8 @@ class User(UserMixin):
                     is_active=data['is_active'],
                     is_superuser=data.get('is_superuser', False)
                 )
-        except Exception as e:
-            print(f"Erro ao buscar usuário: {e}")
+        except Exception:
+            logger.exception("Erro ao buscar usuário")
         return None
     
     @staticmethod
@@ -74,56 +81,44 @@ class User(UserMixin):
                     is_active=data['is_active'],
                     is_superuser=data.get('is_superuser', False)
                 )
-        except Exception as e:
-            print(f"Erro ao buscar usuário por email: {e}")
+        except Exception:
+            logger.exception("Erro ao buscar usuário por email")
         return None
     
     @staticmethod
     def verify_password(email: str, password: str) -> Optional['User']:
         """Verifica senha e retorna usuário se válido"""
         try:
-            print(f"[DEBUG] Buscando usuário: email={email}")
             response = db.table('users').select('*').eq('email', email).execute()
-            print(f"[DEBUG] Resposta do banco: {response.data}")
             
             if response.data:
                 data = response.data[0]
-                print(f"[DEBUG] Usuário encontrado: {data['email']}, verificando senha...")
                 
                 # Verifica se a senha está no formato bcrypt
                 if data['password_hash'].startswith('$2b$'):
-                    if bcrypt.checkpw(password.encode('utf-8'), data['password_hash'].encode('utf-8')):
-                        print(f"[DEBUG] Senha bcrypt correta!")
+                    if password_hasher.check(password, data['password_hash']):
                         return User._create_user_instance(data)
-                # Verifica se a senha está no formato scrypt
-                elif data['password_hash'].startswith('scrypt:'):
-                    # Para compatibilidade, vamos atualizar para bcrypt na próxima autenticação
-                    print(f"[DEBUG] Atualizando hash scrypt para bcrypt...")
-                    new_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
-                    db.table('users').update({'password_hash': new_hash}).eq('id', data['id']).execute()
-                    print(f"[DEBUG] Hash atualizado para bcrypt")
-                    return User._create_user_instance(data)
-                # Se não for nenhum dos formatos conhecidos, tenta verificar diretamente (backward compatibility)
-                elif bcrypt.checkpw(password.encode('utf-8'), data['password_hash'].encode('utf-8')):
-                    print(f"[DEBUG] Senha em formato antigo, mas válida. Atualizando para bcrypt...")
-                    new_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+                # Formatos antigos (scrypt/pbkdf2 do werkzeug): verificar e atualizar para bcrypt
+                elif password_hasher.check(password, data['password_hash']):
+                    logger.info("Senha em formato antigo atualizada para bcrypt", extra={'user_id': data['id']})
+                    new_hash = password_hasher.hash(password)
                     db.table('users').update({'password_hash': new_hash}).eq('id', data['id']).execute()
                     return User._create_user_instance(data)
                 
-                print(f"[DEBUG] Senha incorreta!")
+                logger.debug("Senha incorreta", extra={'user_id': data['id']})
             else:
-                print(f"[DEBUG] Nenhum usuário encontrado com esse email")
-        except Exception as e:
-            print(f"[DEBUG] Erro ao verificar senha: {e}")
-            import traceback
-            traceback.print_exc()
+                logger.debug("Nenhum usuário com o email informado")
+        except PasswordHasherBusy:
+            raise
+        except Exception:
+            logger.exception("Erro ao verificar senha")
         return None
     
     @staticmethod
     def create(tenant_id: str, email: str, password: str, full_name: str, role: str = 'user') -> Optional['User']:
         """Cria novo usuário"""
         try:
-            password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+            password_hash = password_hasher.hash(password)
             response = db.table('users').insert({
                 'tenant_id': tenant_id,
                 'email': email,
@@ -143,8 +138,10 @@ class User(UserMixin):
                     is_active=data['is_active'],
                     is_superuser=data.get('is_superuser', False)
                 )
-        except Exception as e:
-            print(f"Erro ao criar usuário: {e}")
+        except PasswordHasherBusy:
+            raise
+        except Exception:
+            logger.exception("Erro ao criar usuário")
         return None
 
 
@@ -158,8 +155,8 @@ class Tenant:
             response = db.table('tenants').select('*').eq('slug', slug).eq('is_active', True).execute()
             if response.data:
                 return response.data[0]
-        except Exception as e:
-            print(f"Erro ao buscar tenant: {e}")
+        except Exception:
+            logger.exception("Erro ao buscar tenant")
         return None
     
     @staticmethod
@@ -169,8 +166,8 @@ class Tenant:
             response = db.table('tenants').select('*').eq('id', tenant_id).execute()
             if response.data:
                 return response.data[0]
-        except Exception as e:
-            print(f"Erro ao buscar tenant por ID: {e}")
+        except Exception:
+            logger.exception("Erro ao buscar tenant por ID")
         return None
         
     @staticmethod
@@ -202,20 +199,20 @@ class Tenant:
             
             if response.data:
                 return response.data[0]
-        except Exception as e:
-            print(f"Erro ao criar tenant: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Erro ao criar tenant")
         return None
     
     @staticmethod
     def update(tenant_id: str, data: Dict[str, Any]) -> bool:
         """Atualiza dados do tenant"""
         try:
+            data = dict(data, updated_at=datetime.now().astimezone().isoformat())
             db.table('tenants').update(data).eq('id', tenant_id).execute()
+            events.publish(f'tenant:{tenant_id}')
             return True
-        except Exception as e:
-            print(f"Erro ao atualizar tenant: {e}")
+        except Exception:
+            logger.exception("Erro ao atualizar tenant")
             return False
 
 
@@ -228,10 +225,26 @@ class Form:
         try:
             response = db.table('forms').select('*').eq('tenant_id', tenant_id).order('created_at', desc=True).execute()
             return response.data if response.data else []
-        except Exception as e:
-            print(f"Erro ao buscar formulários: {e}")
+        except Exception:
+            logger.exception("Erro ao buscar formulários")
             return []
     
+    @staticmethod
+    def get_page(tenant_id: str, cursor: str = None, limit: int = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Busca uma página de formulários do tenant (mais recentes primeiro)
+        
+        Returns:
+            Tupla (formulários, cursor da próxima página ou None)
+        """
+        limit = clamp_page_size(limit)
+        try:
+            query = db.table('forms').select('*').eq('tenant_id', tenant_id)
+            response = apply_keyset(query, 'created_at', cursor, limit).execute()
+            return split_page(response.data or [], 'created_at', limit)
+        except Exception:
+            logger.exception("Erro ao buscar formulários")
+            return [], None
+    
     @staticmethod
     def get_by_id(form_id: str) -> Optional[Dict[str, Any]]:
         """Busca formulário por ID"""
@@ -239,8 +252,8 @@ class Form:
             response = db.table('forms').select('*').eq('id', form_id).execute()
             if response.data:
                 return response.data[0]
-        except Exception as e:
-            print(f"Erro ao buscar formulário: {e}")
+        except Exception:
+            logger.exception("Erro ao buscar formulário")
         return None
     
     @staticmethod
@@ -255,18 +268,20 @@ class Form:
             }).execute()
             if response.data:
                 return response.data[0]
-        except Exception as e:
-            print(f"Erro ao criar formulário: {e}")
+        except Exception:
+            logger.exception("Erro ao criar formulário")
         return None
     
     @staticmethod
     def update(form_id: str, data: Dict[str, Any]) -> bool:
         """Atualiza formulário"""
         try:
+            data = dict(data, updated_at=datetime.now().astimezone().isoformat())
             db.table('forms').update(data).eq('id', form_id).execute()
+            events.publish(f'form:{form_id}')
             return True
-        except Exception as e:
-            print(f"Erro ao atualizar formulário: {e}")
+        except Exception:
+            logger.exception("Erro ao atualizar formulário")
             return False
     
     @staticmethod
@@ -274,9 +289,10 @@ class Form:
         """Deleta formulário"""
         try:
             db.table('forms').delete().eq('id', form_id).execute()
+            events.publish(f'form:{form_id}')
             return True
-        except Exception as e:
-            print(f"Erro ao deletar formulário: {e}")
+        except Exception:
+            logger.exception("Erro ao deletar formulário")
             return False
 
 
@@ -287,12 +303,17 @@ class FormField:
     def get_by_form(form_id: str) -> List[Dict[str, Any]]:
         """Busca todos os campos de um formulário"""
         try:
-            response = db.table('form_fields').select('*').eq('form_id', form_id).order('field_order').execute()
-            return response.data if response.data else []
-        except Exception as e:
-            print(f"Erro ao buscar campos: {e}")
+            return FormField.fetch_by_form(form_id)
+        except Exception:
+            logger.exception("Erro ao buscar campos")
             return []
     
+    @staticmethod
+    def fetch_by_form(form_id: str) -> List[Dict[str, Any]]:
+        """Como get_by_form, mas propaga erros do banco (exportação: sem campos, o arquivo sairia sem as respostas)"""
+        response = db.table('form_fields').select('*').eq('form_id', form_id).order('field_order').execute()
+        return response.data if response.data else []
+    
     @staticmethod
     def create(form_id: str, field_data: Dict[str, Any], options: List[str] = None) -> Optional[Dict[str, Any]]:
         """Cria novo campo
@@ -325,22 +346,23 @@ class FormField:
                 field_data['updated_at'] = now
             
             response = db.table('form_fields').insert(field_data).execute()
+            events.publish(f'form:{form_id}')
             if response.data:
                 return response.data[0]
-        except Exception as e:
-            print(f"Erro ao criar campo: {e}")
-            import traceback
-            traceback.print_exc()
+        except Exception:
+            logger.exception("Erro ao criar campo")
         return None
     
     @staticmethod
     def update(field_id: str, data: Dict[str, Any]) -> bool:
         """Atualiza campo"""
         try:
+            data = dict(data, updated_at=datetime.now().astimezone().isoformat())
             db.table('form_fields').update(data).eq('id', field_id).execute()
+            events.publish(f'field:{field_id}')
             return True
-        except Exception as e:
-            print(f"Erro ao atualizar campo: {e}")
+        except Exception:
+            logger.exception("Erro ao atualizar campo")
             return False
     
     @staticmethod
@@ -348,9 +370,10 @@ class FormField:
         """Deleta campo"""
         try:
             db.table('form_fields').delete().eq('id', field_id).execute()
+            events.publish(f'field:{field_id}')
             return True
-        except Exception as e:
-            print(f"Erro ao deletar campo: {e}")
+        except Exception:
+            logger.exception("Erro ao deletar campo")
             return False
 
 
@@ -375,8 +398,8 @@ class Lead:
             }).execute()
             if response.data:
                 return response.data[0]
-        except Exception as e:
-            print(f"Erro ao buscar/criar lead: {e}")
+        except Exception:
+            logger.exception("Erro ao buscar/criar lead")
         return None
     
     @staticmethod
@@ -385,9 +408,25 @@ class Lead:
         try:
             response = db.table('leads').select('*').eq('tenant_id', tenant_id).order('created_at', desc=True).execute()
             return response.data if response.data else []
-        except Exception as e:
-            print(f"Erro ao buscar leads: {e}")
+        except Exception:
+            logger.exception("Erro ao buscar leads")
             return []
+    
+    @staticmethod
+    def get_page(tenant_id: str, cursor: str = None, limit: int = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Busca uma página de leads do tenant (mais recentes primeiro)
+        
+        Returns:
+            Tupla (leads, cursor da próxima página ou None)
+        """
+        limit = clamp_page_size(limit)
+        try:
+            query = db.table('leads').select('*').eq('tenant_id', tenant_id)
+            response = apply_keyset(query, 'created_at', cursor, limit).execute()
+            return split_page(response.data or [], 'created_at', limit)
+        except Exception:
+            logger.exception("Erro ao buscar leads")
+            return [], None
 
 
 class FormSubmission:
@@ -405,8 +444,74 @@ class FormSubmission:
             }).execute()
             if response.data:
                 return response.data[0]
-        except Exception as e:
-            print(f"Erro ao criar submissão: {e}")
+        except Exception:
+            logger.exception("Erro ao criar submissão")
+        return None
+    
+    @staticmethod
+    def submit(tenant_id: str, form_id: str, phone: str, email: str, name: str,
+               answers: List[Tuple[str, str]], whatsapp_sent: bool = False,
+               ingest_key: str = None, submitted_at: str = None) -> Optional[Dict[str, Any]]:
+        """Registra uma submissão completa em uma única chamada ao banco
+        
+        Usa a função `submit_form` (database/migrations/), que busca/cria o lead,
+        cria a submissão já completa, grava as respostas e marca o envio para o
+        WhatsApp na mesma transação.
+        
+        Args:
+            answers: Lista de tuplas (field_id, response_value)
+            ingest_key: Chave de idempotência; reenviar a mesma chave devolve a submissão existente
+            submitted_at: Momento da submissão (ISO 8601); padrão é o horário do banco
+        
+        Returns:
+            Dicionário com 'id' da submissão e 'lead_id', ou None em caso de erro
+        """
+        try:
+            response = db.rpc('submit_form', FormSubmission.submit_params(
+                tenant_id, form_id, phone, email, name, answers, whatsapp_sent, ingest_key, submitted_at
+            )).execute()
+            if response.data:
+                return response.data
+        except Exception:
+            logger.exception("Erro ao registrar submissão")
+        return None
+    
+    @staticmethod
+    def submit_params(tenant_id: str, form_id: str, phone: str, email: str, name: str,
+                      answers: List[Tuple[str, str]], whatsapp_sent: bool = False,
+                      ingest_key: str = None, submitted_at: str = None) -> Dict[str, Any]:
+        """Parâmetros da função `submit_form` (compartilhado com o modo ASGI)"""
+        return {
+            'p_tenant_id': tenant_id,
+            'p_form_id': form_id,
+            'p_phone': phone,
+            'p_email': email,
+            'p_name': name,
+            'p_answers': [
+                {'field_id': field_id, 'response_value': response_value}
+                for field_id, response_value in answers
+            ],
+            'p_whatsapp_sent': whatsapp_sent,
+            'p_ingest_key': ingest_key,
+            'p_submitted_at': submitted_at
+        }
+    
+    @staticmethod
+    def submit_many(submissions: List[Dict[str, Any]]) -> Optional[List[Dict[str, Any]]]:
+        """Registra várias submissões em uma única chamada (função `submit_form_batch`)
+        
+        Cada item tem as chaves tenant_id, form_id, phone, email, name, answers
+        (lista de {field_id, response_value}), whatsapp_sent, ingest_key e submitted_at.
+        
+        Returns:
+            Um resultado por item, na mesma ordem, com 'id' ou 'error';
+            None se a chamada inteira falhar
+        """
+        try:
+            response = db.rpc('submit_form_batch', {'p_submissions': submissions}).execute()
+            return response.data if response.data is not None else []
+        except Exception:
+            logger.exception("Erro ao registrar lote de submissões")
         return None
     
     @staticmethod
@@ -416,8 +521,8 @@ class FormSubmission:
             response = db.table('form_submissions').select('*').eq('id', submission_id).execute()
             if response.data:
                 return response.data[0]
-        except Exception as e:
-            print(f"Erro ao buscar submissão: {e}")
+        except Exception:
+            logger.exception("Erro ao buscar submissão")
         return None
     
     @staticmethod
@@ -426,8 +531,8 @@ class FormSubmission:
         try:
             db.table('form_submissions').update(data).eq('id', submission_id).execute()
             return True
-        except Exception as e:
-            print(f"Erro ao atualizar submissão: {e}")
+        except Exception:
+            logger.exception("Erro ao atualizar submissão")
             return False
     
     @staticmethod
@@ -439,37 +544,70 @@ class FormSubmission:
                 query = query.eq('status', status)
             response = query.order('started_at', desc=True).execute()
             return response.data if response.data else []
-        except Exception as e:
-            print(f"Erro ao buscar submissões: {e}")
+        except Exception:
+            logger.exception("Erro ao buscar submissões")
             return []
     
+    @staticmethod
+    def get_page(tenant_id: str, status: str = None, cursor: str = None, limit: int = None,
+                 form_id: str = None, columns: str = '*, leads(*), forms(title)') -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Busca uma página de submissões do tenant (mais recentes primeiro)
+        
+        Returns:
+            Tupla (submissões, cursor da próxima página ou None)
+        """
+        try:
+            return FormSubmission.fetch_page(tenant_id, status, cursor, limit, form_id, columns)
+        except Exception:
+            logger.exception("Erro ao buscar submissões")
+            return [], None
+    
+    @staticmethod
+    def fetch_page(tenant_id: str, status: str = None, cursor: str = None, limit: int = None,
+                   form_id: str = None, columns: str = '*, leads(*), forms(title)') -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Como get_page, mas propaga erros do banco (exportação: falha não pode virar arquivo truncado)"""
+        limit = clamp_page_size(limit)
+        query = db.table('form_submissions').select(columns).eq('tenant_id', tenant_id)
+        if status:
+            query = query.eq('status', status)
+        if form_id:
+            query = query.eq('form_id', form_id)
+        response = apply_keyset(query, 'started_at', cursor, limit).execute()
+        return split_page(response.data or [], 'started_at', limit)
+    
     @staticmethod
     def get_stats(tenant_id: str) -> Dict[str, int]:
-        """Retorna estatísticas de submissões"""
+        """Retorna estatísticas de submissões
+        
+        Uma única chamada: agregação direta (`tenant_submission_stats`) ou, com
+        STATS_USE_COUNTERS, leitura dos contadores mantidos por triggers
+        (`tenant_submission_stats_counters`).
+        """
         try:
-            # Total de submissões
-            total = db.table('form_submissions').select('id', count='exact').eq('tenant_id', tenant_id).execute()
-            
-            # Submissões completas
-            completed = db.table('form_submissions').select('id', count='exact').eq('tenant_id', tenant_id).eq('status', 'completed').execute()
-            
-            # Submissões incompletas
-            incomplete = db.table('form_submissions').select('id', count='exact').eq('tenant_id', tenant_id).eq('status', 'incomplete').execute()
-            
-            # Novos leads (últimos 7 dias)
-            from datetime import datetime, timedelta
-            seven_days_ago = (datetime.now() - timedelta(days=7)).isoformat()
-            new_leads = db.table('leads').select('id', count='exact').eq('tenant_id', tenant_id).gte('created_at', seven_days_ago).execute()
-            
-            return {
-                'total': total.count if hasattr(total, 'count') else 0,
-                'completed': completed.count if hasattr(completed, 'count') else 0,
-                'incomplete': incomplete.count if hasattr(incomplete, 'count') else 0,
-                'new_leads': new_leads.count if hasattr(new_leads, 'count') else 0
-            }
-        except Exception as e:
-            print(f"Erro ao buscar estatísticas: {e}")
-            return {'total': 0, 'completed': 0, 'incomplete': 0, 'new_leads': 0}
+            function, params = FormSubmission.stats_query(tenant_id)
+            response = db.rpc(function, params).execute()
+            return FormSubmission.stats_from(response.data)
+        except Exception:
+            logger.exception("Erro ao buscar estatísticas")
+            return FormSubmission.stats_from(None)
+    
+    @staticmethod
+    def stats_query(tenant_id: str) -> Tuple[str, Dict[str, Any]]:
+        """Função e parâmetros da RPC de estatísticas (compartilhado com o modo ASGI)"""
+        # Novos leads (últimos 7 dias)
+        seven_days_ago = (datetime.now() - timedelta(days=7)).isoformat()
+        function = 'tenant_submission_stats_counters' if Config.STATS_USE_COUNTERS else 'tenant_submission_stats'
+        return function, {'p_tenant_id': tenant_id, 'p_since': seven_days_ago}
+    
+    @staticmethod
+    def stats_from(data: Optional[Dict[str, Any]]) -> Dict[str, int]:
+        data = data or {}
+        return {
+            'total': data.get('total', 0),
+            'completed': data.get('completed', 0),
+            'incomplete': data.get('incomplete', 0),
+            'new_leads': data.get('new_leads', 0)
+        }
 
 
 class FormResponse:
@@ -486,19 +624,55 @@ class FormResponse:
             }).execute()
             if response.data:
                 return response.data[0]
-        except Exception as e:
-            print(f"Erro ao criar resposta: {e}")
+        except Exception:
+            logger.exception("Erro ao criar resposta")
         return None
     
+    @staticmethod
+    def create_many(submission_id: str, answers: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """Cria todas as respostas de uma submissão em uma única requisição
+        
+        Args:
+            submission_id: ID da submissão
+            answers: Lista de tuplas (field_id, response_value)
+        """
+        if not answers:
+            return []
+        try:
+            response = db.table('form_responses').insert([
+                {
+                    'submission_id': submission_id,
+                    'field_id': field_id,
+                    'response_value': response_value
+                }
+                for field_id, response_value in answers
+            ]).execute()
+            return response.data if response.data else []
+        except Exception:
+            logger.exception("Erro ao criar respostas")
+            return []
+    
     @staticmethod
     def get_by_submission(submission_id: str) -> List[Dict[str, Any]]:
         """Busca todas as respostas de uma submissão"""
         try:
             response = db.table('form_responses').select('*, form_fields(*)').eq('submission_id', submission_id).execute()
             return response.data if response.data else []
-        except Exception as e:
-            print(f"Erro ao buscar respostas: {e}")
+        except Exception:
+            logger.exception("Erro ao buscar respostas")
+            return []
+    
+    @staticmethod
+    def get_by_submissions(submission_ids: List[str]) -> List[Dict[str, Any]]:
+        """Busca as respostas de várias submissões em uma única requisição
+        
+        Erros do banco são propagados: na exportação, respostas faltando
+        gerariam colunas vazias em um arquivo aparentemente completo.
+        """
+        if not submission_ids:
             return []
+        response = db.table('form_responses').select('submission_id, field_id, response_value').in_('submission_id', submission_ids).execute()
+        return response.data if response.data else []
 
 
 class TenantSettings:
@@ -519,16 +693,18 @@ class TenantSettings:
             }).execute()
             if response.data:
                 return response.data[0]
-        except Exception as e:
-            print(f"Erro ao buscar configurações: {e}")
+        except Exception:
+            logger.exception("Erro ao buscar configurações")
         return None
     
     @staticmethod
     def update(tenant_id: str, data: Dict[str, Any]) -> bool:
         """Atualiza configurações"""
         try:
+            data = dict(data, updated_at=datetime.now().astimezone().isoformat())
             db.table('tenant_settings').update(data).eq('tenant_id', tenant_id).execute()
+            events.publish(f'tenant:{tenant_id}')
             return True
-        except Exception as e:
-            print(f"Erro ao atualizar configurações: {e}")
+        except Exception:
+            logger.exception("Erro ao atualizar configurações")
             return False
@@ -0,0 +1,67 @@
+"""
+Paginação por cursor (keyset) para as listagens do painel.
+
+As páginas são ordenadas por (coluna de data, id) em ordem decrescente. O cursor
+é a posição do último item da página anterior, codificada em base64; a próxima
+página pede ao PostgREST apenas as linhas "depois" dele, com LIMIT. O custo de
+cada página não depende de quantas páginas vieram antes.
+"""
+import base64
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+_ID_RE = re.compile(r'^[0-9a-fA-F-]{1,36}$')
+_TIMESTAMP_RE = re.compile(r'^[0-9T:.+\- Z]{10,40}$')
+
+
+def encode_cursor(sort_value: Any, row_id: Any) -> str:
+    raw = json.dumps([sort_value, row_id], separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[Any, Any]]:
+    """Decodifica o cursor; cursores inválidos são tratados como "primeira página" """
+    if not cursor:
+        return None
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        sort_value, row_id = json.loads(raw)
+        # Os valores vão para o filtro do PostgREST; só aceitar formatos esperados
+        if not _TIMESTAMP_RE.match(str(sort_value)) or not _ID_RE.match(str(row_id)):
+            return None
+        return str(sort_value), str(row_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def clamp_page_size(limit: Optional[int]) -> int:
+    try:
+        limit = int(limit) if limit is not None else DEFAULT_PAGE_SIZE
+    except (TypeError, ValueError):
+        limit = DEFAULT_PAGE_SIZE
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+def apply_keyset(query, sort_column: str, cursor: Optional[str], limit: int):
+    """Aplica ordenação, filtro do cursor e LIMIT (uma linha extra para saber se há próxima página)"""
+    position = decode_cursor(cursor)
+    if position:
+        sort_value, row_id = position
+        query = query.or_(
+            f'{sort_column}.lt."{sort_value}",'
+            f'and({sort_column}.eq."{sort_value}",id.lt.{row_id})'
+        )
+    return query.order(sort_column, desc=True).order('id', desc=True).limit(limit + 1)
+
+
+def split_page(rows: List[Dict[str, Any]], sort_column: str, limit: int) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """Separa a linha extra e gera o cursor da próxima página"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last[sort_column], last['id'])
@@ -0,0 +1,167 @@
+"""
+Limite de requests por token bucket, compartilhado entre os workers do host.
+
+O POST público de /f/<tenant_slug>/<form_id> não exige login: um bot em um
+formulário gera escritas no banco a cada hit e atrasa todos os tenants servidos
+pelos mesmos workers. Antes da view (e de qualquer consulta ao Supabase), cada
+POST consome um token do bucket do IP e um do bucket do tenant; sem token, a
+resposta é 429 com Retry-After.
+
+Os buckets vivem em um arquivo mapeado em memória (RATE_LIMIT_PATH) aberto por
+todos os workers: uma tabela hash de tamanho fixo, com grupos de `_WAYS` slots.
+Cada verificação lê e grava um único grupo sob lock (fcntl no trecho do
+arquivo + lock da thread), em tempo constante. Quando um grupo enche, o bucket
+usado há mais tempo é descartado (volta cheio na próxima vez).
+"""
+import fcntl
+import hashlib
+import math
+import mmap
+import os
+import struct
+import threading
+import time
+from typing import Optional
+
+from flask import render_template, request
+
+from app.metrics import record_rate_limited
+
+# Slot: hash da chave, tokens disponíveis, instante da última atualização (time.monotonic)
+_SLOT = struct.Struct('<Qdd')
+_WAYS = 4
+_GROUP_SIZE = _SLOT.size * _WAYS
+# Locks de thread por processo (locks fcntl não excluem threads do mesmo processo)
+_THREAD_LOCKS = 64
+
+
+def _key_hash(key: str) -> int:
+    # Estável entre processos (hash() do Python muda com PYTHONHASHSEED); 0 marca slot vazio
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'little') or 1
+
+
+class SharedTokenBuckets:
+    """Tabela de token buckets em um arquivo mmap compartilhado entre processos"""
+
+    def __init__(self, path: str, slots: int = 65536):
+        self.path = path
+        self.groups = max(1, slots // _WAYS)
+        self._pid: Optional[int] = None
+        self._fd: Optional[int] = None
+        self._map: Optional[mmap.mmap] = None
+        self._locks = []
+        self._open_lock = threading.Lock()
+
+    def _open(self):
+        with self._open_lock:
+            if self._pid == os.getpid():
+                return
+            # Após o fork, cada worker abre o arquivo de novo (locks de thread herdados podem estar presos)
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            size = self.groups * _GROUP_SIZE
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            if os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self._fd = fd
+            self._map = mmap.mmap(fd, size)
+            self._locks = [threading.Lock() for _ in range(_THREAD_LOCKS)]
+            self._pid = os.getpid()
+
+    def _group(self, key: str):
+        if self._pid != os.getpid():
+            self._open()
+        key_hash = _key_hash(key)
+        group = key_hash % self.groups
+        return key_hash, group, group * _GROUP_SIZE
+
+    def take(self, key: str, rate: float, burst: float, cost: int = 1) -> Optional[int]:
+        """Consome `cost` tokens do bucket `key` (0 só consulta); devolve None se permitido,
+        senão os segundos até o próximo token"""
+        key_hash, group, start = self._group(key)
+
+        with self._locks[group % _THREAD_LOCKS]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, _GROUP_SIZE, start)
+            try:
+                now = time.monotonic()
+                slot, oldest, oldest_seen = None, 0, math.inf
+                for way in range(_WAYS):
+                    stored_hash, tokens, seen = _SLOT.unpack_from(self._map, start + way * _SLOT.size)
+                    if stored_hash == key_hash:
+                        slot = way
+                        break
+                    if seen < oldest_seen:
+                        oldest, oldest_seen = way, seen
+
+                if slot is None or seen > now:
+                    # Bucket novo (ou de um boot anterior do host): começa cheio
+                    slot, tokens = (oldest if slot is None else slot), burst
+                else:
+                    tokens = min(burst, tokens + (now - seen) * rate)
+
+                retry_after = None
+                if tokens >= 1:
+                    tokens -= cost
+                else:
+                    retry_after = max(1, math.ceil((1 - tokens) / rate))
+                _SLOT.pack_into(self._map, start + slot * _SLOT.size, key_hash, tokens, now)
+                return retry_after
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, _GROUP_SIZE, start)
+
+    def reset(self, key: str):
+        """Descarta o bucket `key` (volta cheio no próximo uso)"""
+        key_hash, group, start = self._group(key)
+
+        with self._locks[group % _THREAD_LOCKS]:
+            fcntl.lockf(self._fd, fcntl.LOCK_EX, _GROUP_SIZE, start)
+            try:
+                for way in range(_WAYS):
+                    offset = start + way * _SLOT.size
+                    if _SLOT.unpack_from(self._map, offset)[0] == key_hash:
+                        _SLOT.pack_into(self._map, offset, 0, 0.0, 0.0)
+            finally:
+                fcntl.lockf(self._fd, fcntl.LOCK_UN, _GROUP_SIZE, start)
+
+
+class FormRateLimiter:
+    """Aplica os buckets por IP e por tenant aos POSTs dos formulários públicos"""
+
+    endpoints = ('forms.form_view',)
+
+    def __init__(self):
+        self.enabled = False
+        self.buckets: Optional[SharedTokenBuckets] = None
+        self.ip_rate = self.ip_burst = 0.0
+        self.tenant_rate = self.tenant_burst = 0.0
+
+    def init_app(self, app):
+        self.enabled = app.config['RATE_LIMIT_ENABLED']
+        if not self.enabled:
+            return
+        self.buckets = SharedTokenBuckets(app.config['RATE_LIMIT_PATH'], app.config['RATE_LIMIT_SLOTS'])
+        self.ip_rate = app.config['FORM_RATE_LIMIT_IP_PER_MINUTE'] / 60.0
+        self.ip_burst = app.config['FORM_RATE_LIMIT_IP_BURST']
+        self.tenant_rate = app.config['FORM_RATE_LIMIT_TENANT_PER_MINUTE'] / 60.0
+        self.tenant_burst = app.config['FORM_RATE_LIMIT_TENANT_BURST']
+        app.before_request(self._check)
+
+    def _check(self):
+        if request.method != 'POST' or request.endpoint not in self.endpoints:
+            return None
+        tenant_slug = (request.view_args or {}).get('tenant_slug', '')
+        for scope, key, rate, burst in (
+            ('ip', f'ip:{request.remote_addr}', self.ip_rate, self.ip_burst),
+            ('tenant', f'tenant:{tenant_slug}', self.tenant_rate, self.tenant_burst),
+        ):
+            retry_after = self.buckets.take(key, rate, burst)
+            if retry_after is not None:
+                record_rate_limited(scope)
+                body = render_template('errors/busy.html', status=429, retry_after=retry_after,
+                                       message='Muitas tentativas em pouco tempo. Aguarde e tente novamente.')
+                return body, 429, {'Retry-After': str(retry_after)}
+        return None
+
+
+form_rate_limiter = FormRateLimiter()
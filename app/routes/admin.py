@@ -1,9 +1,13 @@
 from datetime import datetime
-from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Blueprint, render_template, request, redirect, url_for, flash, session, jsonify, Response, stream_with_context, current_app
 from flask_login import login_required, current_user
 from app.models import Form, FormField, FormSubmission, FormResponse, Lead, Tenant, TenantSettings
+from app.concurrency import gather
 from config import Config
 from functools import wraps
+import csv
+import io
+import json
 
 bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -24,14 +28,13 @@ def dashboard():
     """Dashboard principal"""
     tenant_id = session['tenant_id']
     
-    # Buscar estatísticas
-    stats = FormSubmission.get_stats(tenant_id)
-    
-    # Buscar formulários
-    forms = Form.get_by_tenant(tenant_id)
-    
-    # Buscar submissões recentes
-    recent_submissions = FormSubmission.get_by_tenant(tenant_id)[:10]
+    # Estatísticas, formulários (o template mostra 5 e um link se houver mais)
+    # e submissões recentes são independentes: buscar em paralelo
+    stats, (forms, _), (recent_submissions, _) = gather(
+        lambda: FormSubmission.get_stats(tenant_id),
+        lambda: Form.get_page(tenant_id, limit=6),
+        lambda: FormSubmission.get_page(tenant_id, limit=10)
+    )
     
     return render_template('admin/dashboard.html', 
                          stats=stats, 
@@ -44,8 +47,9 @@ def dashboard():
 def forms_list():
     """Lista de formulários"""
     tenant_id = session['tenant_id']
-    forms = Form.get_by_tenant(tenant_id)
-    return render_template('admin/forms_list.html', forms=forms)
+    cursor = request.args.get('cursor')
+    forms, next_cursor = Form.get_page(tenant_id, cursor=cursor, limit=Config.PAGE_SIZE)
+    return render_template('admin/forms_list.html', forms=forms, cursor=cursor, next_cursor=next_cursor)
 
 @bp.route('/forms/create', methods=['GET', 'POST'])
 @login_required
@@ -131,6 +135,102 @@ def form_delete(form_id):
     
     return redirect(url_for('admin.forms_list'))
 
+def _export_columns(fields):
+    """Colunas fixas da submissão/lead seguidas de uma coluna por campo (rótulos repetidos ganham sufixo)"""
+    columns = ['submission_id', 'status', 'started_at', 'completed_at', 'lead_name', 'lead_phone', 'lead_email']
+    field_columns = []
+    for field in fields:
+        label = field['label']
+        suffix = 2
+        while label in columns:
+            label = f"{field['label']} ({suffix})"
+            suffix += 1
+        columns.append(label)
+        field_columns.append((field['id'], label))
+    return columns, field_columns
+
+def _iter_export_rows(tenant_id, form_id, field_columns):
+    """Percorre as submissões do formulário em lotes (cursor) e gera uma linha por submissão
+    
+    Erros do banco interrompem o streaming (conexão encerrada sem o fim da
+    resposta), em vez de entregar um arquivo truncado como se estivesse completo.
+    """
+    cursor = None
+    while True:
+        submissions, cursor = FormSubmission.fetch_page(tenant_id, form_id=form_id, cursor=cursor,
+                                                        limit=Config.EXPORT_CHUNK_SIZE, columns='*, leads(*)')
+        answers = {}
+        for answer in FormResponse.get_by_submissions([s['id'] for s in submissions]):
+            answers[(answer['submission_id'], answer['field_id'])] = answer['response_value']
+        
+        for submission in submissions:
+            lead = submission.get('leads') or {}
+            row = {
+                'submission_id': submission['id'],
+                'status': submission.get('status'),
+                'started_at': submission.get('started_at'),
+                'completed_at': submission.get('completed_at'),
+                'lead_name': lead.get('name'),
+                'lead_phone': lead.get('phone'),
+                'lead_email': lead.get('email')
+            }
+            for field_id, label in field_columns:
+                row[label] = answers.get((submission['id'], field_id))
+            yield row
+        
+        if not cursor:
+            break
+
+@bp.route('/forms/<form_id>/export.<fmt>')
+@login_required
+@tenant_required
+def form_export(form_id, fmt):
+    """Exporta as submissões do formulário em CSV ou NDJSON (streaming)"""
+    if fmt not in ('csv', 'ndjson'):
+        flash('Formato de exportação inválido', 'error')
+        return redirect(url_for('admin.form_edit', form_id=form_id))
+    
+    form = Form.get_by_id(form_id)
+    if not form or form['tenant_id'] != session['tenant_id']:
+        flash('Formulário não encontrado', 'error')
+        return redirect(url_for('admin.forms_list'))
+    
+    try:
+        fields = FormField.fetch_by_form(form_id)
+    except Exception:
+        current_app.logger.exception("Erro ao buscar campos para exportação")
+        flash('Erro ao exportar respostas. Tente novamente.', 'error')
+        return redirect(url_for('admin.form_edit', form_id=form_id))
+    columns, field_columns = _export_columns(fields)
+    rows = _iter_export_rows(session['tenant_id'], form_id, field_columns)
+    
+    def generate_csv():
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns)
+        # BOM para o Excel reconhecer UTF-8
+        buffer.write('\ufeff')
+        writer.writeheader()
+        for row in rows:
+            writer.writerow(row)
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate(0)
+        yield buffer.getvalue()
+    
+    def generate_ndjson():
+        for row in rows:
+            yield json.dumps(row, ensure_ascii=False) + '\n'
+    
+    if fmt == 'csv':
+        body, mimetype = generate_csv(), 'text/csv'
+    else:
+        body, mimetype = generate_ndjson(), 'application/x-ndjson'
+    
+    return Response(stream_with_context(body), mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename="respostas-{form_id}.{fmt}"',
+        'X-Accel-Buffering': 'no'
+    })
+
 @bp.route('/forms/<form_id>/fields/create', methods=['POST'])
 @login_required
 @tenant_required
@@ -267,10 +367,15 @@ def submissions_list():
     """Lista de respostas"""
     tenant_id = session['tenant_id']
     status_filter = request.args.get('status', None)
+    cursor = request.args.get('cursor')
     
-    submissions = FormSubmission.get_by_tenant(tenant_id, status_filter)
+    submissions, next_cursor = FormSubmission.get_page(tenant_id, status_filter, cursor=cursor, limit=Config.PAGE_SIZE)
     
-    return render_template('admin/submissions_list.html', submissions=submissions, status_filter=status_filter)
+    return render_template('admin/submissions_list.html', 
+                         submissions=submissions, 
+                         status_filter=status_filter,
+                         cursor=cursor,
+                         next_cursor=next_cursor)
 
 @bp.route('/submissions/<submission_id>')
 @login_required
@@ -292,9 +397,10 @@ def submission_detail(submission_id):
 def leads_list():
     """Lista de leads"""
     tenant_id = session['tenant_id']
-    leads = Lead.get_by_tenant(tenant_id)
+    cursor = request.args.get('cursor')
+    leads, next_cursor = Lead.get_page(tenant_id, cursor=cursor, limit=Config.PAGE_SIZE)
     
-    return render_template('admin/leads_list.html', leads=leads)
+    return render_template('admin/leads_list.html', leads=leads, cursor=cursor, next_cursor=next_cursor)
 
 @bp.route('/settings', methods=['GET', 'POST'])
 @login_required
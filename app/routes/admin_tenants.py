@@ -2,6 +2,9 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from flask_login import login_required, current_user
 from app.models import Tenant, User
 from app.database import db
+from app.events import events
+from app.security import password_hasher, PasswordHasherBusy
+from datetime import datetime
 
 bp = Blueprint('admin_tenants', __name__, url_prefix='/admin/tenants')
 
@@ -104,8 +107,9 @@ def edit_tenant(tenant_id):
                 'name': name,
                 'slug': slug,
                 'is_active': is_active,
-                'updated_at': 'now()'
+                'updated_at': datetime.now().astimezone().isoformat()
             }).eq('id', tenant_id).execute()
+            events.publish(f'tenant:{tenant_id}')
             
             flash('Empresa atualizada com sucesso!', 'success')
             return redirect(url_for('admin_tenants.list_tenants'))
@@ -134,6 +138,7 @@ def delete_tenant(tenant_id):
         
         # Remover o tenant
         db.table('tenants').delete().eq('id', tenant_id).execute()
+        events.publish(f'tenant:{tenant_id}')
         flash('Empresa removida com sucesso!', 'success')
         
     except Exception as e:
@@ -220,8 +225,7 @@ def edit_tenant_user(tenant_id, user_id):
             # Se uma nova senha foi fornecida, atualizar a senha
             new_password = request.form.get('new_password')
             if new_password:
-                from werkzeug.security import generate_password_hash
-                update_data['password'] = generate_password_hash(new_password)
+                update_data['password_hash'] = password_hasher.hash(new_password)
             
             # Verificar se o email já está em uso por outro usuário
             existing_user = db.table('users').select('id').neq('id', user_id).eq('email', email).eq('tenant_id', tenant_id).execute()
@@ -231,9 +235,12 @@ def edit_tenant_user(tenant_id, user_id):
             
             # Atualizar o usuário
             db.table('users').update(update_data).eq('id', user_id).execute()
+            events.publish(f'user:{user_id}')
             flash('Usuário atualizado com sucesso!', 'success')
             return redirect(url_for('admin_tenants.list_tenant_users', tenant_id=tenant_id))
             
+        except PasswordHasherBusy:
+            raise
         except Exception as e:
             current_app.logger.error(f"Erro ao atualizar usuário: {e}")
             flash('Erro ao atualizar usuário', 'error')
@@ -271,6 +278,7 @@ def delete_tenant_user(tenant_id, user_id):
         
         # Remover o usuário
         db.table('users').delete().eq('id', user_id).execute()
+        events.publish(f'user:{user_id}')
         flash('Usuário removido com sucesso!', 'success')
         
     except Exception as e:
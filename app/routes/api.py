@@ -1,6 +1,8 @@
 from flask import Blueprint, jsonify, request, session
-from flask_login import login_required
+from flask_login import login_required, current_user
 from app.models import FormSubmission, Lead
+from app.spool import spool
+from app.http_cache import http_cache
 
 bp = Blueprint('api', __name__, url_prefix='/api')
 
@@ -14,7 +16,8 @@ def get_stats():
     tenant_id = session['tenant_id']
     stats = FormSubmission.get_stats(tenant_id)
     
-    return jsonify(stats)
+    # Polling do dashboard: ETag + max-age curto (STATS_MAX_AGE)
+    return http_cache.stats_response(stats)
 
 @bp.route('/submissions/<submission_id>')
 @login_required
@@ -28,3 +31,15 @@ def get_submission(submission_id):
         return jsonify({'error': 'Not found'}), 404
     
     return jsonify(submission)
+
+@bp.route('/spool/stats')
+@login_required
+def get_spool_stats():
+    """API para monitorar o spool de submissões (profundidade e atraso)"""
+    if not current_user.is_superuser:
+        return jsonify({'error': 'Forbidden'}), 403
+    
+    if not spool.enabled:
+        return jsonify({'enabled': False})
+    
+    return jsonify(dict(spool.stats(), enabled=True))
@@ -1,14 +1,24 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, session
-from flask_login import login_user, logout_user, login_required
+from flask_login import login_user, logout_user, login_required, current_user
 from app.models import User, Tenant
 from app import login_manager
+from app.cache import user_cache
+from app.security import login_throttle
+import logging
 
 bp = Blueprint('auth', __name__, url_prefix='/auth')
+logger = logging.getLogger(__name__)
 
 @login_manager.user_loader
 def load_user(user_id):
     """Carrega usuário para Flask-Login"""
-    return User.get_by_id(user_id)
+    user = user_cache.get(user_id)
+    if user is None:
+        generation = user_cache.generation
+        user = User.get_by_id(user_id)
+        if user:
+            user_cache.set(user_id, user, generation=generation)
+    return user
 
 @bp.route('/login', methods=['GET', 'POST'])
 def login():
@@ -17,19 +27,26 @@ def login():
         email = request.form.get('email')
         password = request.form.get('password')
         
-        print(f"[DEBUG LOGIN] Tentando login para email: {email}")
-        
         if not email or not password:
             flash('Email e senha são obrigatórios', 'error')
             return render_template('auth/login.html')
         
+        # Muitas falhas recentes deste IP ou para este email: recusar antes do banco e do bcrypt
+        retry_after = login_throttle.retry_after(request.remote_addr, email)
+        if retry_after:
+            logger.warning("Login bloqueado por excesso de falhas", extra={'ip': request.remote_addr})
+            flash('Muitas tentativas de login. Aguarde alguns minutos e tente novamente.', 'error')
+            return render_template('auth/login.html'), 429, {'Retry-After': str(retry_after)}
+        
         # Verificar credenciais
+        generation = user_cache.generation
         user = User.verify_password(email, password)
-        print(f"[DEBUG LOGIN] Usuário encontrado: {user}")
         
         if user and user.is_active:
-            print(f"[DEBUG LOGIN] Usuário ativo, fazendo login...")
+            logger.info("Login realizado", extra={'user_id': user.id, 'ip': request.remote_addr})
+            login_throttle.record_success(request.remote_addr, email)
             login_user(user)
+            user_cache.set(user.id, user, generation=generation)
             
             # Se for superusuário, redireciona para o painel de administração
             if user.is_superuser:
@@ -44,10 +61,10 @@ def login():
                 session['tenant_name'] = tenant['name']
             
             flash('Login realizado com sucesso!', 'success')
-            print(f"[DEBUG LOGIN] Redirecionando para dashboard...")
             return redirect(url_for('admin.dashboard'))
         else:
-            print(f"[DEBUG LOGIN] Falha na autenticação - User: {user}, Active: {user.is_active if user else 'N/A'}")
+            logger.info("Falha no login", extra={'ip': request.remote_addr, 'inactive': bool(user)})
+            login_throttle.record_failure(request.remote_addr, email)
             flash('Email ou senha inválidos', 'error')
     
     return render_template('auth/login.html')
@@ -56,6 +73,7 @@ def login():
 @login_required
 def logout():
     """Logout do usuário"""
+    user_cache.invalidate(current_user.id)
     logout_user()
     session.clear()
     flash('Logout realizado com sucesso', 'success')
@@ -69,8 +87,6 @@ def register():
         password = request.form.get('password')
         full_name = request.form.get('full_name')
         
-        print(f"[DEBUG REGISTER] Novo registro: Email: {email}, Nome: {full_name}")
-        
         if not all([email, password, full_name]):
             flash('Todos os campos são obrigatórios', 'error')
             return render_template('auth/register.html')
@@ -92,6 +108,7 @@ def register():
         # Criar usuário
         user = User.create(tenant['id'], email, password, full_name)
         if user:
+            logger.info("Usuário registrado", extra={'user_id': user.id, 'tenant_id': tenant['id']})
             flash('Usuário criado com sucesso! Faça login.', 'success')
             return redirect(url_for('auth.login'))
         else:
@@ -1,119 +1,210 @@
 from flask import Blueprint, render_template, request, redirect, session, flash
-from app.models import Form, FormField, FormSubmission, FormResponse, Lead, Tenant, TenantSettings
+from app.models import Form, FormField, FormSubmission, Tenant, TenantSettings
+from app.spool import spool
+from app.cache import form_snapshots, submission_tokens, build_form_snapshot
+from app.concurrency import gather
+from app.http_cache import http_cache
 from datetime import datetime
+import logging
 import urllib.parse
+import uuid
 
 bp = Blueprint('forms', __name__, url_prefix='/f')
+logger = logging.getLogger(__name__)
 
-@bp.route('/<tenant_slug>/<form_id>', methods=['GET', 'POST'])
-def form_view(tenant_slug, form_id):
-    """Visualização pública do formulário para leads"""
+def _collect_answers(fields, form_data):
+    """Extrai as respostas dos campos dinâmicos como tuplas (field_id, valor)"""
+    answers = []
+    for field in fields:
+        field_id = field['id']
+        field_name = f'field_{field_id}'
+        
+        # Processar valores de campos de múltipla seleção (checkboxes)
+        if field['field_type'] == 'checkbox' and field.get('options'):
+            response_values = form_data.getlist(f'{field_name}[]')
+            response_value = ", ".join(response_values) if response_values else ''
+        else:
+            response_value = form_data.get(field_name, '')
+        
+        answers.append((field_id, response_value))
+    return answers
+
+def _build_whatsapp_message(form, fields, answers, name, phone, email):
+    """Monta a mensagem enviada ao WhatsApp do tenant"""
+    labels = {field['id']: field['label'] for field in fields}
     
-    # Buscar tenant
-    tenant = Tenant.get_by_slug(tenant_slug)
+    whatsapp_message = f"🔔 *Nova Resposta de Formulário*\n\n"
+    whatsapp_message += f"📋 *Formulário:* {form['title']}\n"
+    whatsapp_message += f"👤 *Lead:* {name or 'Não informado'}\n"
+    whatsapp_message += f"📱 *Telefone:* {phone or 'Não informado'}\n"
+    whatsapp_message += f"📧 *Email:* {email or 'Não informado'}\n"
+    whatsapp_message += f"\n{'─' * 30}\n\n"
+    whatsapp_message += f"*📝 RESPOSTAS:*\n\n"
+    
+    for field_id, response_value in answers:
+        # Adicionar à mensagem do WhatsApp apenas se houver valor
+        if response_value:
+            whatsapp_message += f"▪️ *{labels[field_id]}*\n"
+            whatsapp_message += f"   {response_value}\n\n"
+    
+    # Adicionar rodapé com data/hora
+    whatsapp_message += f"\n{'─' * 30}\n"
+    whatsapp_message += f"🕐 *Enviado em:* {datetime.now().strftime('%d/%m/%Y às %H:%M')}"
+    return whatsapp_message
+
+def _build_whatsapp_url(tenant, whatsapp_message):
+    """Retorna o link wa.me do tenant ou None se não houver WhatsApp configurado"""
+    whatsapp_number = tenant['whatsapp_number']
+    if not whatsapp_number:
+        return None
+    # Remover caracteres não numéricos
+    whatsapp_number = ''.join(filter(str.isdigit, whatsapp_number))
+    return f"https://wa.me/{whatsapp_number}?text={urllib.parse.quote(whatsapp_message)}"
+
+def _snapshot_error(tenant, form):
+    """Resposta 404 se o tenant ou o formulário não existem/não estão ativos"""
     if not tenant:
         return render_template('errors/404.html', message='Empresa não encontrada'), 404
-    
-    # Buscar formulário
-    form = Form.get_by_id(form_id)
     if not form or form['tenant_id'] != tenant['id'] or not form['is_active']:
         return render_template('errors/404.html', message='Formulário não encontrado'), 404
+    return None
+
+def _store_snapshot(tenant_slug, form_id, tenant, form, fields, settings, generation):
+    """Monta o snapshot e o guarda, salvo se o cache foi invalidado desde `generation`"""
+    snapshot = build_form_snapshot(tenant, form, fields, settings)
+    form_snapshots.set((tenant_slug, form_id), snapshot, generation=generation)
+    return snapshot
+
+def _submission_token(form_data):
+    """Token de idempotência enviado pelo formulário (UUID), ou None se ausente/inválido"""
+    try:
+        return str(uuid.UUID(form_data.get('submission_token', '')))
+    except ValueError:
+        return None
+
+def _replayed_submission(snapshot, form_id, token):
+    """Resposta original se este token já foi processado neste worker, senão None"""
+    if not token:
+        return None
+    replayed = submission_tokens.get((form_id, token))
+    if replayed is None:
+        return None
+    whatsapp_url, = replayed
+    return _submission_response(snapshot, {'ingest_key': token}, whatsapp_url)
+
+def _remember_submission(form_id, token, submission, whatsapp_url):
+    if token and submission:
+        submission_tokens.set((form_id, token), (whatsapp_url,))
+
+def _read_submission(snapshot, form_id, form_data):
+    """Lê o POST e devolve (argumentos de FormSubmission.submit, link do WhatsApp)"""
+    tenant, form, fields, _ = snapshot
+    phone = form_data.get('phone')
+    email = form_data.get('email')
+    name = form_data.get('name')
     
-    # Buscar campos
-    fields = FormField.get_by_form(form_id)
+    answers = _collect_answers(fields, form_data)
+    whatsapp_message = _build_whatsapp_message(form, fields, answers, name, phone, email)
+    whatsapp_url = _build_whatsapp_url(tenant, whatsapp_message)
     
-    # Buscar configurações
-    settings = TenantSettings.get_by_tenant(tenant['id'])
+    submission = {
+        'tenant_id': tenant['id'],
+        'form_id': form_id,
+        'phone': phone,
+        'email': email,
+        'name': name,
+        'answers': answers,
+        'whatsapp_sent': bool(whatsapp_url)
+    }
+    token = _submission_token(form_data)
+    if token:
+        # A mesma chave no banco (submit_form) e no spool deduplica reenvios entre workers
+        submission['ingest_key'] = token
+    return submission, whatsapp_url
+
+def _spool_submission(submission):
+    """Grava no spool local; o envio ao Supabase acontece em segundo plano"""
+    try:
+        return {'ingest_key': spool.append(dict(
+            submission,
+            answers=[
+                {'field_id': field_id, 'response_value': response_value}
+                for field_id, response_value in submission['answers']
+            ],
+            submitted_at=datetime.now().astimezone().isoformat()
+        ))}
+    except Exception:
+        logger.exception("Erro ao gravar submissão no spool")
+    return None
+
+def _submission_response(snapshot, submission, whatsapp_url):
+    tenant, form, fields, settings = snapshot
+    if not submission:
+        flash('Erro ao processar formulário. Tente novamente.', 'error')
+        return _render_form(snapshot)
     
-    if request.method == 'POST':
-        # Processar submissão
-        phone = request.form.get('phone')
-        email = request.form.get('email')
-        name = request.form.get('name')
-        
-        # Criar ou buscar lead
-        lead = Lead.get_or_create(tenant['id'], phone, email, name)
-        if not lead:
-            flash('Erro ao processar formulário. Tente novamente.', 'error')
-            return render_template('forms/view.html', 
-                                 form=form, 
-                                 fields=fields, 
-                                 tenant=tenant, 
-                                 settings=settings)
-        
-        # Criar submissão
-        submission = FormSubmission.create(form_id, lead['id'], tenant['id'])
-        if not submission:
-            flash('Erro ao processar formulário. Tente novamente.', 'error')
-            return render_template('forms/view.html', 
-                                 form=form, 
-                                 fields=fields, 
-                                 tenant=tenant, 
-                                 settings=settings)
-        
-        # Salvar respostas e montar mensagem do WhatsApp
-        whatsapp_message = f"🔔 *Nova Resposta de Formulário*\n\n"
-        whatsapp_message += f"📋 *Formulário:* {form['title']}\n"
-        whatsapp_message += f"👤 *Lead:* {name or 'Não informado'}\n"
-        whatsapp_message += f"📱 *Telefone:* {phone or 'Não informado'}\n"
-        whatsapp_message += f"📧 *Email:* {email or 'Não informado'}\n"
-        whatsapp_message += f"\n{'─' * 30}\n\n"
-        whatsapp_message += f"*📝 RESPOSTAS:*\n\n"
-        
-        for field in fields:
-            field_id = field['id']
-            field_name = f'field_{field_id}'
-            
-            # Processar valores de campos de múltipla seleção (checkboxes)
-            if field['field_type'] == 'checkbox' and field.get('options'):
-                response_values = request.form.getlist(f'{field_name}[]')
-                response_value = ", ".join(response_values) if response_values else ''
-            else:
-                response_value = request.form.get(field_name, '')
-            
-            # Salvar no banco
-            FormResponse.create(submission['id'], field_id, response_value)
-            
-            # Adicionar à mensagem do WhatsApp apenas se houver valor
-            if response_value:
-                whatsapp_message += f"▪️ *{field['label']}*\n"
-                whatsapp_message += f"   {response_value}\n\n"
-        
-        # Adicionar rodapé com data/hora
-        whatsapp_message += f"\n{'─' * 30}\n"
-        whatsapp_message += f"🕐 *Enviado em:* {datetime.now().strftime('%d/%m/%Y às %H:%M')}"
-        
-        # Marcar submissão como completa
-        FormSubmission.update(submission['id'], {
-            'status': 'completed',
-            'completed_at': datetime.now().isoformat()
-        })
-        
-        # Preparar link do WhatsApp
-        whatsapp_number = tenant['whatsapp_number']
-        if whatsapp_number:
-            # Remover caracteres não numéricos
-            whatsapp_number = ''.join(filter(str.isdigit, whatsapp_number))
-            whatsapp_url = f"https://wa.me/{whatsapp_number}?text={urllib.parse.quote(whatsapp_message)}"
-            
-            # Marcar como enviado para WhatsApp
-            FormSubmission.update(submission['id'], {
-                'whatsapp_sent': True,
-                'whatsapp_sent_at': datetime.now().isoformat()
-            })
-            
-            # Redirecionar DIRETAMENTE para o WhatsApp
-            return redirect(whatsapp_url)
-        else:
-            # Se não tiver WhatsApp configurado, mostrar página de sucesso
-            flash('Formulário enviado com sucesso!', 'success')
-            return render_template('forms/success.html', 
-                                 whatsapp_url=None, 
-                                 tenant=tenant, 
-                                 settings=settings)
+    if whatsapp_url:
+        # Redirecionar DIRETAMENTE para o WhatsApp
+        return redirect(whatsapp_url)
     
+    # Se não tiver WhatsApp configurado, mostrar página de sucesso
+    flash('Formulário enviado com sucesso!', 'success')
+    return render_template('forms/success.html', 
+                         whatsapp_url=None, 
+                         tenant=tenant, 
+                         settings=settings)
+
+def _form_page(snapshot):
+    """GET do formulário: 304 se o navegador já tem esta versão do snapshot, senão renderiza com ETag"""
+    etag = http_cache.snapshot_etag(snapshot)
+    return http_cache.not_modified(etag) or http_cache.with_etag(_render_form(snapshot), etag)
+
+def _render_form(snapshot):
+    tenant, form, fields, settings = snapshot
     return render_template('forms/view.html', 
                          form=form, 
                          fields=fields, 
                          tenant=tenant, 
                          settings=settings)
+
+@bp.route('/<tenant_slug>/<form_id>', methods=['GET', 'POST'])
+def form_view(tenant_slug, form_id):
+    """Visualização pública do formulário para leads
+    
+    O modo ASGI (app/asgi.py) atende esta mesma rota com chamadas assíncronas ao
+    banco, reutilizando as funções acima; mudanças aqui valem para os dois modos.
+    """
+    
+    snapshot = form_snapshots.get((tenant_slug, form_id))
+    if snapshot is None:
+        generation = form_snapshots.generation
+        # Tenant, formulário e campos não dependem um do outro: buscar em paralelo
+        tenant, form, fields = gather(
+            lambda: Tenant.get_by_slug(tenant_slug),
+            lambda: Form.get_by_id(form_id),
+            lambda: FormField.get_by_form(form_id)
+        )
+        error = _snapshot_error(tenant, form)
+        if error:
+            return error
+        
+        # Configurações dependem do ID do tenant
+        settings = TenantSettings.get_by_tenant(tenant['id'])
+        snapshot = _store_snapshot(tenant_slug, form_id, tenant, form, fields, settings, generation)
+    
+    if request.method == 'POST':
+        token = _submission_token(request.form)
+        replayed = _replayed_submission(snapshot, form_id, token)
+        if replayed is not None:
+            return replayed
+        
+        submission_data, whatsapp_url = _read_submission(snapshot, form_id, request.form)
+        
+        submission = _spool_submission(submission_data) if spool.enabled else None
+        if not submission:
+            # Lead, submissão, respostas e status do WhatsApp em uma única transação
+            submission = FormSubmission.submit(**submission_data)
+        _remember_submission(form_id, token, submission, whatsapp_url)
+        return _submission_response(snapshot, submission, whatsapp_url)
+    
+    return _form_page(snapshot)
@@ -1,8 +1,9 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, session
 from flask_login import login_required, current_user
-from werkzeug.security import generate_password_hash
 from app.models import User
 from app.database import db
+from app.events import events
+from app.security import password_hasher, PasswordHasherBusy
 
 bp = Blueprint('tenant_users', __name__, url_prefix='/minha-conta/usuarios')
 
@@ -100,7 +101,7 @@ def edit_user(user_id):
             # Se uma nova senha foi fornecida, atualizar a senha
             new_password = request.form.get('new_password')
             if new_password:
-                update_data['password_hash'] = generate_password_hash(new_password)
+                update_data['password_hash'] = password_hasher.hash(new_password)
             
             # Verificar se o email já está em uso por outro usuário
             existing_user = db.table('users').select('id').neq('id', user_id).eq('email', email).eq('tenant_id', current_user.tenant_id).execute()
@@ -110,9 +111,12 @@ def edit_user(user_id):
             
             # Atualizar o usuário
             db.table('users').update(update_data).eq('id', user_id).execute()
+            events.publish(f'user:{user_id}')
             flash('Usuário atualizado com sucesso!', 'success')
             return redirect(url_for('tenant_users.list_users'))
                 
+        except PasswordHasherBusy:
+            raise
         except Exception as e:
             current_app.logger.error(f"Erro ao atualizar usuário: {e}")
             flash('Erro ao atualizar usuário', 'error')
@@ -143,6 +147,7 @@ def delete_user(user_id):
         
         # Remover o usuário
         db.table('users').delete().eq('id', user_id).execute()
+        events.publish(f'user:{user_id}')
         flash('Usuário removido com sucesso!', 'success')
         
     except Exception as e:
@@ -0,0 +1,150 @@
+"""
+Hash de senhas fora das threads de request e limite de tentativas de login.
+
+bcrypt consome ~250 ms de CPU por verificação. Com o hash feito direto na thread
+do gunicorn, uma rajada de logins (ou um ataque de credential stuffing) ocupa
+todas as threads do worker e trava também os formulários públicos. Aqui:
+
+- `password_hasher` executa bcrypt em um pool pequeno por worker, com fila
+  limitada; acima do limite o login é recusado na hora (`PasswordHasherBusy`,
+  respondido com 503 + Retry-After) em vez de esperar;
+- `login_throttle` conta falhas por IP e por email e bloqueia novas tentativas,
+  antes de qualquer consulta ao banco ou bcrypt.
+
+O pool do bcrypt é por worker. As falhas de login ficam em token buckets
+compartilhados entre os workers do host (arquivo mmap, app/ratelimit.py): o
+limite vale para o host inteiro, qualquer que seja o worker que atende.
+"""
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Callable, Optional
+
+import bcrypt
+from flask import flash, render_template, request
+from werkzeug.security import check_password_hash
+
+from app.instrumentation import timing
+from app.ratelimit import SharedTokenBuckets
+
+
+class PasswordHasherBusy(Exception):
+    """Pool de hash cheio: o login deve ser recusado e tentado novamente depois"""
+
+
+class PasswordHasher:
+    """Pool limitado para bcrypt com rejeição imediata quando saturado"""
+
+    def __init__(self, max_workers: int = 1, max_queue: int = 1, timeout: float = 10, retry_after: int = 2):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.rounds = 12
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._slots = threading.BoundedSemaphore(max_workers + max_queue)
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        self.max_workers = app.config['BCRYPT_MAX_WORKERS']
+        self.max_queue = app.config['BCRYPT_MAX_QUEUE']
+        self.timeout = app.config['BCRYPT_TIMEOUT']
+        self.retry_after = app.config['BCRYPT_RETRY_AFTER']
+        self.rounds = app.config['BCRYPT_ROUNDS']
+        self._slots = threading.BoundedSemaphore(self.max_workers + self.max_queue)
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+            self._executor = None
+        app.register_error_handler(PasswordHasherBusy, self._busy_response)
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            # Threads não sobrevivem ao fork: cada worker do gunicorn cria o seu pool
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='bcrypt')
+                self._pid = os.getpid()
+            return self._executor
+
+    def _run(self, function: Callable, *args):
+        slots = self._slots
+        if not slots.acquire(blocking=False):
+            raise PasswordHasherBusy()
+        try:
+            future = self._get_executor().submit(function, *args)
+        except Exception:
+            slots.release()
+            raise
+        # A vaga só é liberada quando o hash termina (ou é cancelado antes de começar):
+        # após um timeout, um bcrypt já em execução continua ocupando a thread do pool
+        future.add_done_callback(lambda _: slots.release())
+        with timing('bcrypt'):
+            try:
+                return future.result(timeout=self.timeout)
+            except FutureTimeoutError:
+                future.cancel()
+                raise PasswordHasherBusy()
+
+    def check(self, password: str, password_hash: str) -> bool:
+        """Verifica a senha contra um hash bcrypt (ou, legado, do werkzeug: scrypt/pbkdf2)"""
+        if password_hash.startswith('$2'):
+            return self._run(bcrypt.checkpw, password.encode('utf-8'), password_hash.encode('utf-8'))
+        return self._run(check_password_hash, password_hash, password)
+
+    def hash(self, password: str) -> str:
+        hashed = self._run(bcrypt.hashpw, password.encode('utf-8'), bcrypt.gensalt(self.rounds))
+        return hashed.decode('utf-8')
+
+    def _busy_response(self, error):
+        if request.endpoint == 'auth.login':
+            flash('Muitas tentativas de login no momento. Aguarde alguns segundos e tente novamente.', 'error')
+            body = render_template('auth/login.html')
+        else:
+            body = render_template('errors/busy.html', status=503, retry_after=self.retry_after,
+                                   message='Servidor ocupado. Tente novamente em instantes.')
+        return body, 503, {'Retry-After': str(self.retry_after)}
+
+
+class LoginThrottle:
+    """Bloqueia IP/email depois de muitas falhas de login dentro de uma janela
+
+    Cada falha consome um token do bucket do IP e do email. O bucket tem
+    `max_*` tokens e se recompõe por inteiro em `window` segundos: sem tokens,
+    novas tentativas são recusadas até o próximo token.
+    """
+
+    def __init__(self, max_per_ip: int = 20, max_per_email: int = 5, window: int = 900):
+        self.max_per_ip = max_per_ip
+        self.max_per_email = max_per_email
+        self.window = window
+        self.buckets: Optional[SharedTokenBuckets] = None
+
+    def init_app(self, app):
+        self.max_per_ip = app.config['LOGIN_MAX_FAILURES_PER_IP']
+        self.max_per_email = app.config['LOGIN_MAX_FAILURES_PER_EMAIL']
+        self.window = app.config['LOGIN_FAILURE_WINDOW']
+        self.buckets = SharedTokenBuckets(app.config['LOGIN_THROTTLE_PATH'], app.config['LOGIN_THROTTLE_SLOTS'])
+
+    def _limits(self, ip: str, email: str):
+        email = (email or '').strip().lower()
+        return ((f'ip:{ip}', self.max_per_ip / self.window, self.max_per_ip),
+                (f'email:{email}', self.max_per_email / self.window, self.max_per_email))
+
+    def retry_after(self, ip: str, email: str) -> Optional[int]:
+        """Segundos até poder tentar de novo, ou None se a tentativa é permitida"""
+        waits = [self.buckets.take(key, rate, burst, cost=0) for key, rate, burst in self._limits(ip, email)]
+        waits = [wait for wait in waits if wait is not None]
+        return max(waits) if waits else None
+
+    def record_failure(self, ip: str, email: str):
+        for key, rate, burst in self._limits(ip, email):
+            self.buckets.take(key, rate, burst)
+
+    def record_success(self, ip: str, email: str):
+        self.buckets.reset(self._limits(ip, email)[1][0])
+
+
+password_hasher = PasswordHasher()
+login_throttle = LoginThrottle()
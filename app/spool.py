@@ -0,0 +1,223 @@
+"""
+Spool local e durável para ingestão assíncrona de submissões.
+
+No modo SUBMISSION_MODE = 'spool', o formulário público grava a submissão já
+validada em um arquivo SQLite (WAL, synchronous=FULL) e redireciona o lead para
+o WhatsApp imediatamente. Uma thread de drenagem em cada worker envia o spool
+ao Supabase em lotes (`FormSubmission.submit_many`), com retry e backoff.
+
+Cada item carrega uma ingest_key única, e a função `submit_form_batch` ignora
+chaves já gravadas. Por isso, reenviar um lote depois de uma queda (entre o
+commit no Supabase e a remoção local) não duplica submissões. Itens em envio
+ficam "alugados" por SPOOL_LEASE_SECONDS; se o worker morrer, o aluguel expira
+e outro worker retoma o item.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class SubmissionSpool:
+    """Fila durável de submissões em SQLite, compartilhada pelos workers do host"""
+
+    def __init__(self):
+        self.path = None
+        self.batch_size = 50
+        self.lease_seconds = 60
+        self.max_attempts = 20
+        self.drain_interval = 1.0
+        self.max_backoff = 300
+        self._local = threading.local()
+        self._drainer = None
+        self._drainer_pid = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """Configura o spool a partir do config da aplicação e inicia a drenagem"""
+        self.path = app.config['SPOOL_PATH']
+        self.batch_size = app.config.get('SPOOL_BATCH_SIZE', self.batch_size)
+        self.lease_seconds = app.config.get('SPOOL_LEASE_SECONDS', self.lease_seconds)
+        self.max_attempts = app.config.get('SPOOL_MAX_ATTEMPTS', self.max_attempts)
+        self.drain_interval = app.config.get('SPOOL_DRAIN_INTERVAL', self.drain_interval)
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._create_schema()
+        self.ensure_drainer()
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Conexão por thread (e por processo, já que o gunicorn faz fork)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=FULL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _create_schema(self):
+        conn = self._connection()
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS submission_spool (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ingest_key TEXT NOT NULL UNIQUE,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                leased_until REAL NOT NULL DEFAULT 0,
+                last_error TEXT,
+                dead INTEGER NOT NULL DEFAULT 0
+            )
+        ''')
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS submission_spool_ready
+                ON submission_spool (dead, next_attempt_at)
+        ''')
+
+    def append(self, submission: Dict[str, Any]) -> str:
+        """Grava a submissão no spool e retorna sua ingest_key
+
+        O commit só retorna depois do fsync, então a submissão sobrevive a uma
+        queda do worker ou do host assim que esta função retorna. Uma ingest_key
+        já presente no spool (reenvio do mesmo formulário) não é gravada de novo.
+        """
+        submission = dict(submission)
+        submission.setdefault('ingest_key', str(uuid.uuid4()))
+        now = time.time()
+        self._connection().execute(
+            'INSERT OR IGNORE INTO submission_spool (ingest_key, payload, created_at, next_attempt_at) VALUES (?, ?, ?, ?)',
+            (submission['ingest_key'], json.dumps(submission), now, now)
+        )
+        self.ensure_drainer()
+        return submission['ingest_key']
+
+    def claim(self, limit: int) -> List[Tuple[int, Dict[str, Any]]]:
+        """Aluga até `limit` itens prontos para envio"""
+        conn = self._connection()
+        now = time.time()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute(
+                '''SELECT id, payload FROM submission_spool
+                    WHERE dead = 0 AND next_attempt_at <= ? AND leased_until <= ?
+                    ORDER BY id LIMIT ?''',
+                (now, now, limit)
+            ).fetchall()
+            if rows:
+                conn.executemany(
+                    'UPDATE submission_spool SET leased_until = ? WHERE id = ?',
+                    [(now + self.lease_seconds, row[0]) for row in rows]
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return [(row[0], json.loads(row[1])) for row in rows]
+
+    def ack(self, item_ids: List[int]):
+        """Remove itens já gravados no Supabase"""
+        if item_ids:
+            self._connection().executemany(
+                'DELETE FROM submission_spool WHERE id = ?', [(item_id,) for item_id in item_ids]
+            )
+
+    def retry(self, item_id: int, error: str):
+        """Devolve o item ao spool com backoff exponencial; após SPOOL_MAX_ATTEMPTS o item é marcado como morto"""
+        conn = self._connection()
+        row = conn.execute('SELECT attempts FROM submission_spool WHERE id = ?', (item_id,)).fetchone()
+        if not row:
+            return
+        attempts = row[0] + 1
+        delay = min(2 ** attempts, self.max_backoff)
+        conn.execute(
+            '''UPDATE submission_spool
+                  SET attempts = ?, next_attempt_at = ?, leased_until = 0, last_error = ?, dead = ?
+                WHERE id = ?''',
+            (attempts, time.time() + delay, error, 1 if attempts >= self.max_attempts else 0, item_id)
+        )
+
+    def drain_once(self) -> int:
+        """Envia um lote ao Supabase; retorna quantos itens foram processados"""
+        from app.models import FormSubmission
+
+        batch = self.claim(self.batch_size)
+        if not batch:
+            return 0
+
+        results = FormSubmission.submit_many([payload for _, payload in batch])
+        if results is None:
+            for item_id, _ in batch:
+                self.retry(item_id, 'Falha ao enviar lote ao Supabase')
+            return len(batch)
+
+        by_key = {result.get('ingest_key'): result for result in results}
+        done = []
+        for item_id, payload in batch:
+            result = by_key.get(payload['ingest_key'])
+            if result and not result.get('error'):
+                done.append(item_id)
+            else:
+                self.retry(item_id, result.get('error') if result else 'Sem resultado para o item')
+        self.ack(done)
+        return len(batch)
+
+    def _drain_forever(self):
+        while not self._stop.is_set():
+            try:
+                processed = self.drain_once()
+            except Exception:
+                logger.exception("Erro ao drenar spool de submissões")
+                processed = 0
+            if processed < self.batch_size:
+                self._stop.wait(self.drain_interval)
+
+    def ensure_drainer(self):
+        """Garante uma thread de drenagem viva neste processo (inclusive após fork)"""
+        if not self.enabled:
+            return
+        if self._drainer_pid == os.getpid() and self._drainer and self._drainer.is_alive():
+            return
+        with self._lock:
+            if self._drainer_pid == os.getpid() and self._drainer and self._drainer.is_alive():
+                return
+            self._stop = threading.Event()
+            self._drainer = threading.Thread(target=self._drain_forever, name='submission-spool-drainer', daemon=True)
+            self._drainer_pid = os.getpid()
+            self._drainer.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> Dict[str, Any]:
+        """Métricas do spool: profundidade, itens mortos e atraso do item mais antigo"""
+        now = time.time()
+        depth, oldest, retrying = self._connection().execute(
+            '''SELECT COUNT(*), MIN(created_at), SUM(CASE WHEN attempts > 0 THEN 1 ELSE 0 END)
+                 FROM submission_spool WHERE dead = 0'''
+        ).fetchone()
+        dead = self._connection().execute(
+            'SELECT COUNT(*) FROM submission_spool WHERE dead = 1'
+        ).fetchone()[0]
+        return {
+            'depth': depth,
+            'retrying': retrying or 0,
+            'dead': dead,
+            'lag_seconds': round(now - oldest, 3) if oldest else 0.0
+        }
+
+
+spool = SubmissionSpool()
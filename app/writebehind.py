@@ -0,0 +1,116 @@
+"""
+Gravação adiada (write-behind) de colunas não críticas.
+
+Atualizações como `users.last_login` não precisam acontecer dentro do request:
+`write_behind.update(table, row_id, values)` guarda o valor na memória do
+worker, juntando várias atualizações da mesma linha, e uma thread grava tudo
+em lote a cada WRITE_BEHIND_INTERVAL segundos (e ao encerrar o worker).
+
+Cada tabela registrada tem uma função RPC de lote (database/migrations/004_batch_updates.sql)
+que recebe [{id, coluna: valor, ...}]. Se o processo morrer sem encerrar, as
+atualizações pendentes se perdem: use apenas para dados que toleram isso.
+"""
+import atexit
+import logging
+import os
+import threading
+from typing import Any, Dict, Tuple
+
+from app.database import db
+
+logger = logging.getLogger(__name__)
+
+# Tabela -> função RPC que aplica o lote
+BATCH_FUNCTIONS = {
+    'users': 'apply_user_updates',
+}
+
+
+class WriteBehindBuffer:
+    """Acumula atualizações por (tabela, id) e grava em lote em segundo plano"""
+
+    def __init__(self, interval: float = 5.0, max_rows: int = 500):
+        self.interval = interval
+        self.max_rows = max_rows
+        self._pending: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._flusher = None
+        self._flusher_pid = None
+
+    def init_app(self, app):
+        self.interval = app.config.get('WRITE_BEHIND_INTERVAL', self.interval)
+        self.max_rows = app.config.get('WRITE_BEHIND_MAX_ROWS', self.max_rows)
+
+    def update(self, table: str, row_id: str, values: Dict[str, Any]):
+        """Agenda a atualização; valores mais novos da mesma coluna substituem os anteriores"""
+        if table not in BATCH_FUNCTIONS:
+            raise ValueError(f"Tabela sem função de lote: {table}")
+        self.ensure_flusher()
+        with self._lock:
+            self._pending.setdefault((table, str(row_id)), {}).update(values)
+            full = len(self._pending) >= self.max_rows
+        if full:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Grava tudo o que está pendente; devolve o número de linhas enviadas"""
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        if not pending:
+            return 0
+
+        batches: Dict[str, list] = {}
+        for (table, row_id), values in pending.items():
+            batches.setdefault(table, []).append(dict(values, id=row_id))
+
+        sent = 0
+        for table, rows in batches.items():
+            try:
+                db.rpc(BATCH_FUNCTIONS[table], {'p_updates': rows}).execute()
+                sent += len(rows)
+            except Exception:
+                logger.exception("Erro ao gravar atualizações adiadas em %s", table)
+                self._requeue(table, rows)
+        return sent
+
+    def _requeue(self, table: str, rows: list):
+        # Devolve ao buffer sem sobrescrever valores que chegaram depois
+        with self._lock:
+            for row in rows:
+                values = {k: v for k, v in row.items() if k != 'id'}
+                current = self._pending.setdefault((table, row['id']), {})
+                for column, value in values.items():
+                    current.setdefault(column, value)
+
+    def _flush_forever(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            try:
+                self.flush()
+            except Exception:
+                logger.exception("Erro ao gravar atualizações adiadas")
+
+    def ensure_flusher(self):
+        """Garante uma thread de gravação viva neste processo (inclusive após fork)"""
+        if self._flusher_pid == os.getpid() and self._flusher and self._flusher.is_alive():
+            return
+        with self._lock:
+            if self._flusher_pid == os.getpid() and self._flusher and self._flusher.is_alive():
+                return
+            if self._flusher_pid != os.getpid():
+                # Pendências herdadas do processo pai (fork) pertencem a ele
+                self._pending = {}
+            self._flusher = threading.Thread(target=self._flush_forever, name='write-behind-flusher', daemon=True)
+            self._flusher_pid = os.getpid()
+            self._flusher.start()
+
+    def __len__(self):
+        return len(self._pending)
+
+
+write_behind = WriteBehindBuffer()
+
+# Último lote ao encerrar o processo (gunicorn também chama flush no worker_exit)
+atexit.register(write_behind.flush)
@@ -0,0 +1,15 @@
+"""
+ASGI config for FormApp.
+
+It exposes the ASGI callable as a module-level variable named ``application``.
+Serve with an ASGI worker, e.g.:
+
+    gunicorn -c gunicorn_config.py -k uvicorn.workers.UvicornWorker asgi:application
+"""
+
+from app import create_app
+from app.asgi import create_asgi_app
+from config import Config
+
+# A aplicação Flask atende as rotas que não têm handler assíncrono
+application = create_asgi_app(create_app(Config))
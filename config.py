@@ -13,11 +13,142 @@ class Config:
     # Supabase
     SUPABASE_URL = os.getenv('SUPABASE_URL')
     SUPABASE_KEY = os.getenv('SUPABASE_KEY')
+    # Pool HTTP do cliente Supabase, criado por worker no post_fork do gunicorn
+    SUPABASE_HTTP2 = os.getenv('SUPABASE_HTTP2', 'True') == 'True'
+    SUPABASE_HTTP_MAX_CONNECTIONS = int(os.getenv('SUPABASE_HTTP_MAX_CONNECTIONS', '20'))
+    SUPABASE_HTTP_MAX_KEEPALIVE = int(os.getenv('SUPABASE_HTTP_MAX_KEEPALIVE', '10'))
+    SUPABASE_HTTP_KEEPALIVE_EXPIRY = float(os.getenv('SUPABASE_HTTP_KEEPALIVE_EXPIRY', '60'))
+    SUPABASE_CONNECT_TIMEOUT = float(os.getenv('SUPABASE_CONNECT_TIMEOUT', '5'))
+    SUPABASE_READ_TIMEOUT = float(os.getenv('SUPABASE_READ_TIMEOUT', '30'))
+    # Conexões do cliente assíncrono no modo ASGI (asgi.py), que atende muitos requests por worker
+    SUPABASE_ASYNC_MAX_CONNECTIONS = int(os.getenv('SUPABASE_ASYNC_MAX_CONNECTIONS', '100'))
+    # Abrir a conexão com o banco no boot do worker, antes do primeiro request
+    DATABASE_WARMUP = os.getenv('DATABASE_WARMUP', 'True') == 'True'
+    
+    # Backend de dados: 'supabase' (PostgREST via HTTPS), 'postgres' (conexão direta com pool)
+    # ou 'memory' (banco em memória para testes e benchmarks, sem rede)
+    DATABASE_BACKEND = os.getenv('DATABASE_BACKEND', 'supabase')
+    DATABASE_URL = os.getenv('DATABASE_URL')
+    DATABASE_POOL_MIN_SIZE = int(os.getenv('DATABASE_POOL_MIN_SIZE', '1'))
+    DATABASE_POOL_MAX_SIZE = int(os.getenv('DATABASE_POOL_MAX_SIZE', '10'))
+    # Latência simulada por ida ao banco no backend 'memory'
+    MEMORY_DB_LATENCY_MS = float(os.getenv('MEMORY_DB_LATENCY_MS', '0'))
     
     # Application
     APP_NAME = os.getenv('APP_NAME', 'FormApp')
     BASE_URL = os.getenv('BASE_URL', 'http://localhost:5000')
     
+    # Ingestão de submissões: 'direct' grava no Supabase durante o request,
+    # 'spool' grava em um spool local durável e envia em segundo plano
+    SUBMISSION_MODE = os.getenv('SUBMISSION_MODE', 'direct')
+    SPOOL_PATH = os.getenv('SPOOL_PATH', 'instance/submission_spool.db')
+    SPOOL_BATCH_SIZE = int(os.getenv('SPOOL_BATCH_SIZE', '50'))
+    SPOOL_LEASE_SECONDS = int(os.getenv('SPOOL_LEASE_SECONDS', '60'))
+    SPOOL_MAX_ATTEMPTS = int(os.getenv('SPOOL_MAX_ATTEMPTS', '20'))
+    SPOOL_DRAIN_INTERVAL = float(os.getenv('SPOOL_DRAIN_INTERVAL', '1.0'))
+    
+    # Barramento de invalidação dos caches entre workers (app/events.py): 'unix'
+    # (sockets em INVALIDATION_SOCKET_DIR, workers do mesmo host), 'postgres'
+    # (LISTEN/NOTIFY, várias instâncias) ou 'local' (só o próprio processo)
+    INVALIDATION_BACKEND = os.getenv('INVALIDATION_BACKEND', 'unix' if os.name == 'posix' else 'local')
+    INVALIDATION_SOCKET_DIR = os.getenv('INVALIDATION_SOCKET_DIR', 'instance/events')
+    INVALIDATION_DATABASE_URL = os.getenv('INVALIDATION_DATABASE_URL')
+    INVALIDATION_CHANNEL = os.getenv('INVALIDATION_CHANNEL', 'formapp_invalidation')
+    
+    # Cache por worker dos formulários públicos (tenant, formulário, campos e configurações).
+    # Com 'postgres', as alterações chegam a todas as instâncias e o TTL padrão é longo;
+    # com 'unix'/'local', o TTL limita o atraso nas outras instâncias
+    FORM_SNAPSHOT_TTL = int(os.getenv('FORM_SNAPSHOT_TTL', '3600' if INVALIDATION_BACKEND == 'postgres' else '300'))
+    FORM_SNAPSHOT_MAXSIZE = int(os.getenv('FORM_SNAPSHOT_MAXSIZE', '1024'))
+    
+    # Token buckets dos POSTs públicos (/f/...), por IP e por tenant, compartilhados
+    # entre os workers do host via arquivo mmap (app/ratelimit.py)
+    RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'True') == 'True'
+    RATE_LIMIT_PATH = os.getenv('RATE_LIMIT_PATH', 'instance/rate_limit.bin')
+    RATE_LIMIT_SLOTS = int(os.getenv('RATE_LIMIT_SLOTS', '65536'))
+    FORM_RATE_LIMIT_IP_PER_MINUTE = float(os.getenv('FORM_RATE_LIMIT_IP_PER_MINUTE', '10'))
+    FORM_RATE_LIMIT_IP_BURST = float(os.getenv('FORM_RATE_LIMIT_IP_BURST', '10'))
+    FORM_RATE_LIMIT_TENANT_PER_MINUTE = float(os.getenv('FORM_RATE_LIMIT_TENANT_PER_MINUTE', '600'))
+    FORM_RATE_LIMIT_TENANT_BURST = float(os.getenv('FORM_RATE_LIMIT_TENANT_BURST', '200'))
+    # Controle de admissão por worker (app/admission.py): acima dos limites, listagens do
+    # admin e /api/* recebem 503 + Retry-After; o formulário público e o login nunca.
+    # ADMISSION_LOW_PRIORITY_MAX_IN_FLIGHT deve ficar abaixo de `threads` (gunicorn_config.py);
+    # no modo ASGI, aumente os dois limites
+    ADMISSION_ENABLED = os.getenv('ADMISSION_ENABLED', 'True') == 'True'
+    ADMISSION_MAX_IN_FLIGHT = int(os.getenv('ADMISSION_MAX_IN_FLIGHT', '100'))
+    ADMISSION_LOW_PRIORITY_MAX_IN_FLIGHT = int(os.getenv('ADMISSION_LOW_PRIORITY_MAX_IN_FLIGHT', '3'))
+    ADMISSION_DB_LATENCY_MS = float(os.getenv('ADMISSION_DB_LATENCY_MS', '1000'))
+    ADMISSION_LATENCY_DECAY = float(os.getenv('ADMISSION_LATENCY_DECAY', '10'))
+    ADMISSION_RETRY_AFTER = int(os.getenv('ADMISSION_RETRY_AFTER', '5'))
+    
+    # Proxies reversos confiáveis na frente da aplicação (ex.: 1 no Render): o IP do
+    # cliente passa a vir do X-Forwarded-For, para os limites por IP. No modo ASGI,
+    # deixe 0 e use FORWARDED_ALLOW_IPS do uvicorn
+    PROXY_FIX_X_FOR = int(os.getenv('PROXY_FIX_X_FOR', '0'))
+    
+    # Tokens de submissão já processados (reenvios do mesmo formulário não vão ao banco)
+    SUBMISSION_TOKEN_TTL = int(os.getenv('SUBMISSION_TOKEN_TTL', '3600'))
+    SUBMISSION_TOKEN_MAXSIZE = int(os.getenv('SUBMISSION_TOKEN_MAXSIZE', '10000'))
+    
+    # Cache por worker dos usuários carregados a cada request pelo Flask-Login
+    USER_CACHE_TTL = int(os.getenv('USER_CACHE_TTL', '300' if INVALIDATION_BACKEND == 'postgres' else '30'))
+    USER_CACHE_MAXSIZE = int(os.getenv('USER_CACHE_MAXSIZE', '4096'))
+    
+    # Gravação adiada de colunas não críticas (ex.: last_login), em lote a cada intervalo
+    WRITE_BEHIND_INTERVAL = float(os.getenv('WRITE_BEHIND_INTERVAL', '5'))
+    WRITE_BEHIND_MAX_ROWS = int(os.getenv('WRITE_BEHIND_MAX_ROWS', '500'))
+    
+    # Threads por worker para consultas independentes em paralelo (app/concurrency.py); 0 desliga
+    CONCURRENCY_MAX_WORKERS = int(os.getenv('CONCURRENCY_MAX_WORKERS', '8'))
+    
+    # Estatísticas do dashboard lidas de contadores mantidos por triggers; exige a migração
+    # opcional database/migrations/optional/tenant_stats_counters.sql
+    STATS_USE_COUNTERS = os.getenv('STATS_USE_COUNTERS', 'False') == 'True'
+    
+    # Itens por página nas listagens do painel (paginação por cursor)
+    PAGE_SIZE = int(os.getenv('PAGE_SIZE', '50'))
+    
+    # Submissões buscadas por lote na exportação CSV/NDJSON
+    EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '200'))
+    
+    # Logging (app/logs.py): nível (padrão DEBUG com DEBUG=True, senão INFO), formato 'json' ou 'text'
+    # e tamanho da fila; a escrita acontece fora da thread do request
+    LOG_LEVEL = os.getenv('LOG_LEVEL')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', '10000'))
+    
+    # Compressão das respostas (app/compression.py); brotli se o pacote estiver instalado
+    COMPRESSION_ENABLED = os.getenv('COMPRESSION_ENABLED', 'True') == 'True'
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', '500'))
+    COMPRESSION_GZIP_LEVEL = int(os.getenv('COMPRESSION_GZIP_LEVEL', '6'))
+    COMPRESSION_BROTLI_QUALITY = int(os.getenv('COMPRESSION_BROTLI_QUALITY', '5'))
+    # Segundos em que o navegador reutiliza /api/stats sem perguntar ao servidor
+    STATS_MAX_AGE = int(os.getenv('STATS_MAX_AGE', '10'))
+    
+    # Instrumentação: header Server-Timing e log JSON de requests acima de SLOW_REQUEST_MS
+    SERVER_TIMING = os.getenv('SERVER_TIMING', 'True') == 'True'
+    SLOW_REQUEST_MS = int(os.getenv('SLOW_REQUEST_MS', '500'))
+    
+    # Endpoint /metrics (Prometheus): exige "Authorization: Bearer <METRICS_TOKEN>";
+    # sem token configurado, responde 404 (exceto com DEBUG)
+    METRICS_TOKEN = os.getenv('METRICS_TOKEN')
+    
+    # bcrypt em pool limitado por worker (app/security.py); acima de
+    # BCRYPT_MAX_WORKERS + BCRYPT_MAX_QUEUE logins simultâneos, responde 503 na hora
+    BCRYPT_ROUNDS = int(os.getenv('BCRYPT_ROUNDS', '12'))
+    BCRYPT_MAX_WORKERS = int(os.getenv('BCRYPT_MAX_WORKERS', '1'))
+    BCRYPT_MAX_QUEUE = int(os.getenv('BCRYPT_MAX_QUEUE', '1'))
+    BCRYPT_TIMEOUT = float(os.getenv('BCRYPT_TIMEOUT', '10'))
+    BCRYPT_RETRY_AFTER = int(os.getenv('BCRYPT_RETRY_AFTER', '2'))
+    
+    # Bloqueio de login após falhas seguidas (por IP e por email, na janela em segundos).
+    # Os contadores são do host inteiro (arquivo mmap compartilhado entre os workers)
+    LOGIN_MAX_FAILURES_PER_IP = int(os.getenv('LOGIN_MAX_FAILURES_PER_IP', '20'))
+    LOGIN_MAX_FAILURES_PER_EMAIL = int(os.getenv('LOGIN_MAX_FAILURES_PER_EMAIL', '5'))
+    LOGIN_FAILURE_WINDOW = int(os.getenv('LOGIN_FAILURE_WINDOW', '900'))
+    LOGIN_THROTTLE_PATH = os.getenv('LOGIN_THROTTLE_PATH', 'instance/login_throttle.bin')
+    LOGIN_THROTTLE_SLOTS = int(os.getenv('LOGIN_THROTTLE_SLOTS', '16384'))
+    
     # Session
     SESSION_COOKIE_SECURE = False  # True em produção com HTTPS
     SESSION_COOKIE_HTTPONLY = True
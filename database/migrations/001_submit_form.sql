@@ -0,0 +1,55 @@
+-- Ingestão de submissões em uma única chamada (db.rpc('submit_form', ...)).
+--
+-- Faz, dentro de uma única transação:
+--   1. busca ou cria o lead (tenant_id, phone)
+--   2. cria a submissão já como 'completed'
+--   3. grava todas as respostas
+--   4. marca o envio para o WhatsApp
+--
+-- p_answers é um array JSON: [{"field_id": "<uuid>", "response_value": "..."}, ...]
+
+CREATE OR REPLACE FUNCTION public.submit_form(
+  p_tenant_id uuid,
+  p_form_id uuid,
+  p_phone text,
+  p_email text,
+  p_name text,
+  p_answers jsonb DEFAULT '[]'::jsonb,
+  p_whatsapp_sent boolean DEFAULT false
+) RETURNS jsonb
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_now timestamp with time zone := now();
+  v_lead_id uuid;
+  v_submission_id uuid;
+BEGIN
+  -- Serializa submissões concorrentes do mesmo telefone para não duplicar o lead
+  PERFORM pg_advisory_xact_lock(hashtext(p_tenant_id::text || ':' || coalesce(p_phone, '')));
+
+  SELECT id INTO v_lead_id
+    FROM public.leads
+   WHERE tenant_id = p_tenant_id AND phone = p_phone
+   LIMIT 1;
+
+  IF v_lead_id IS NULL THEN
+    INSERT INTO public.leads (tenant_id, phone, email, name)
+    VALUES (p_tenant_id, p_phone, p_email, p_name)
+    RETURNING id INTO v_lead_id;
+  END IF;
+
+  INSERT INTO public.form_submissions (
+    form_id, lead_id, tenant_id, status, completed_at, whatsapp_sent, whatsapp_sent_at
+  ) VALUES (
+    p_form_id, v_lead_id, p_tenant_id, 'completed', v_now,
+    p_whatsapp_sent, CASE WHEN p_whatsapp_sent THEN v_now END
+  )
+  RETURNING id INTO v_submission_id;
+
+  INSERT INTO public.form_responses (submission_id, field_id, response_value)
+  SELECT v_submission_id, (answer->>'field_id')::uuid, answer->>'response_value'
+    FROM jsonb_array_elements(coalesce(p_answers, '[]'::jsonb)) AS answer;
+
+  RETURN jsonb_build_object('id', v_submission_id, 'lead_id', v_lead_id);
+END;
+$$;
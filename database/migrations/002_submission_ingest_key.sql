@@ -0,0 +1,120 @@
+-- Chave de idempotência das submissões e ingestão em lote.
+--
+-- Cada submissão pode carregar uma ingest_key gerada pela aplicação. Reenviar a
+-- mesma chave (replay do spool após uma queda, retry do cliente) devolve a
+-- submissão já existente em vez de criar outra, inclusive quando os dois envios
+-- chegam ao mesmo tempo. submit_form_batch usa submit_form e herda o mesmo
+-- comportamento.
+
+ALTER TABLE public.form_submissions
+  ADD COLUMN IF NOT EXISTS ingest_key uuid UNIQUE;
+
+DROP FUNCTION IF EXISTS public.submit_form(uuid, uuid, text, text, text, jsonb, boolean);
+
+CREATE OR REPLACE FUNCTION public.submit_form(
+  p_tenant_id uuid,
+  p_form_id uuid,
+  p_phone text,
+  p_email text,
+  p_name text,
+  p_answers jsonb DEFAULT '[]'::jsonb,
+  p_whatsapp_sent boolean DEFAULT false,
+  p_ingest_key uuid DEFAULT NULL,
+  p_submitted_at timestamp with time zone DEFAULT NULL
+) RETURNS jsonb
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_now timestamp with time zone := coalesce(p_submitted_at, now());
+  v_lead_id uuid;
+  v_submission_id uuid;
+BEGIN
+  IF p_ingest_key IS NOT NULL THEN
+    -- Serializa reenvios simultâneos da mesma chave (duplo clique, retry em outro
+    -- worker): a consulta abaixo roda depois do lock e vê a submissão do primeiro
+    PERFORM pg_advisory_xact_lock(hashtext('ingest_key:' || p_ingest_key::text));
+
+    SELECT id, lead_id INTO v_submission_id, v_lead_id
+      FROM public.form_submissions
+     WHERE ingest_key = p_ingest_key;
+
+    IF v_submission_id IS NOT NULL THEN
+      RETURN jsonb_build_object('id', v_submission_id, 'lead_id', v_lead_id, 'duplicate', true);
+    END IF;
+  END IF;
+
+  -- Serializa submissões concorrentes do mesmo telefone para não duplicar o lead
+  PERFORM pg_advisory_xact_lock(hashtext(p_tenant_id::text || ':' || coalesce(p_phone, '')));
+
+  SELECT id INTO v_lead_id
+    FROM public.leads
+   WHERE tenant_id = p_tenant_id AND phone = p_phone
+   LIMIT 1;
+
+  IF v_lead_id IS NULL THEN
+    INSERT INTO public.leads (tenant_id, phone, email, name)
+    VALUES (p_tenant_id, p_phone, p_email, p_name)
+    RETURNING id INTO v_lead_id;
+  END IF;
+
+  INSERT INTO public.form_submissions (
+    form_id, lead_id, tenant_id, status, started_at, completed_at,
+    whatsapp_sent, whatsapp_sent_at, ingest_key
+  ) VALUES (
+    p_form_id, v_lead_id, p_tenant_id, 'completed', v_now, v_now,
+    p_whatsapp_sent, CASE WHEN p_whatsapp_sent THEN v_now END, p_ingest_key
+  )
+  RETURNING id INTO v_submission_id;
+
+  INSERT INTO public.form_responses (submission_id, field_id, response_value)
+  SELECT v_submission_id, (answer->>'field_id')::uuid, answer->>'response_value'
+    FROM jsonb_array_elements(coalesce(p_answers, '[]'::jsonb)) AS answer;
+
+  RETURN jsonb_build_object('id', v_submission_id, 'lead_id', v_lead_id, 'duplicate', false);
+END;
+$$;
+
+-- Ingestão em lote usada pelo drainer do spool local (app/spool.py).
+--
+-- p_submissions é um array JSON de objetos com as mesmas chaves dos parâmetros
+-- de submit_form (sem o prefixo p_). Cada item roda em sua própria
+-- subtransação: um item inválido não derruba o lote inteiro. O retorno tem uma
+-- entrada por item, na mesma ordem, com 'ingest_key' e 'id' ou 'error'.
+
+CREATE OR REPLACE FUNCTION public.submit_form_batch(
+  p_submissions jsonb
+) RETURNS jsonb
+LANGUAGE plpgsql
+AS $$
+DECLARE
+  v_item jsonb;
+  v_result jsonb;
+  v_results jsonb := '[]'::jsonb;
+BEGIN
+  FOR v_item IN SELECT * FROM jsonb_array_elements(coalesce(p_submissions, '[]'::jsonb))
+  LOOP
+    BEGIN
+      v_result := public.submit_form(
+        (v_item->>'tenant_id')::uuid,
+        (v_item->>'form_id')::uuid,
+        v_item->>'phone',
+        v_item->>'email',
+        v_item->>'name',
+        coalesce(v_item->'answers', '[]'::jsonb),
+        coalesce((v_item->>'whatsapp_sent')::boolean, false),
+        (v_item->>'ingest_key')::uuid,
+        (v_item->>'submitted_at')::timestamp with time zone
+      );
+      v_results := v_results || jsonb_build_array(
+        v_result || jsonb_build_object('ingest_key', v_item->>'ingest_key')
+      );
+    EXCEPTION WHEN OTHERS THEN
+      v_results := v_results || jsonb_build_array(
+        jsonb_build_object('ingest_key', v_item->>'ingest_key', 'error', SQLERRM)
+      );
+    END;
+  END LOOP;
+
+  RETURN v_results;
+END;
+$$;
@@ -0,0 +1,33 @@
+-- Estatísticas do dashboard em uma única consulta.
+--
+-- tenant_submission_stats: agrega total, completas, incompletas e novos leads
+-- em uma só ida ao banco (substitui as quatro consultas count='exact').
+--
+-- Os contadores mantidos por triggers (STATS_USE_COUNTERS) ficam em uma
+-- migração opcional: database/migrations/optional/tenant_stats_counters.sql.
+
+CREATE INDEX IF NOT EXISTS form_submissions_tenant_status_idx
+  ON public.form_submissions (tenant_id, status);
+
+CREATE INDEX IF NOT EXISTS leads_tenant_created_at_idx
+  ON public.leads (tenant_id, created_at);
+
+CREATE OR REPLACE FUNCTION public.tenant_submission_stats(
+  p_tenant_id uuid,
+  p_since timestamp with time zone
+) RETURNS jsonb
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT jsonb_build_object(
+    'total', count(*),
+    'completed', count(*) FILTER (WHERE s.status = 'completed'),
+    'incomplete', count(*) FILTER (WHERE s.status = 'incomplete'),
+    'new_leads', (
+      SELECT count(*) FROM public.leads l
+       WHERE l.tenant_id = p_tenant_id AND l.created_at >= p_since
+    )
+  )
+  FROM public.form_submissions s
+  WHERE s.tenant_id = p_tenant_id;
+$$;
@@ -0,0 +1,21 @@
+-- Atualizações não críticas aplicadas em lote (app/writebehind.py).
+--
+-- apply_user_updates: recebe [{id, last_login}, ...] acumulados por um worker
+-- e grava todos em um único UPDATE. last_login nunca volta no tempo, então
+-- lotes de workers diferentes podem chegar em qualquer ordem.
+
+CREATE OR REPLACE FUNCTION public.apply_user_updates(
+  p_updates jsonb
+) RETURNS integer
+LANGUAGE sql
+AS $$
+  WITH updated AS (
+    UPDATE public.users AS u
+       SET last_login = GREATEST(u.last_login, x.last_login)
+      FROM jsonb_to_recordset(p_updates) AS x(id uuid, last_login timestamp with time zone)
+     WHERE u.id = x.id
+       AND x.last_login IS NOT NULL
+    RETURNING 1
+  )
+  SELECT count(*)::integer FROM updated;
+$$;
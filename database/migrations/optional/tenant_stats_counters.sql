@@ -0,0 +1,156 @@
+-- Contadores de estatísticas do dashboard mantidos por triggers (opcional).
+--
+-- Aplique só junto com STATS_USE_COUNTERS=True, depois de 003_tenant_stats.sql.
+-- tenant_submission_stats_counters devolve a mesma resposta de
+-- tenant_submission_stats, lida de contadores (custo O(1), independente do
+-- volume do tenant). Novos leads são contados por dia, então a janela de 7 dias
+-- começa à meia-noite do dia de p_since.
+--
+-- Custo: cada submissão e cada lead novo atualizam a linha de contadores do
+-- tenant, o que serializa as gravações concorrentes de um mesmo tenant (picos
+-- de campanha). Vale a pena quando o dashboard de tenants com muitas submissões
+-- é o gargalo. Para desativar, volte STATS_USE_COUNTERS=False e rode:
+--
+--   DROP TRIGGER IF EXISTS tenant_stats_submission_insert_delete ON public.form_submissions;
+--   DROP TRIGGER IF EXISTS tenant_stats_submission_status ON public.form_submissions;
+--   DROP TRIGGER IF EXISTS tenant_stats_lead ON public.leads;
+
+-- Contadores incrementais ----------------------------------------------------
+
+CREATE TABLE IF NOT EXISTS public.tenant_stats_counters (
+  tenant_id uuid NOT NULL,
+  total bigint NOT NULL DEFAULT 0,
+  completed bigint NOT NULL DEFAULT 0,
+  incomplete bigint NOT NULL DEFAULT 0,
+  updated_at timestamp with time zone DEFAULT now(),
+  CONSTRAINT tenant_stats_counters_pkey PRIMARY KEY (tenant_id),
+  CONSTRAINT tenant_stats_counters_tenant_id_fkey FOREIGN KEY (tenant_id) REFERENCES public.tenants(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS public.tenant_daily_leads (
+  tenant_id uuid NOT NULL,
+  day date NOT NULL,
+  leads bigint NOT NULL DEFAULT 0,
+  CONSTRAINT tenant_daily_leads_pkey PRIMARY KEY (tenant_id, day),
+  CONSTRAINT tenant_daily_leads_tenant_id_fkey FOREIGN KEY (tenant_id) REFERENCES public.tenants(id) ON DELETE CASCADE
+);
+
+CREATE OR REPLACE FUNCTION public.tenant_stats_bump(
+  p_tenant_id uuid,
+  p_status text,
+  p_delta integer
+) RETURNS void
+LANGUAGE sql
+AS $$
+  INSERT INTO public.tenant_stats_counters AS c (tenant_id, total, completed, incomplete)
+  VALUES (
+    p_tenant_id,
+    p_delta,
+    CASE WHEN p_status = 'completed' THEN p_delta ELSE 0 END,
+    CASE WHEN p_status = 'incomplete' THEN p_delta ELSE 0 END
+  )
+  ON CONFLICT (tenant_id) DO UPDATE SET
+    total = c.total + EXCLUDED.total,
+    completed = c.completed + EXCLUDED.completed,
+    incomplete = c.incomplete + EXCLUDED.incomplete,
+    updated_at = now();
+$$;
+
+CREATE OR REPLACE FUNCTION public.tenant_stats_track_submission()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP IN ('UPDATE', 'DELETE') THEN
+    PERFORM public.tenant_stats_bump(OLD.tenant_id, OLD.status, -1);
+  END IF;
+  IF TG_OP IN ('INSERT', 'UPDATE') THEN
+    PERFORM public.tenant_stats_bump(NEW.tenant_id, NEW.status, 1);
+  END IF;
+  RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION public.tenant_stats_track_lead()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+  IF TG_OP = 'DELETE' THEN
+    UPDATE public.tenant_daily_leads
+       SET leads = leads - 1
+     WHERE tenant_id = OLD.tenant_id AND day = OLD.created_at::date;
+    RETURN NULL;
+  END IF;
+
+  INSERT INTO public.tenant_daily_leads AS d (tenant_id, day, leads)
+  VALUES (NEW.tenant_id, coalesce(NEW.created_at, now())::date, 1)
+  ON CONFLICT (tenant_id, day) DO UPDATE SET leads = d.leads + 1;
+  RETURN NULL;
+END;
+$$;
+
+-- Triggers e carga inicial dos contadores em uma transação explícita: o lock
+-- impede que escritas concorrentes entrem entre a ativação dos triggers e a
+-- contagem (no psql ou no SQL editor do Supabase, em autocommit, LOCK TABLE
+-- fora de BEGIN/COMMIT falharia).
+BEGIN;
+
+LOCK TABLE public.form_submissions, public.leads IN SHARE MODE;
+
+DROP TRIGGER IF EXISTS tenant_stats_submission_insert_delete ON public.form_submissions;
+CREATE TRIGGER tenant_stats_submission_insert_delete
+  AFTER INSERT OR DELETE ON public.form_submissions
+  FOR EACH ROW EXECUTE FUNCTION public.tenant_stats_track_submission();
+
+DROP TRIGGER IF EXISTS tenant_stats_submission_status ON public.form_submissions;
+CREATE TRIGGER tenant_stats_submission_status
+  AFTER UPDATE OF status, tenant_id ON public.form_submissions
+  FOR EACH ROW
+  WHEN (OLD.status IS DISTINCT FROM NEW.status OR OLD.tenant_id IS DISTINCT FROM NEW.tenant_id)
+  EXECUTE FUNCTION public.tenant_stats_track_submission();
+
+DROP TRIGGER IF EXISTS tenant_stats_lead ON public.leads;
+CREATE TRIGGER tenant_stats_lead
+  AFTER INSERT OR DELETE ON public.leads
+  FOR EACH ROW EXECUTE FUNCTION public.tenant_stats_track_lead();
+
+INSERT INTO public.tenant_stats_counters (tenant_id, total, completed, incomplete)
+SELECT tenant_id,
+       count(*),
+       count(*) FILTER (WHERE status = 'completed'),
+       count(*) FILTER (WHERE status = 'incomplete')
+  FROM public.form_submissions
+ GROUP BY tenant_id
+ON CONFLICT (tenant_id) DO UPDATE SET
+  total = EXCLUDED.total,
+  completed = EXCLUDED.completed,
+  incomplete = EXCLUDED.incomplete,
+  updated_at = now();
+
+INSERT INTO public.tenant_daily_leads (tenant_id, day, leads)
+SELECT tenant_id, created_at::date, count(*)
+  FROM public.leads
+ WHERE created_at IS NOT NULL
+ GROUP BY tenant_id, created_at::date
+ON CONFLICT (tenant_id, day) DO UPDATE SET leads = EXCLUDED.leads;
+
+COMMIT;
+
+CREATE OR REPLACE FUNCTION public.tenant_submission_stats_counters(
+  p_tenant_id uuid,
+  p_since timestamp with time zone
+) RETURNS jsonb
+LANGUAGE sql
+STABLE
+AS $$
+  SELECT jsonb_build_object(
+    'total', coalesce((SELECT total FROM public.tenant_stats_counters WHERE tenant_id = p_tenant_id), 0),
+    'completed', coalesce((SELECT completed FROM public.tenant_stats_counters WHERE tenant_id = p_tenant_id), 0),
+    'incomplete', coalesce((SELECT incomplete FROM public.tenant_stats_counters WHERE tenant_id = p_tenant_id), 0),
+    'new_leads', coalesce((
+      SELECT sum(leads) FROM public.tenant_daily_leads
+       WHERE tenant_id = p_tenant_id AND day >= p_since::date
+    ), 0)
+  );
+$$;
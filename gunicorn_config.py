@@ -1,6 +1,11 @@
+import glob
 import multiprocessing
 import os
 
+# Diretório compartilhado das métricas dos workers (app/metrics.py); precisa
+# estar definido antes de os workers importarem a aplicação
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', os.path.join('instance', 'metrics'))
+
 # Número de workers = (2 x núcleos) + 1
 workers = (2 * multiprocessing.cpu_count()) + 1
 
@@ -30,3 +35,39 @@ reload = False
 # Número máximo de requisições por worker antes de reiniciar
 max_requests = 1000
 max_requests_jitter = 50
+
+
+def on_starting(server):
+    """Descarta métricas de execuções anteriores do servidor"""
+    metrics_dir = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    os.makedirs(metrics_dir, exist_ok=True)
+    for path in glob.glob(os.path.join(metrics_dir, '*.db')):
+        os.remove(path)
+
+
+def post_fork(server, worker):
+    """Cria o cliente do banco do worker (pool HTTP/conexões) antes do primeiro request
+    
+    Com --preload, qualquer cliente criado no processo mestre é descartado sem
+    fechar: o pool herdado pelo fork não pode ser compartilhado entre processos.
+    """
+    from app.database import Database
+    from config import Config
+    Database.reset(close=False)
+    Database.get_client()
+    if Config.DATABASE_WARMUP:
+        Database.warm_up()
+
+
+def worker_exit(server, worker):
+    """Grava as atualizações adiadas e fecha as conexões do worker (inclusive na reciclagem por max_requests)"""
+    from app.database import Database
+    from app.writebehind import write_behind
+    write_behind.flush()
+    Database.reset()
+
+
+def child_exit(server, worker):
+    """Remove os gauges do worker que saiu (os contadores continuam somando)"""
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
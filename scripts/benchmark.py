@@ -0,0 +1,288 @@
+"""
+Benchmark dos caminhos mais usados (formulário público e painel).
+
+Roda a aplicação de create_app() com o backend de banco em memória
+(DATABASE_BACKEND = 'memory') e latência simulada por ida ao banco, sem rede.
+Para cada cenário mede p50/p95/p99, vazão e idas ao banco por request, e grava
+o resultado em JSON para comparar com uma execução anterior:
+
+    python scripts/benchmark.py --output bench.json
+    python scripts/benchmark.py --baseline bench.json --max-regression 10
+
+Com --max-regression, o script termina com código 1 se o p95 de algum cenário
+piorar mais que a porcentagem indicada ou se o número de idas ao banco aumentar.
+
+As tabelas com 10k/100k submissões ficam em listas Python: o tempo de filtragem
+do backend em memória entra na medição, então compare idas ao banco e a
+diferença entre execuções, não os valores absolutos com o Supabase.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bcrypt
+
+from app import create_app
+from app.cache import form_snapshots, user_cache
+from app.database import Database
+from config import Config
+
+PASSWORD = 'benchmark-password'
+FIELD_COUNTS = (5, 20, 50)
+SUBMISSION_COUNTS = (10_000, 100_000)
+
+
+class BenchmarkConfig(Config):
+    TESTING = True
+    DATABASE_BACKEND = 'memory'
+    SUBMISSION_MODE = 'direct'
+    SECRET_KEY = 'benchmark'
+    # Todos os requests vêm de 127.0.0.1: o limite por IP e o controle de
+    # admissão transformariam os cenários em 429/503
+    RATE_LIMIT_ENABLED = False
+    ADMISSION_ENABLED = False
+    # Logs por request (INFO) entrariam no tempo medido
+    LOG_LEVEL = 'WARNING'
+
+
+def _uuid() -> str:
+    return str(uuid.uuid4())
+
+
+def _timestamp(base: datetime, seconds: int) -> str:
+    return (base - timedelta(seconds=seconds)).isoformat()
+
+
+def seed(client, bcrypt_rounds: int, submission_counts=SUBMISSION_COUNTS):
+    """Cria um tenant com formulários de 5/20/50 campos e um tenant por volume de submissões"""
+    password_hash = bcrypt.hashpw(PASSWORD.encode('utf-8'), bcrypt.gensalt(bcrypt_rounds)).decode('utf-8')
+    now = datetime.now(timezone.utc)
+    fixtures = {'tenants': [], 'users': [], 'forms': [], 'form_fields': [], 'tenant_settings': [],
+                'leads': [], 'form_submissions': []}
+    context = {'forms': {}, 'users': {}}
+
+    def add_tenant(slug):
+        tenant = {'id': _uuid(), 'name': slug, 'slug': slug, 'whatsapp_number': '5511999999999'}
+        fixtures['tenants'].append(tenant)
+        fixtures['tenant_settings'].append({'tenant_id': tenant['id'], 'redirect_after_submit': False})
+        user = {'id': _uuid(), 'tenant_id': tenant['id'], 'email': f'admin@{slug}.bench',
+                'full_name': 'Admin', 'role': 'admin', 'password_hash': password_hash}
+        fixtures['users'].append(user)
+        context['users'][slug] = user['email']
+        return tenant
+
+    tenant = add_tenant('bench')
+    for count in FIELD_COUNTS:
+        form = {'id': _uuid(), 'tenant_id': tenant['id'], 'title': f'Formulário {count} campos'}
+        fixtures['forms'].append(form)
+        fields = [{'id': _uuid(), 'form_id': form['id'], 'field_type': 'text', 'label': f'Campo {i}',
+                   'field_name': f'campo_{i}', 'field_order': i, 'is_required': False}
+                  for i in range(count)]
+        fixtures['form_fields'].extend(fields)
+        context['forms'][count] = {'slug': tenant['slug'], 'id': form['id'], 'fields': [f['id'] for f in fields]}
+
+    for count in submission_counts:
+        tenant = add_tenant(f'bench-{count}')
+        form = {'id': _uuid(), 'tenant_id': tenant['id'], 'title': 'Volume'}
+        fixtures['forms'].append(form)
+        for i in range(count):
+            lead = {'id': _uuid(), 'tenant_id': tenant['id'], 'name': f'Lead {i}', 'phone': f'55{i:09d}',
+                    'created_at': _timestamp(now, i)}
+            fixtures['leads'].append(lead)
+            fixtures['form_submissions'].append({
+                'form_id': form['id'], 'lead_id': lead['id'], 'tenant_id': tenant['id'],
+                'status': 'completed' if i % 4 else 'incomplete', 'started_at': _timestamp(now, i)
+            })
+
+    client.load(fixtures)
+    return context
+
+
+def percentile(samples, pct: int) -> float:
+    if len(samples) < 2:
+        return samples[0] if samples else 0.0
+    return statistics.quantiles(samples, n=100, method='inclusive')[pct - 1]
+
+
+def measure(make_request, db_client, requests: int, warmup: int, concurrency: int):
+    """Executa o cenário e devolve as métricas em milissegundos"""
+    for _ in range(warmup):
+        make_request()
+
+    db_client.reset_stats()
+    durations, errors = [], 0
+
+    def timed(_):
+        started = time.perf_counter()
+        status = make_request()
+        return (time.perf_counter() - started) * 1000, status
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for duration, status in executor.map(timed, range(requests)):
+            durations.append(duration)
+            if status >= 400:
+                errors += 1
+    elapsed = time.perf_counter() - started
+
+    return {
+        'requests': requests,
+        'errors': errors,
+        'p50_ms': round(percentile(durations, 50), 3),
+        'p95_ms': round(percentile(durations, 95), 3),
+        'p99_ms': round(percentile(durations, 99), 3),
+        'mean_ms': round(statistics.fmean(durations), 3),
+        'throughput_rps': round(requests / elapsed, 2) if elapsed else 0.0,
+        'db_round_trips_per_request': round(db_client.round_trips / requests, 3),
+    }
+
+
+def logged_in_client(app, email: str):
+    client = app.test_client()
+    response = client.post('/auth/login', data={'email': email, 'password': PASSWORD})
+    if response.status_code != 302:
+        raise RuntimeError(f'Falha no login de {email} (status {response.status_code})')
+    return client
+
+
+def build_scenarios(app, context):
+    """Cenários: nome -> função que faz um request e devolve o status"""
+    scenarios = {}
+    public = app.test_client()
+
+    for count, form in context['forms'].items():
+        url = f"/f/{form['slug']}/{form['id']}"
+        data = {'name': 'Maria', 'phone': '5511988887777', 'email': 'maria@example.com'}
+        data.update({f'field_{field_id}': 'resposta' for field_id in form['fields']})
+
+        scenarios[f'form_get_{count}_fields'] = lambda url=url: public.get(url).status_code
+
+        def form_get_cold(url=url):
+            form_snapshots.clear()
+            return public.get(url).status_code
+        scenarios[f'form_get_cold_{count}_fields'] = form_get_cold
+
+        scenarios[f'form_post_{count}_fields'] = lambda url=url, data=data: public.post(url, data=data).status_code
+
+    admin = logged_in_client(app, context['users']['bench'])
+    scenarios['admin_dashboard'] = lambda: admin.get('/admin/dashboard').status_code
+    scenarios['api_stats'] = lambda: admin.get('/api/stats').status_code
+
+    for count in SUBMISSION_COUNTS:
+        slug = f'bench-{count}'
+        if slug not in context['users']:
+            continue
+        client = logged_in_client(app, context['users'][slug])
+        scenarios[f'admin_submissions_{count // 1000}k'] = \
+            lambda client=client: client.get('/admin/submissions').status_code
+
+    login_client = app.test_client()
+    login_data = {'email': context['users']['bench'], 'password': PASSWORD}
+
+    def login():
+        user_cache.clear()
+        status = login_client.post('/auth/login', data=login_data).status_code
+        login_client.get('/auth/logout')
+        return status if status != 302 else 200
+    scenarios['auth_login'] = login
+
+    return scenarios
+
+
+def compare(results, baseline, max_regression):
+    """Imprime a comparação com o baseline; devolve False se houver regressão acima do limite"""
+    ok = True
+    print(f"\n{'cenário':32} {'p95 base':>10} {'p95 atual':>10} {'Δ%':>8} {'idas base':>10} {'idas atual':>10}")
+    for name, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            print(f'{name:32} {"-":>10} {current["p95_ms"]:>10.2f} {"novo":>8}')
+            continue
+        delta = ((current['p95_ms'] - previous['p95_ms']) / previous['p95_ms'] * 100) if previous['p95_ms'] else 0.0
+        trips_before = previous['db_round_trips_per_request']
+        trips_now = current['db_round_trips_per_request']
+        flag = ''
+        if max_regression is not None and (delta > max_regression or trips_now > trips_before):
+            ok = False
+            flag = '  <-- regressão'
+        print(f"{name:32} {previous['p95_ms']:>10.2f} {current['p95_ms']:>10.2f} {delta:>+8.1f} "
+              f"{trips_before:>10.2f} {trips_now:>10.2f}{flag}")
+    return ok
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dos caminhos críticos com banco em memória')
+    parser.add_argument('--latency-ms', type=float, default=5.0, help='latência simulada por ida ao banco')
+    parser.add_argument('--requests', type=int, default=200, help='requests medidos por cenário')
+    parser.add_argument('--login-requests', type=int, default=20, help='requests medidos no cenário de login')
+    parser.add_argument('--warmup', type=int, default=10, help='requests de aquecimento por cenário')
+    parser.add_argument('--concurrency', type=int, default=1, help='threads disparando requests')
+    parser.add_argument('--bcrypt-rounds', type=int, default=12, help='custo do bcrypt dos usuários')
+    parser.add_argument('--scenario', action='append', help='roda apenas os cenários que contêm este texto')
+    parser.add_argument('--skip-large', action='store_true', help='não cria o tenant com 100k submissões')
+    parser.add_argument('--output', help='arquivo JSON com os resultados')
+    parser.add_argument('--baseline', help='JSON de uma execução anterior para comparação')
+    parser.add_argument('--max-regression', type=float, help='piora máxima aceita no p95, em %%')
+    args = parser.parse_args()
+
+    BenchmarkConfig.MEMORY_DB_LATENCY_MS = args.latency_ms
+    app = create_app(BenchmarkConfig)
+    db_client = Database.get_client()
+
+    counts = SUBMISSION_COUNTS[:1] if args.skip_large else SUBMISSION_COUNTS
+    context = seed(db_client, args.bcrypt_rounds, counts)
+    scenarios = build_scenarios(app, context)
+
+    results = {
+        'meta': {
+            'created_at': datetime.now(timezone.utc).isoformat(),
+            'git_revision': git_revision(),
+            'python': platform.python_version(),
+            'latency_ms': args.latency_ms,
+            'requests': args.requests,
+            'concurrency': args.concurrency,
+        },
+        'scenarios': {}
+    }
+
+    for name, make_request in scenarios.items():
+        if args.scenario and not any(s in name for s in args.scenario):
+            continue
+        requests = args.login_requests if name == 'auth_login' else args.requests
+        result = measure(make_request, db_client, requests, args.warmup, args.concurrency)
+        results['scenarios'][name] = result
+        print(f"{name:32} p50={result['p50_ms']:8.2f}ms p95={result['p95_ms']:8.2f}ms "
+              f"p99={result['p99_ms']:8.2f}ms {result['throughput_rps']:8.1f} req/s "
+              f"idas={result['db_round_trips_per_request']:.2f} erros={result['errors']}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2, ensure_ascii=False)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if not compare(results, baseline, args.max_regression):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,226 @@
+"""
+Build dos assets estáticos com nomes versionados (fingerprint) e manifest.
+
+Substitui os scripts de CDN de base.html (compilador JIT do Tailwind no navegador
+e o CSS completo do Font Awesome) por arquivos gerados a partir dos templates:
+
+- app.css: só as classes do Tailwind usadas em app/templates (e nos .py), via
+  CLI do Tailwind com tailwind.config.js;
+- icons.css: só as regras dos ícones `fa-*` usados nos templates, com as
+  @font-face dos estilos usados (solid/regular/brands) apontando para as
+  fontes copiadas. Com fontTools instalado (`pip install fonttools brotli`),
+  as fontes também são reduzidas aos glifos usados.
+
+Os arquivos vão para app/static/dist/ com o hash do conteúdo no nome, e
+app/static/dist/manifest.json mapeia o nome lógico ('app.css') para o arquivo.
+Os CSS também são gravados pré-comprimidos (`.gz` e, com o pacote `brotli`,
+`.br`). O app lê o manifest (app/assets.py) e serve esses arquivos com cache
+imutável, na versão comprimida que o navegador aceitar.
+Requer as dependências de package.json:
+
+    npm install
+    python scripts/build_assets.py
+"""
+import argparse
+import glob
+import gzip
+import hashlib
+import json
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TEMPLATES = os.path.join(ROOT, 'app', 'templates')
+DIST = os.path.join(ROOT, 'app', 'static', 'dist')
+TAILWIND_CONFIG = os.path.join(ROOT, 'tailwind.config.js')
+TAILWIND_INPUT = os.path.join(ROOT, 'assets', 'tailwind.css')
+FONTAWESOME = os.path.join(ROOT, 'node_modules', '@fortawesome', 'fontawesome-free')
+
+# Classes de estilo do Font Awesome -> arquivo de fonte (webfonts/<nome>.woff2)
+FA_STYLES = {
+    'solid': (('fas', 'fa-solid'), 'fa-solid-900'),
+    'regular': (('far', 'fa-regular'), 'fa-regular-400'),
+    'brands': (('fab', 'fa-brands'), 'fa-brands-400'),
+}
+_ICON_SELECTOR = re.compile(r'^\.fa-([a-z0-9-]+)(?:::?before)?$')
+_ICON_DECLARATION = re.compile(r'^\s*(?:content|--fa)\s*:\s*"\\?([0-9a-fA-F]+)"\s*;?\s*$')
+_CLASS_ATTRIBUTE = re.compile(r'class\s*=\s*["\']([^"\']*)["\']')
+
+
+def fingerprint(name: str, content: bytes) -> str:
+    """'app.css' -> 'app.<hash>.css'"""
+    stem, ext = os.path.splitext(name)
+    return f'{stem}.{hashlib.sha256(content).hexdigest()[:12]}{ext}'
+
+
+# Fontes woff2 já são comprimidas
+PRECOMPRESSED_EXTENSIONS = ('.css',)
+
+
+def write_asset(name: str, content: bytes, manifest: dict) -> str:
+    filename = fingerprint(name, content)
+    path = os.path.join(DIST, filename)
+    with open(path, 'wb') as f:
+        f.write(content)
+    if filename.endswith(PRECOMPRESSED_EXTENSIONS):
+        with open(path + '.gz', 'wb') as f:
+            f.write(gzip.compress(content, compresslevel=9, mtime=0))
+        if brotli is not None:
+            with open(path + '.br', 'wb') as f:
+                f.write(brotli.compress(content, quality=11))
+    manifest[name] = f'dist/{filename}'
+    return filename
+
+
+# Tailwind
+def build_tailwind() -> bytes:
+    binary = os.path.join(ROOT, 'node_modules', '.bin', 'tailwindcss')
+    if not os.path.exists(binary):
+        sys.exit('tailwindcss não encontrado: rode `npm install` na raiz do projeto')
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, 'app.css')
+        subprocess.run([binary, '-c', TAILWIND_CONFIG, '-i', TAILWIND_INPUT, '-o', output, '--minify'],
+                       cwd=ROOT, check=True)
+        with open(output, 'rb') as f:
+            return f.read()
+
+
+# Font Awesome
+def used_icons():
+    """Nomes de ícones (`fa-xxx`) e estilos usados nas classes dos templates"""
+    classes = set()
+    for path in glob.glob(os.path.join(TEMPLATES, '**', '*.html'), recursive=True):
+        with open(path, encoding='utf-8') as f:
+            for attribute in _CLASS_ATTRIBUTE.findall(f.read()):
+                classes.update(attribute.split())
+    icons = {c[3:] for c in classes if c.startswith('fa-')}
+    styles = {style for style, (names, _) in FA_STYLES.items() if classes.intersection(names)}
+    return icons, styles
+
+
+def _blocks(css: str):
+    """Divide o CSS em blocos de nível superior (prelúdio, corpo)"""
+    depth, start, prelude_end = 0, 0, None
+    for i, char in enumerate(css):
+        if char == '{':
+            if depth == 0:
+                prelude_end = i
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                yield css[start:prelude_end].strip(), css[prelude_end + 1:i]
+                start = i + 1
+
+
+def subset_fontawesome(css: str, icons: set, styles: set):
+    """Devolve (CSS reduzido, fontes usadas, code points usados)"""
+    fonts = {FA_STYLES[style][1] for style in styles}
+    rules, codepoints = [], set()
+    for prelude, body in _blocks(css):
+        if prelude.startswith('@font-face'):
+            source = re.search(r'webfonts/([\w-]+)\.woff2', body)
+            # Só as faces da família do FA 6 (sem as de compatibilidade v4/v5) e dos estilos usados
+            if not source or source.group(1) not in fonts or "'FontAwesome'" in body or 'Font Awesome 5' in body:
+                continue
+            body = re.sub(r'src:[^;]+;?', f'src:url("{source.group(1)}.woff2") format("woff2");', body)
+        elif not prelude.startswith('@'):
+            selectors = [s.strip() for s in prelude.split(',')]
+            icon_rule = _ICON_DECLARATION.match(body)
+            if icon_rule and all(_ICON_SELECTOR.match(s) for s in selectors):
+                selectors = [s for s in selectors if _ICON_SELECTOR.match(s).group(1) in icons]
+                if not selectors:
+                    continue
+                codepoints.add(int(icon_rule.group(1), 16))
+                prelude = ','.join(selectors)
+        rules.append(f'{prelude}{{{body.strip()}}}')
+    return '\n'.join(rules), fonts, codepoints
+
+
+def build_font(name: str, codepoints: set) -> bytes:
+    path = os.path.join(FONTAWESOME, 'webfonts', f'{name}.woff2')
+    try:
+        from fontTools import subset
+    except ImportError:
+        with open(path, 'rb') as f:
+            return f.read()
+
+    options = subset.Options()
+    options.flavor = 'woff2'
+    font = subset.load_font(path, options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=codepoints)
+    subsetter.subset(font)
+    with tempfile.TemporaryDirectory() as tmp:
+        output = os.path.join(tmp, f'{name}.woff2')
+        subset.save_font(font, output, options)
+        with open(output, 'rb') as f:
+            return f.read()
+
+
+def build_icons(manifest: dict) -> bytes:
+    stylesheet = os.path.join(FONTAWESOME, 'css', 'all.min.css')
+    if not os.path.exists(stylesheet):
+        sys.exit('@fortawesome/fontawesome-free não encontrado: rode `npm install` na raiz do projeto')
+    with open(stylesheet, encoding='utf-8') as f:
+        css = f.read()
+    banner = re.match(r'\s*(/\*!.*?\*/)', css, re.S)
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    css = re.sub(r'@charset[^;]*;', '', css)
+
+    icons, styles = used_icons()
+    css, fonts, codepoints = subset_fontawesome(css, icons, styles)
+    for font in sorted(fonts):
+        filename = write_asset(f'{font}.woff2', build_font(font, codepoints), manifest)
+        css = css.replace(f'url("{font}.woff2")', f'url("{filename}")')
+    if banner:
+        css = banner.group(1) + '\n' + css
+    return css.encode('utf-8')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Gera os CSS versionados em app/static/dist e o manifest')
+    parser.add_argument('--skip-tailwind', action='store_true', help='não recompila o CSS do Tailwind')
+    parser.add_argument('--skip-icons', action='store_true', help='não regera o CSS dos ícones')
+    args = parser.parse_args()
+
+    manifest_path = os.path.join(DIST, 'manifest.json')
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            previous = json.load(f)
+        # Mantém as entradas das etapas puladas
+        if args.skip_tailwind and 'app.css' in previous:
+            manifest['app.css'] = previous['app.css']
+        if args.skip_icons:
+            manifest.update({name: path for name, path in previous.items() if name != 'app.css'})
+
+    kept = {os.path.basename(path) for path in manifest.values()}
+    if os.path.isdir(DIST):
+        for filename in os.listdir(DIST):
+            if filename not in kept and os.path.splitext(filename)[0] not in kept:
+                os.remove(os.path.join(DIST, filename))
+    os.makedirs(DIST, exist_ok=True)
+
+    if not args.skip_tailwind:
+        write_asset('app.css', build_tailwind(), manifest)
+    if not args.skip_icons:
+        write_asset('icons.css', build_icons(manifest), manifest)
+
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    for name, path in sorted(manifest.items()):
+        size = os.path.getsize(os.path.join(DIST, os.path.basename(path)))
+        print(f'{name:24} {path:48} {size / 1024:8.1f} KiB')
+
+
+if __name__ == '__main__':
+    main()
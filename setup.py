@@ -18,6 +18,11 @@ setup(
         'Werkzeug==3.0.1',
         'WTForms==3.1.1',
         'gunicorn==21.2.0',
+        'psycopg[binary,pool]==3.2.3',
+        'prometheus-client==0.21.1',
+        'asgiref==3.8.1',
+        'uvicorn==0.30.6',
+        'Brotli==1.1.0',
     ],
     python_requires='>=3.8',
 )
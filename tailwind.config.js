@@ -0,0 +1,10 @@
+// Classes usadas nos templates (e em strings de classes nos módulos Python),
+// compiladas por scripts/build_assets.py no lugar do compilador do cdn.tailwindcss.com
+/** @type {import('tailwindcss').Config} */
+module.exports = {
+  content: ['./app/templates/**/*.html', './app/**/*.py'],
+  theme: {
+    extend: {},
+  },
+  plugins: [],
+};
@@ -0,0 +1,63 @@
+"""
+Fixtures dos testes: aplicação com o backend em memória (DATABASE_BACKEND='memory').
+
+Cada teste recebe um banco vazio e caches limpos; os limites por host (rate
+limit, tentativas de login) gravam em arquivos temporários.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import create_app  # noqa: E402
+from app.cache import form_snapshots, submission_tokens, user_cache  # noqa: E402
+from app.database import Database  # noqa: E402
+from config import Config  # noqa: E402
+
+TENANT_ID = '11111111-1111-1111-1111-111111111111'
+FORM_ID = '22222222-2222-2222-2222-222222222222'
+
+
+@pytest.fixture
+def app(tmp_path):
+    class TestConfig(Config):
+        TESTING = True
+        DEBUG = False
+        SECRET_KEY = 'test'
+        DATABASE_BACKEND = 'memory'
+        MEMORY_DB_LATENCY_MS = 0
+        SUBMISSION_MODE = 'direct'
+        INVALIDATION_BACKEND = 'local'
+        RATE_LIMIT_ENABLED = False
+        ADMISSION_ENABLED = False
+        RATE_LIMIT_PATH = str(tmp_path / 'rate_limit.bin')
+        LOGIN_THROTTLE_PATH = str(tmp_path / 'login_throttle.bin')
+        LOG_LEVEL = 'WARNING'
+
+    Database.reset()
+    app = create_app(TestConfig)
+    for cache in (form_snapshots, submission_tokens, user_cache):
+        cache.clear()
+    yield app
+    Database.reset()
+
+
+@pytest.fixture
+def memory_db(app):
+    return Database.get_client()
+
+
+@pytest.fixture
+def form(memory_db):
+    """Tenant 't' com um formulário ativo de dois campos"""
+    memory_db.load({
+        'tenants': [{'id': TENANT_ID, 'name': 'Tenant', 'slug': 't'}],
+        'forms': [{'id': FORM_ID, 'tenant_id': TENANT_ID, 'title': 'Cadastro'}],
+        'form_fields': [
+            {'form_id': FORM_ID, 'field_type': 'text', 'label': 'Cidade', 'field_name': 'cidade', 'field_order': 1},
+            {'form_id': FORM_ID, 'field_type': 'text', 'label': 'Bairro', 'field_name': 'bairro', 'field_order': 2},
+        ],
+    })
+    return memory_db.tables['forms'][0]
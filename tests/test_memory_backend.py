@@ -0,0 +1,95 @@
+"""Comportamento dos modelos e caches sobre o backend em memória"""
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from app.cache import form_snapshots
+from app.models import Form, FormField, FormSubmission
+
+from conftest import FORM_ID, TENANT_ID
+
+FORM_URL = f'/f/t/{FORM_ID}'
+
+
+def test_get_page_walks_all_rows_once_in_keyset_order(memory_db):
+    base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    memory_db.load({'forms': [
+        # Dois formulários com o mesmo created_at: o desempate é pelo id
+        {'id': f'00000000-0000-0000-0000-00000000000{i}', 'tenant_id': TENANT_ID, 'title': f'F{i}',
+         'created_at': (base + timedelta(minutes=min(i, 5))).isoformat()}
+        for i in range(7)
+    ]})
+
+    pages, cursor = [], None
+    while True:
+        page, cursor = Form.get_page(TENANT_ID, cursor=cursor, limit=3)
+        pages.append([row['id'] for row in page])
+        if not cursor:
+            break
+
+    ids = [row_id for page in pages for row_id in page]
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert ids == sorted(ids, reverse=True)
+    assert len(set(ids)) == 7
+
+
+def test_get_page_ignores_invalid_cursor(memory_db, form):
+    page, cursor = Form.get_page(TENANT_ID, cursor='não-é-um-cursor')
+    assert [row['id'] for row in page] == [FORM_ID]
+    assert cursor is None
+
+
+def test_submit_form_deduplicates_by_ingest_key(memory_db, form):
+    field_id = memory_db.tables['form_fields'][0]['id']
+    key = str(uuid.uuid4())
+    args = (TENANT_ID, FORM_ID, '11999990000', 'a@b.c', 'Ana', [(field_id, 'Recife')])
+
+    first = FormSubmission.submit(*args, ingest_key=key)
+    again = FormSubmission.submit(*args, ingest_key=key)
+    other = FormSubmission.submit(*args, ingest_key=str(uuid.uuid4()))
+
+    assert again['id'] == first['id'] and again['duplicate'] is True
+    assert other['id'] != first['id']
+    assert len(memory_db.tables['form_submissions']) == 2
+    assert len(memory_db.tables['form_responses']) == 2
+    # O lead é o mesmo (mesmo telefone)
+    assert len(memory_db.tables['leads']) == 1
+
+
+def test_form_update_invalidates_snapshot(app, form):
+    client = app.test_client()
+    assert b'Cadastro' in client.get(FORM_URL).data
+    assert len(form_snapshots) == 1
+
+    assert Form.update(FORM_ID, {'title': 'Inscrição'})
+    assert len(form_snapshots) == 0
+    assert 'Inscrição' in client.get(FORM_URL).get_data(as_text=True)
+
+
+def test_field_update_invalidates_snapshot(app, memory_db, form):
+    client = app.test_client()
+    assert b'Cidade' in client.get(FORM_URL).data
+    field_id = memory_db.tables['form_fields'][0]['id']
+
+    assert FormField.update(field_id, {'label': 'Município'})
+    assert len(form_snapshots) == 0
+    assert 'Município' in client.get(FORM_URL).get_data(as_text=True)
+
+
+def test_field_create_invalidates_snapshot(app, form):
+    client = app.test_client()
+    client.get(FORM_URL)
+
+    assert FormField.create(FORM_ID, {'field_type': 'text', 'label': 'Profissão', 'field_name': 'profissao',
+                                      'field_order': 3})
+    assert 'Profissão' in client.get(FORM_URL).get_data(as_text=True)
+
+
+def test_etag_changes_after_form_update(app, form):
+    client = app.test_client()
+    etag = client.get(FORM_URL).headers['ETag']
+    assert client.get(FORM_URL, headers={'If-None-Match': etag}).status_code == 304
+
+    Form.update(FORM_ID, {'description': 'Nova descrição'})
+    response = client.get(FORM_URL, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag